@@ -0,0 +1,233 @@
+"""アニメーション GIF / WebP の再生。
+
+ImagePrefetcher.decode_scaled は 1 フレーム目しか読まないため、静止画として
+表示したうえで、このモジュールが 2 フレーム目以降を流し込む。
+
+- フレームは表示先ごとのワーカースレッドが QImageReader で 1 枚ずつ読み、
+  その場で表示サイズへ縮小してからリングバッファ（queue.Queue）に積む。
+  全フレームを先にデコードしないので、300 フレームの GIF でも保持するのは
+  リング分（表示サイズで FRAME_RING_BYTES 以内）だけ。
+- リングが満杯ならワーカーは待つ（再生が追いつくまでデコードしない）。
+- 1 周分がリングに収まる短いアニメーションは、最初の 1 周を覚えた時点で
+  ワーカーを終了し、以降はメモリ上のフレームを繰り返す。
+- GUI スレッドは単発 QTimer でリングから 1 枚取り出して frame_ready を
+  出すだけで、デコードはしない。
+"""
+
+import queue
+import logging
+import threading
+
+from PyQt5.QtCore import QObject, QThread, QTimer, QSize, pyqtSignal
+from PyQt5.QtGui import QImage, QImageReader
+
+logger = logging.getLogger(__name__)
+
+
+ANIMATED_EXTENSIONS = ('.gif', '.webp')
+
+FRAME_RING_SIZE = 12                    # リングに置くフレーム数の上限
+FRAME_RING_BYTES = 32 * 1024 * 1024     # 表示先 1 つあたりのリングのバイト数上限
+DEFAULT_FRAME_DELAY_MS = 100
+MIN_FRAME_DELAY_MS = 20                 # 0〜10ms 指定はブラウザ同様 DEFAULT 扱い
+_UNDERRUN_RETRY_MS = 10                 # デコードが間に合わないときの再確認間隔
+
+
+def is_animation_candidate(image_path):
+    """アニメーションの可能性がある拡張子か（それ以外はワーカーを起こさない）。"""
+    return image_path.lower().endswith(ANIMATED_EXTENSIONS)
+
+
+def _fit_size(src_size, target_w, target_h):
+    """decode_scaled と同じアスペクト比保持のサイズ（静止画表示とずれないように）。"""
+    iw, ih = src_size.width(), src_size.height()
+    image_ratio = iw / ih
+    if target_w / target_h > image_ratio:
+        return QSize(max(1, int(target_h * image_ratio)), target_h)
+    return QSize(target_w, max(1, int(target_w / image_ratio)))
+
+
+def _frame_delay(reader):
+    delay = reader.nextImageDelay()
+    return DEFAULT_FRAME_DELAY_MS if delay <= 10 else max(MIN_FRAME_DELAY_MS, delay)
+
+
+class _FrameDecoder(QThread):
+    """1 つのアニメーションのフレームを読み続けてリングへ積むワーカー。"""
+
+    not_animated = pyqtSignal()
+    loop_complete = pyqtSignal(object)  # 1 周分がリングに収まった: [(QImage, delay_ms), ...]
+
+    def __init__(self, image_path, target_w, target_h, parent=None):
+        super().__init__(parent)
+        self._path = image_path
+        self._target = (target_w, target_h)
+        self._stop = threading.Event()
+        self.ring = queue.Queue(maxsize=FRAME_RING_SIZE)  # フレームサイズが分かったら作り直す
+
+    def request_stop(self):
+        self._stop.set()
+
+    def _open(self):
+        reader = QImageReader(self._path)
+        reader.setAutoTransform(True)
+        size = reader.size()
+        if not size.isValid() or size.width() <= 0 or size.height() <= 0:
+            return None
+        reader.setScaledSize(_fit_size(size, *self._target))
+        return reader
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self.ring.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run(self):
+        try:
+            self._run()
+        except Exception:
+            logger.exception("アニメーションのデコードに失敗: %s", self._path)
+
+    def _run(self):
+        reader = self._open()
+        if reader is None or not reader.supportsAnimation():
+            self.not_animated.emit()
+            return
+
+        # 2 フレーム目が読めるまでは静止画扱い（1 枚だけの GIF/WebP では何もしない）
+        first = reader.read()
+        first_delay = _frame_delay(reader)
+        second = reader.read() if not first.isNull() else QImage()
+        if second.isNull():
+            self.not_animated.emit()
+            return
+
+        frame_bytes = max(1, first.sizeInBytes())
+        slots = max(2, min(FRAME_RING_SIZE, FRAME_RING_BYTES // frame_bytes))
+        self.ring = queue.Queue(maxsize=slots)
+
+        collected = []  # 1 周目のフレーム（slots を超えたら捨てる）
+        pending = [(first, first_delay), (second, _frame_delay(reader))]
+        while not self._stop.is_set():
+            for item in pending:
+                if not self._put(item):
+                    return
+                if collected is not None:
+                    collected.append(item)
+                    if len(collected) > slots:
+                        collected = None
+            frame = reader.read()
+            if frame.isNull():
+                if collected is not None:
+                    self.loop_complete.emit(collected)
+                    return
+                # 2 周目以降はファイルを開き直して先頭から読み直す
+                reader = self._open()
+                if reader is None:
+                    return
+                frame = reader.read()
+                if frame.isNull():
+                    return
+            pending = [(frame, _frame_delay(reader))]
+
+
+class AnimationPlayer(QObject):
+    """表示先 1 つ（シングル表示 or 4分割の 1 セル）分のアニメーション再生。
+
+    play(path, w, h) で再生を始め、フレームを frame_ready で通知する。
+    同じ (path, w, h) で呼ばれた場合は何もしない（再表示で頭に戻らない）。
+    """
+
+    frame_ready = pyqtSignal(QImage)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._advance)
+        self._source = None
+        self._decoder = None
+        self._loop = None        # 1 周分をメモリに持てた場合のフレーム列
+        self._shown = 0          # 表示したフレーム数
+        self._retired = set()    # 停止を依頼した（まだ終わっていない）ワーカー
+
+    def source(self):
+        return self._source
+
+    def is_playing(self):
+        """フレームを 1 枚以上表示中か（静止画の上書きを避ける判定用）。"""
+        return self._source is not None and self._shown > 0
+
+    def play(self, image_path, target_w, target_h):
+        source = (image_path, target_w, target_h)
+        if source == self._source:
+            return
+        self.stop()
+        if not is_animation_candidate(image_path):
+            return
+        self._source = source
+        decoder = _FrameDecoder(image_path, target_w, target_h, parent=self)
+        decoder.not_animated.connect(self._on_not_animated)
+        decoder.loop_complete.connect(self._on_loop_complete)
+        self._decoder = decoder
+        decoder.start()
+        self._timer.start(_UNDERRUN_RETRY_MS)
+
+    def stop(self):
+        self._timer.stop()
+        self._source = None
+        self._loop = None
+        self._shown = 0
+        if self._decoder is not None:
+            self._retire(self._decoder)
+            self._decoder = None
+
+    def shutdown(self):
+        """終了時: すべてのワーカーを止めて終了を待つ。"""
+        self.stop()
+        for decoder in list(self._retired):
+            decoder.wait()
+
+    def _retire(self, decoder):
+        decoder.request_stop()
+        decoder.not_animated.disconnect(self._on_not_animated)
+        decoder.loop_complete.disconnect(self._on_loop_complete)
+        self._retired.add(decoder)
+        decoder.finished.connect(lambda d=decoder: self._release(d))
+        if decoder.isFinished():
+            self._release(decoder)
+
+    def _release(self, decoder):
+        if decoder in self._retired:
+            self._retired.discard(decoder)
+            decoder.deleteLater()
+
+    def _on_not_animated(self):
+        self.stop()
+
+    def _on_loop_complete(self, frames):
+        if self._decoder is None or not frames:
+            return
+        # リングに残っているのは frames の続きなので、表示済みの枚数から位置を合わせる
+        self._loop = frames
+        self._retire(self._decoder)
+        self._decoder = None
+
+    def _advance(self):
+        if self._source is None:
+            return
+        if self._loop is not None:
+            frame, delay = self._loop[self._shown % len(self._loop)]
+        else:
+            try:
+                frame, delay = self._decoder.ring.get_nowait()
+            except queue.Empty:
+                self._timer.start(_UNDERRUN_RETRY_MS)
+                return
+        self._shown += 1
+        self.frame_ready.emit(frame)
+        self._timer.start(delay)
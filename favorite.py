@@ -3,9 +3,9 @@ from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QListWidget, QPushButton,
     QMessageBox, QSplitter, QLabel, QAbstractItemView, QListWidgetItem,
 )
-from PyQt5.QtGui import QPixmap, QImage
+from PyQt5.QtGui import QPixmap
 from PyQt5.QtCore import Qt
-from PIL import Image
+from thumbnail_cache import ThumbnailPreview, PREVIEW_BUCKET
 
 
 class CustomListWidget(QListWidget):
@@ -28,6 +28,10 @@ class FavoriteTab(QWidget):
         super().__init__(parent)
         self.settings = settings
         self.parent = parent
+        # フォルダ先頭画像のプレビュー（サムネイルキャッシュ経由。未生成なら完成通知で表示し直す）
+        self._preview = ThumbnailPreview(
+            self._show_preview_entry, self._show_preview_pending, self._show_preview_failed, parent=self
+        )
         self.initUI()
 
     def initUI(self):
@@ -240,6 +244,7 @@ class FavoriteTab(QWidget):
         if entry and entry.get("type") == "folder":
             self.show_folder_preview(entry.get("path", ""))
         else:
+            self._preview.cancel()
             self.preview_label.setPixmap(QPixmap())
             self.preview_label.setText("🏷️ タグ検索リスト\n(ダブルクリックで再検索・表示)")
 
@@ -248,6 +253,7 @@ class FavoriteTab(QWidget):
             self.on_item_clicked(current)
 
     def show_folder_preview(self, folder_path):
+        self._preview.cancel()
         if not folder_path or not os.path.exists(folder_path):
             self.preview_label.setText("フォルダが存在しません")
             return
@@ -257,18 +263,20 @@ class FavoriteTab(QWidget):
             if not image_files:
                 self.preview_label.setText("画像ファイルがありません")
                 return
-            first_image = os.path.join(folder_path, image_files[0])
-            image = Image.open(first_image)
-            preview_size = (280, 180)
-            image.thumbnail(preview_size, Image.Resampling.LANCZOS)
-            image_rgba = image.convert("RGBA")
-            w, h = image.size
-            qimage = QImage(image_rgba.tobytes("raw", "RGBA"), w, h, QImage.Format_RGBA8888)
-            pixmap = QPixmap.fromImage(qimage)
-            self.preview_label.setPixmap(pixmap)
+            self._preview.show(os.path.join(folder_path, image_files[0]), PREVIEW_BUCKET)
         except Exception as e:
             self.preview_label.setText(f"プレビュー読み込みエラー:\n{str(e)}")
 
+    def _show_preview_entry(self, image_path, entry):
+        preview = entry.image.scaled(280, 180, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        self.preview_label.setPixmap(QPixmap.fromImage(preview))
+
+    def _show_preview_pending(self, image_path):
+        self.preview_label.setText("プレビューを生成中…")
+
+    def _show_preview_failed(self, image_path):
+        self.preview_label.setText("プレビュー読み込みエラー")
+
     # ------------------------------------------------------------------
     # 複数選択・一括タグ付け
     # ------------------------------------------------------------------
@@ -0,0 +1,200 @@
+"""フォルダごとのファイル一覧インデックス。
+
+履歴・お気に入りから同じフォルダを開き直すたびに、全ファイルを列挙して stat し直すと
+数万枚のフォルダ（特に NAS）では数秒かかる。前回の列挙結果（ファイル名・サイズ・
+mtime・ctime・inode）を ~/.kabaviewer/folder_index.db に保存しておき、次のように使う。
+
+- ディレクトリ自体の mtime が前回と同じ → ファイルの追加・削除・改名が無いので、
+  列挙せずに保存済みの一覧ですぐに表示する（ファイルは stat しない）
+- 変わっている → 列挙し直す。名前と inode が同じファイルは保存済みのサイズ・日付を
+  使い、新しいファイルだけ stat する
+
+ファイルをその場で書き換えてもディレクトリの mtime も inode も変わらないので、
+上のどちらでも古い日付のままになる。ビューアーが画像を表示するときにその 1 枚だけ
+stat して確かめ、変わっていたら update_entries で直す。
+
+一覧はフォルダ単位で丸ごと差し替えるので、1 エントリ 1 行ではなくフォルダ 1 行に
+列ごとの配列（名前は NUL 区切り、数値は array のバイト列）としてまとめて持つ。
+5 万件の行を SELECT して組み立てるより読み込みが数倍速い。
+フォルダ数が MAX_FOLDERS を超えたら最後に開いた日時の古いものから削除する。
+"""
+
+import os
+import time
+import array
+import sqlite3
+import logging
+import threading
+from collections import namedtuple
+
+logger = logging.getLogger(__name__)
+
+
+_DEFAULT_DIR = os.path.expanduser("~/.kabaviewer")
+_DB_NAME = "folder_index.db"
+
+SCHEMA_VERSION = 1
+
+MAX_FOLDERS = 500
+
+
+# entries: {name: (size, mtime, ctime, inode)}
+FolderListing = namedtuple("FolderListing", ["dir_mtime", "entries"])
+
+
+def _db_path():
+    return os.path.join(_DEFAULT_DIR, _DB_NAME)
+
+
+def _pack(entries):
+    """{name: (size, mtime, ctime, inode)} を (names, sizes, times, inodes) の BLOB にする。"""
+    names = "\0".join(entries).encode("utf-8", "surrogateescape")
+    sizes = array.array("q")
+    times = array.array("d")   # mtime, ctime を交互に
+    inodes = array.array("Q")
+    for size, mtime, ctime, inode in entries.values():
+        sizes.append(size)
+        times.append(mtime)
+        times.append(ctime)
+        inodes.append(inode)
+    return names, sizes.tobytes(), times.tobytes(), inodes.tobytes()
+
+
+def _unpack(names, sizes, times, inodes):
+    if not names:
+        return {}
+    name_list = names.decode("utf-8", "surrogateescape").split("\0")
+    size_arr = array.array("q")
+    size_arr.frombytes(sizes)
+    time_arr = array.array("d")
+    time_arr.frombytes(times)
+    inode_arr = array.array("Q")
+    inode_arr.frombytes(inodes)
+    if not (len(name_list) == len(size_arr) == len(inode_arr) == len(time_arr) // 2):
+        raise ValueError("フォルダインデックスの列の長さが一致しません")
+    it = iter(time_arr)
+    return dict(zip(name_list, zip(size_arr, it, it, inode_arr)))
+
+
+class FolderIndex:
+    """フォルダ一覧の SQLite インデックス（スキャンワーカーから呼ばれる）。"""
+
+    def __init__(self, path=None):
+        os.makedirs(_DEFAULT_DIR, exist_ok=True)
+        self.db_path = path or _db_path()
+        # スレッドごとに connection を保持（sqlite3 はデフォルトでスレッド共有 NG）
+        self._local = threading.local()
+        self._init_schema()
+
+    # ---------- DB ----------
+
+    def _conn(self):
+        c = getattr(self._local, "conn", None)
+        if c is None:
+            c = sqlite3.connect(self.db_path)
+            # 消えても作り直せるインデックスなので丈夫さよりスピード優先
+            c.execute("PRAGMA journal_mode=WAL")
+            c.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = c
+        return c
+
+    def close_thread_connection(self):
+        """呼び出し元スレッドの connection を閉じる（使い捨てワーカーの終了時）。"""
+        c = getattr(self._local, "conn", None)
+        if c is not None:
+            c.close()
+            self._local.conn = None
+
+    def _init_schema(self):
+        c = self._conn()
+        current = c.execute("PRAGMA user_version").fetchone()[0]
+        if current < 1:
+            c.execute(
+                """
+                CREATE TABLE IF NOT EXISTS folders (
+                    path        TEXT PRIMARY KEY,
+                    dir_mtime   REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    names       BLOB NOT NULL,
+                    sizes       BLOB NOT NULL,
+                    times       BLOB NOT NULL,
+                    inodes      BLOB NOT NULL
+                )
+                """
+            )
+            c.execute("CREATE INDEX IF NOT EXISTS idx_folders_last_access ON folders(last_access)")
+        c.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        c.commit()
+
+    # ---------- API ----------
+
+    def load(self, folder_path):
+        """保存済みの一覧を FolderListing で返す。未登録なら None。"""
+        try:
+            c = self._conn()
+            row = c.execute(
+                "SELECT dir_mtime, names, sizes, times, inodes FROM folders WHERE path = ?",
+                (folder_path,),
+            ).fetchone()
+            if row is None:
+                return None
+            dir_mtime, *columns = row
+            entries = _unpack(*columns)
+            c.execute("UPDATE folders SET last_access = ? WHERE path = ?", (time.time(), folder_path))
+            c.commit()
+            return FolderListing(dir_mtime, entries)
+        except (sqlite3.Error, ValueError):
+            logger.exception("フォルダインデックスの読み込みに失敗: %s", folder_path)
+            return None
+
+    def save(self, folder_path, dir_mtime, entries):
+        """フォルダの一覧を丸ごと差し替える。entries は {name: (size, mtime, ctime, inode)}。"""
+        try:
+            c = self._conn()
+            with c:
+                c.execute(
+                    "INSERT OR REPLACE INTO folders "
+                    "(path, dir_mtime, last_access, names, sizes, times, inodes) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (folder_path, dir_mtime, time.time(), *_pack(entries)),
+                )
+                c.execute(
+                    "DELETE FROM folders WHERE path IN "
+                    "(SELECT path FROM folders ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                    (MAX_FOLDERS,),
+                )
+        except (sqlite3.Error, OverflowError):
+            logger.exception("フォルダインデックスの保存に失敗: %s", folder_path)
+
+    def update_entries(self, folder_path, changes):
+        """保存済みの一覧のうち changes {name: (size, mtime, ctime)} の分だけ書き換える。
+
+        その場で書き換えられたファイル用（ディレクトリの mtime は保存済みのまま）。
+        未登録のフォルダ・一覧に無い名前は無視する。
+        """
+        listing = self.load(folder_path)
+        if listing is None:
+            return
+        entries = listing.entries
+        updated = False
+        for name, (size, mtime, ctime) in changes.items():
+            cached = entries.get(name)
+            if cached is not None:
+                entries[name] = (size, mtime, ctime, cached[3])
+                updated = True
+        if updated:
+            self.save(folder_path, listing.dir_mtime, entries)
+
+
+_shared = None
+
+
+def get_folder_index():
+    """アプリ全体で共有する FolderIndex を返す。開けない場合は None（インデックスなしで動く）。"""
+    global _shared
+    if _shared is None:
+        try:
+            _shared = FolderIndex()
+        except (OSError, sqlite3.Error):
+            logger.exception("フォルダインデックスを開けませんでした")
+            return None
+    return _shared
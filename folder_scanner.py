@@ -0,0 +1,279 @@
+"""フォルダ内の画像をバックグラウンドで列挙するスキャナー。
+
+os.listdir → 拡張子フィルタ → stat でソート → 表示、の順だと、SMB 上の数万枚の
+フォルダでは最初の 1 枚が出るまで UI が固まる。FolderScanWorker は os.scandir で
+ディレクトリを読みながら、見つけた画像をバッチで batch_found に流す。
+
+- 最初のバッチは 1 枚目が見つかった時点ですぐに出す（すぐ表示を始められる）
+- 以降はそれまでの合計と同じ大きさ（倍々）のバッチで出す。受け側はバッチごとに
+  一覧全体の並べ替え・グリッドの付け替えをするので、全体の手間が O(N) 程度に収まる
+- 列挙が遅い（SMB 等）ときは一定時間ごとにサイズ未満でも区切って出す
+- with_stat=True のときは DirEntry.stat() の mtime / ctime も一緒に渡す
+  （日付順ソートのために GUI 側で全ファイルを stat し直さない）
+- index（folder_index.FolderIndex）を渡すと、ディレクトリの mtime が前回と同じなら
+  列挙せずに保存済みの一覧を 1 バッチで返す（ファイルは 1 つも stat しない）。
+  変わっていれば列挙し直すが、名前と inode が保存済みと同じファイルは保存済みの
+  サイズ・日付を使い、stat するのは新しく増えた（置き換わった）ファイルだけ。
+  結果はインデックスに書き戻す（インデックス使用時は常に mtime / ctime も渡す）。
+  その場での書き換え（お気に入りの EXIF 書き込み等）はディレクトリの mtime も
+  inode も変えないのでここでは分からない。ビューアーが表示した画像だけを stat して
+  確かめ、インデックスを直す（folder_index.FolderIndex.update_entries）
+
+MultiFolderScanWorker は複数フォルダ表示用で、各フォルダを並列に os.scandir し、
+同じ形のバッチで流す（DirEntry.stat() の mtime / ctime も常に渡す）。同じフォルダを
+別のパス（シンボリックリンク等）で選んだ場合や、リンクで同じファイルを指している
+場合は (st_dev, st_ino) で重複を除く。
+
+受け側は generation でスキャンを識別し、古いスキャンの通知は捨てる。
+"""
+
+import os
+import time
+import queue
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp')
+
+# 複数フォルダ表示は従来から WebP も含めている
+MULTI_IMAGE_EXTENSIONS = IMAGE_EXTENSIONS + ('.webp',)
+MULTI_SCAN_WORKERS = 8
+_FOLDER_CHUNK = 256  # フォルダごとのスレッドがまとめて渡す件数
+
+FIRST_BATCH_SIZE = 1
+MIN_BATCH_SIZE = 256
+BATCH_INTERVAL = 0.5  # 秒。これより間が空いたらサイズ未満でも出す
+
+
+class FolderScanWorker(QThread):
+    """1 フォルダを os.scandir で列挙し、画像パスをバッチで通知するワーカー。
+
+    batch_found(generation, paths, stats): stats は with_stat=True のときだけ
+    {path: (mtime, ctime)}、それ以外は空 dict。
+    scan_finished(generation, total): 列挙完了（中断時は出さない）。
+    scan_failed(generation, message): フォルダを開けなかった等。
+    """
+
+    batch_found = pyqtSignal(int, object, object)
+    scan_finished = pyqtSignal(int, int)
+    scan_failed = pyqtSignal(int, str)
+
+    def __init__(self, folder_path, generation, with_stat=False, index=None, parent=None):
+        super().__init__(parent)
+        self._folder = folder_path
+        self._generation = generation
+        self._index = index
+        self._with_stat = with_stat or index is not None
+        self._stop = False
+
+    def request_stop(self):
+        self._stop = True
+
+    def run(self):
+        try:
+            total = self._scan()
+        except OSError as e:
+            logger.exception("フォルダのスキャンに失敗: %s", self._folder)
+            self.scan_failed.emit(self._generation, str(e))
+            return
+        finally:
+            if self._index is not None:
+                self._index.close_thread_connection()
+        if total is not None:
+            self.scan_finished.emit(self._generation, total)
+
+    def _scan(self):
+        dir_mtime = os.stat(self._folder).st_mtime
+        known = self._index.load(self._folder) if self._index is not None else None
+        if known is not None and known.dir_mtime == dir_mtime:
+            return self._emit_known(known.entries)
+        known_entries = known.entries if known is not None else {}
+
+        entries = {}  # インデックスに書き戻す {name: (size, mtime, ctime, inode)}
+        paths, stats = [], {}
+        total = 0
+        batch_size = FIRST_BATCH_SIZE
+        last_flush = time.monotonic()
+        with os.scandir(self._folder) as it:
+            for entry in it:
+                if self._stop:
+                    return None
+                if not entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    if self._with_stat:
+                        inode = entry.inode()
+                        cached = known_entries.get(entry.name)
+                        if cached is None or cached[3] != inode:
+                            st = entry.stat()
+                            cached = (st.st_size, st.st_mtime, st.st_ctime, inode)
+                        entries[entry.name] = cached
+                        stats[entry.path] = cached[1:3]
+                except OSError:
+                    continue
+                paths.append(entry.path)
+
+                now = time.monotonic()
+                if len(paths) >= batch_size or now - last_flush >= BATCH_INTERVAL:
+                    total += len(paths)
+                    self.batch_found.emit(self._generation, paths, stats)
+                    paths, stats = [], {}
+                    last_flush = now
+                    batch_size = max(MIN_BATCH_SIZE, total)
+        if self._stop:
+            return None
+        if paths:
+            total += len(paths)
+            self.batch_found.emit(self._generation, paths, stats)
+        if self._index is not None:
+            # 列挙前に取った mtime で保存する（列挙中に変わっていれば次回は列挙し直す）
+            self._index.save(self._folder, dir_mtime, entries)
+        return total
+
+    def _emit_known(self, entries):
+        """インデックスの一覧をそのまま 1 バッチで返す（ファイルには触らない）。"""
+        if self._stop:
+            return None
+        paths, stats = [], {}
+        for name, (_, mtime, ctime, _) in entries.items():
+            path = os.path.join(self._folder, name)
+            paths.append(path)
+            stats[path] = (mtime, ctime)
+        if paths:
+            self.batch_found.emit(self._generation, paths, stats)
+        return len(paths)
+
+
+def _file_key(entry, st):
+    """同じファイルかどうかの判定キー。Windows の DirEntry.stat() は inode が 0 なので実パスで代用。"""
+    if st.st_ino:
+        return st.st_dev, st.st_ino
+    return os.path.normcase(os.path.realpath(entry.path))
+
+
+class MultiFolderScanWorker(QThread):
+    """複数フォルダを並列に列挙し、重複を除いた画像パスをバッチで通知するワーカー。
+
+    シグナルは FolderScanWorker と同じ（stats は常に {path: (mtime, ctime)}）。
+    folders_skipped(generation, folders): 画像が無かった・開けなかったフォルダ。
+    """
+
+    batch_found = pyqtSignal(int, object, object)
+    scan_finished = pyqtSignal(int, int)
+    scan_failed = pyqtSignal(int, str)
+    folders_skipped = pyqtSignal(int, object)
+
+    def __init__(self, folders, generation, parent=None):
+        super().__init__(parent)
+        self._folders = list(folders)
+        self._generation = generation
+        self._stop = False
+
+    def request_stop(self):
+        self._stop = True
+
+    def run(self):
+        folders, skipped = self._unique_folders()
+        if not folders:
+            self.folders_skipped.emit(self._generation, skipped)
+            self.scan_failed.emit(self._generation, "フォルダを開けませんでした")
+            return
+        results = queue.Queue()
+        with ThreadPoolExecutor(max_workers=min(MULTI_SCAN_WORKERS, len(folders))) as pool:
+            for folder in folders:
+                pool.submit(self._scan_folder, folder, results)
+            total = self._collect(results, len(folders), skipped)
+        if total is None:
+            return
+        if skipped:
+            self.folders_skipped.emit(self._generation, skipped)
+        self.scan_finished.emit(self._generation, total)
+
+    def _unique_folders(self):
+        """同じディレクトリを指すフォルダを 1 つにまとめる。開けないフォルダは skipped へ。"""
+        folders, skipped, seen = [], [], set()
+        for folder in self._folders:
+            try:
+                st = os.stat(folder)
+            except OSError:
+                skipped.append(folder)
+                continue
+            key = (st.st_dev, st.st_ino) if st.st_ino else os.path.normcase(os.path.realpath(folder))
+            if key not in seen:
+                seen.add(key)
+                folders.append(folder)
+        return folders, skipped
+
+    def _scan_folder(self, folder, results):
+        """（プールのスレッド）1 フォルダを列挙して [(key, path, mtime, ctime), ...] を渡す。"""
+        count = 0
+        chunk = []
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if self._stop:
+                        break
+                    if not entry.name.lower().endswith(MULTI_IMAGE_EXTENSIONS):
+                        continue
+                    try:
+                        if not entry.is_file():
+                            continue
+                        st = entry.stat()
+                        chunk.append((_file_key(entry, st), entry.path, st.st_mtime, st.st_ctime))
+                    except OSError:
+                        continue
+                    # 最初の 1 枚はすぐ渡す（どのフォルダでも最初に見つかった画像から表示を始める）
+                    if count == 0 or len(chunk) >= _FOLDER_CHUNK:
+                        count += len(chunk)
+                        results.put((folder, chunk))
+                        chunk = []
+        except OSError:
+            logger.exception("フォルダのスキャンに失敗: %s", folder)
+        count += len(chunk)
+        if chunk:
+            results.put((folder, chunk))
+        results.put((folder, count))  # 件数（int）はそのフォルダの終了の合図
+
+    def _collect(self, results, pending, skipped):
+        """各フォルダの結果から重複を除き、FolderScanWorker と同じ間隔でバッチを出す。"""
+        seen = set()
+        paths, stats = [], {}
+        total = 0
+        batch_size = FIRST_BATCH_SIZE
+        last_flush = time.monotonic()
+        while pending:
+            try:
+                folder, item = results.get(timeout=BATCH_INTERVAL)
+            except queue.Empty:
+                item = None
+            if self._stop:
+                return None
+            if isinstance(item, int):
+                pending -= 1
+                if item == 0:
+                    skipped.append(folder)
+            elif item:
+                for key, path, mtime, ctime in item:
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    paths.append(path)
+                    stats[path] = (mtime, ctime)
+            now = time.monotonic()
+            if paths and (len(paths) >= batch_size or now - last_flush >= BATCH_INTERVAL):
+                total += len(paths)
+                self.batch_found.emit(self._generation, paths, stats)
+                paths, stats = [], {}
+                last_flush = now
+                batch_size = max(MIN_BATCH_SIZE, total)
+        if paths:
+            total += len(paths)
+            self.batch_found.emit(self._generation, paths, stats)
+        return total
@@ -0,0 +1,50 @@
+"""開いているフォルダの変更監視（オプトイン）。
+
+QFileSystemWatcher はディレクトリに何か変化があったことしか教えてくれず、
+画像を書き出すツールは 1 枚ごとに一時ファイルの作成・改名を何度も行う。
+FolderWatcher は変更通知を DEBOUNCE_MS だけまとめてから folder_changed を 1 回出す。
+何が増えた・消えたかは、受け側が FolderScanWorker（フォルダインデックス付き）で
+列挙し直して今の一覧と突き合わせる。
+"""
+
+from PyQt5.QtCore import QObject, QTimer, QFileSystemWatcher, pyqtSignal
+
+
+class FolderWatcher(QObject):
+    """1 フォルダだけを監視し、変更が落ち着いたら folder_changed を出す。"""
+
+    folder_changed = pyqtSignal(str)
+
+    DEBOUNCE_MS = 500
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._emit_changed)
+        self._folder = None
+
+    def folder(self):
+        return self._folder
+
+    def watch(self, folder_path):
+        """監視対象を folder_path に切り替える。None なら監視をやめる。"""
+        if folder_path == self._folder:
+            return
+        self._timer.stop()
+        directories = self._watcher.directories()
+        if directories:
+            self._watcher.removePaths(directories)
+        self._folder = None
+        if folder_path and self._watcher.addPath(folder_path):
+            self._folder = folder_path
+
+    def _on_directory_changed(self, path):
+        if path == self._folder:
+            self._timer.start(self.DEBOUNCE_MS)
+
+    def _emit_changed(self):
+        if self._folder is not None:
+            self.folder_changed.emit(self._folder)
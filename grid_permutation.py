@@ -0,0 +1,160 @@
+"""4分割グリッドの各セルの表示順（メモリ O(1) のランダム順列）。
+
+以前は各セルごとに N 要素の index リストを random.shuffle していたため、
+100 万枚のリストでは 4 セル分で数十 MB を確保し、R（再シャッフル）や削除のたびに
+作り直していた。ここでは「位置 → 画像インデックス」を鍵付きの Feistel 暗号で
+その場で計算する。
+
+- FeistelPermutation: [0, n) 上の全単射。n 以上の 4 のべき乗の範囲で Feistel を回し、
+  範囲外に出た値はもう一度暗号化して戻ってくるまで繰り返す（cycle walking）。
+  逆変換もできるので「この画像は何番目に出てくるか」も O(1) で分かる。
+- GridOrder: 1 セル分の表示順。再シャッフルは鍵（seed）を変えるだけ。
+  削除は順列を作り直さず、削除した要素を記録しておいて位置を読み替える。
+  anchor を指定すると位置 0 にその画像を置いた順列になる（一覧の並べ替え後も
+  表示中のセルの画像を変えずに順列を作り直すため）。
+"""
+
+import random
+import bisect
+
+_ROUNDS = 4
+_MULT1 = 0x9E3779B1
+_MULT2 = 0x85EBCA6B
+
+
+class FeistelPermutation:
+    """[0, n) の鍵付き全単射。p[i] で i 番目の値、p.index(v) で v の位置を返す。"""
+
+    def __init__(self, n, seed=None):
+        self._n = max(0, int(n))
+        bits = max(2, (max(self._n, 1) - 1).bit_length())
+        bits += bits & 1  # 左右を同じビット数にするため偶数にそろえる
+        self._half = bits // 2
+        self._mask = (1 << self._half) - 1
+        rng = random.Random(seed)
+        self._keys = tuple(rng.getrandbits(32) for _ in range(_ROUNDS))
+
+    def __len__(self):
+        return self._n
+
+    def _round(self, value, key):
+        # 32bit の乗算・xorshift で混ぜる（小さい n でも先頭が偏らないように）
+        x = ((value + key) * _MULT1) & 0xFFFFFFFF
+        x ^= x >> 16
+        x = (x * _MULT2) & 0xFFFFFFFF
+        x ^= x >> 13
+        return x & self._mask
+
+    def _encrypt(self, x):
+        left, right = x >> self._half, x & self._mask
+        for key in self._keys:
+            left, right = right, left ^ self._round(right, key)
+        return (left << self._half) | right
+
+    def _decrypt(self, y):
+        left, right = y >> self._half, y & self._mask
+        for key in reversed(self._keys):
+            left, right = right ^ self._round(left, key), left
+        return (left << self._half) | right
+
+    def __getitem__(self, i):
+        if not 0 <= i < self._n:
+            raise IndexError(i)
+        x = self._encrypt(i)
+        while x >= self._n:
+            x = self._encrypt(x)
+        return x
+
+    def index(self, value):
+        if not 0 <= value < self._n:
+            raise ValueError(value)
+        y = self._decrypt(value)
+        while y >= self._n:
+            y = self._decrypt(y)
+        return y
+
+
+class GridOrder:
+    """1 セル分の表示順。位置 pos（0〜domain-1）から画像インデックスを求める。
+
+    位置は作成時の件数（domain）で数え、削除された画像の位置は飛ばして進む。
+    削除が増えすぎたら needs_rebase() が True になるので、呼び出し側で
+    anchor 付きの新しい GridOrder に作り直す。
+    """
+
+    def __init__(self, n, seed=None, anchor=None):
+        self._n = max(0, int(n))
+        if seed is None:
+            seed = random.getrandbits(64)
+        self._perm = FeistelPermutation(self._n, seed)
+        self._anchor = anchor if anchor is not None and 0 <= anchor < self._n else None
+        self._anchor_pos = self._perm.index(self._anchor) if self._anchor is not None else None
+        self._removed = []  # 削除済みの要素（作成時の番号、昇順）
+
+    def __len__(self):
+        return self._n - len(self._removed)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    @property
+    def domain(self):
+        return self._n
+
+    def _slot(self, pos):
+        """位置 → 作成時の番号（anchor があれば位置 0 は anchor、残りは順列から anchor を抜いたもの）"""
+        if self._anchor is None:
+            return self._perm[pos]
+        if pos == 0:
+            return self._anchor
+        k = pos - 1
+        return self._perm[k] if k < self._anchor_pos else self._perm[k + 1]
+
+    def index_at(self, pos):
+        """位置 pos の画像インデックス（現在の番号）。削除済みの位置なら None。"""
+        if not self._n:
+            return None
+        slot = self._slot(pos % self._n)
+        i = bisect.bisect_left(self._removed, slot)
+        if i < len(self._removed) and self._removed[i] == slot:
+            return None
+        return slot - i
+
+    def step(self, pos, delta):
+        """pos から削除済みを飛ばして delta 個進めた（負なら戻した）位置。"""
+        if not self:
+            return 0
+        direction = 1 if delta >= 0 else -1
+        pos %= self._n
+        for _ in range(abs(delta)):
+            pos = (pos + direction) % self._n
+            while self.index_at(pos) is None:
+                pos = (pos + direction) % self._n
+        return pos
+
+    def normalize(self, pos):
+        """pos が削除済みなら、その先で最初に残っている位置に寄せる。"""
+        if not self:
+            return 0
+        pos %= self._n
+        while self.index_at(pos) is None:
+            pos = (pos + 1) % self._n
+        return pos
+
+    def remove(self, index):
+        """現在の番号 index の画像が一覧から消えたことを記録する（以降の番号は 1 つ詰まる）。"""
+        removed = self._removed
+        # 作成時の番号 slot までに残っている数が index + 1 になる最小の slot（二分探索）
+        lo, hi = index, index + len(removed)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if mid + 1 - bisect.bisect_right(removed, mid) < index + 1:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._n:
+            bisect.insort(removed, lo)
+
+    def needs_rebase(self):
+        """削除が件数の 1/4 を超えたら作り直した方が速い（位置の読み飛ばしが増えるため）。"""
+        return len(self._removed) * 4 > self._n
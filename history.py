@@ -1,9 +1,9 @@
 # back
 import os
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QListWidget, QAbstractItemView, QMessageBox, QSplitter, QLabel, QPushButton, QHBoxLayout
-from PyQt5.QtGui import QPixmap, QImage
+from PyQt5.QtGui import QPixmap
 from PyQt5.QtCore import Qt
-from PIL import Image
+from thumbnail_cache import ThumbnailPreview, PREVIEW_BUCKET
 
 class CustomListWidget(QListWidget):
     """エンターキーでアイテム選択できるカスタムリストウィジェット"""
@@ -24,6 +24,10 @@ class HistoryTab(QWidget):
         super().__init__()
         self.settings = settings
         self.viewer = viewer
+        # フォルダ先頭画像のプレビュー（サムネイルキャッシュ経由。未生成なら完成通知で表示し直す）
+        self._preview = ThumbnailPreview(
+            self._show_preview_entry, self._show_preview_pending, self._show_preview_failed, parent=self
+        )
         self.init_ui()
 
     def init_ui(self):
@@ -189,6 +193,7 @@ class HistoryTab(QWidget):
     def show_preview(self, item):
         """選択されたフォルダの最初の画像をプレビュー表示"""
         folder_path = item.text()
+        self._preview.cancel()
         if not folder_path or not os.path.exists(folder_path):
             self.preview_label.setText("フォルダが存在しません")
             return
@@ -202,25 +207,22 @@ class HistoryTab(QWidget):
                 self.preview_label.setText("画像ファイルがありません")
                 return
             
-            # 最初の画像を読み込み
-            first_image = os.path.join(folder_path, image_files[0])
-            with Image.open(first_image) as img:
-                # プレビューサイズに合わせてリサイズ
-                preview_size = (280, 180)  # プレビューエリアより少し小さく
-                img.thumbnail(preview_size, Image.Resampling.LANCZOS)
-                
-                # QPixmapに変換して表示（バイト配列を変数に保持）
-                image_rgba = img.convert("RGBA")
-                w, h = image_rgba.size
-                image_bytes = image_rgba.tobytes("raw", "RGBA")
-                qimage = QImage(image_bytes, w, h, QImage.Format_RGBA8888).copy()
-                pixmap = QPixmap.fromImage(qimage)
-                
-                self.preview_label.setPixmap(pixmap)
+            # 最初の画像をサムネイルキャッシュから表示
+            self._preview.show(os.path.join(folder_path, image_files[0]), PREVIEW_BUCKET)
             
         except Exception as e:
             self.preview_label.setText(f"プレビュー読み込みエラー:\n{str(e)}")
 
+    def _show_preview_entry(self, image_path, entry):
+        preview = entry.image.scaled(280, 180, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        self.preview_label.setPixmap(QPixmap.fromImage(preview))
+
+    def _show_preview_pending(self, image_path):
+        self.preview_label.setText("プレビューを生成中…")
+
+    def _show_preview_failed(self, image_path):
+        self.preview_label.setText("プレビュー読み込みエラー")
+
     def on_selection_changed(self, current, previous):
         """選択項目変更時（キーボード操作含む）にプレビューを更新"""
         if current:
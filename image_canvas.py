@@ -0,0 +1,206 @@
+"""シングル表示・4分割セル用の画像表示ウィジェット。
+
+QLabel に毎回「表示領域サイズの透明キャンバスを作って画像とハートを描いた QPixmap」を
+渡す方式だと、1 回の送りごとに全画面サイズのバッファ確保とコピーが何度も走る。
+ImageCanvas はデコード済みの画像を 1 枚保持し、paintEvent で直接中央に描く。
+お気に入りのハートはサイズごとに 1 度だけ描いたスプライトを重ね、
+選択枠もスタイルシートではなく矩形描画で済ませる（setStyleSheet による
+スタイル再計算を避ける）。
+ウィンドウのリサイズ中は setDisplayScale で今の画像を拡大縮小して描くだけにし、
+新しいサイズでのデコードはリサイズが止まってから行う（呼び出し側）。
+"""
+
+from PyQt5.QtCore import Qt, QPointF, QRectF, pyqtSignal
+from PyQt5.QtGui import QPixmap, QPainter, QPainterPath, QColor, QPen, QBrush
+from PyQt5.QtWidgets import QWidget
+
+
+_CARD_PADDING = 8
+_CARD_RADIUS = 8
+
+_BORDER_COLOR = QColor("#3d3d44")
+_SELECTED_BORDER_COLOR = QColor("#4ea1ff")
+
+_heart_sprites = {}  # (heart_size, device_pixel_ratio) -> QPixmap
+
+
+def heart_sprite(heart_size, device_pixel_ratio=1.0):
+    """半透明の黒いカードに赤いハートを載せたスプライト（サイズごとにキャッシュ）。"""
+    key = (heart_size, device_pixel_ratio)
+    sprite = _heart_sprites.get(key)
+    if sprite is not None:
+        return sprite
+
+    card_size = heart_size + _CARD_PADDING * 2
+    sprite = QPixmap(int(card_size * device_pixel_ratio), int(card_size * device_pixel_ratio))
+    sprite.setDevicePixelRatio(device_pixel_ratio)
+    sprite.fill(Qt.transparent)
+
+    painter = QPainter(sprite)
+    painter.setRenderHint(QPainter.Antialiasing)
+
+    # 半透明の黒いカード背景
+    painter.setBrush(QBrush(QColor(0, 0, 0, 80)))
+    painter.setPen(Qt.NoPen)
+    painter.drawRoundedRect(QRectF(0, 0, card_size, card_size), _CARD_RADIUS, _CARD_RADIUS)
+
+    # ハートの中心位置（カード内の中央）
+    center_x = _CARD_PADDING + heart_size / 2
+    center_y = _CARD_PADDING + heart_size / 2
+    scale = heart_size / 40.0
+
+    heart_path = QPainterPath()
+    # 左側の半円
+    heart_path.moveTo(QPointF(center_x, center_y - 5 * scale))
+    heart_path.cubicTo(
+        QPointF(center_x, center_y - 12 * scale),
+        QPointF(center_x - 12 * scale, center_y - 12 * scale),
+        QPointF(center_x - 12 * scale, center_y - 5 * scale)
+    )
+    # 左側の半円の下部
+    heart_path.cubicTo(
+        QPointF(center_x - 12 * scale, center_y + 2 * scale),
+        QPointF(center_x, center_y + 10 * scale),
+        QPointF(center_x, center_y + 15 * scale)
+    )
+    # 右側の半円の下部
+    heart_path.cubicTo(
+        QPointF(center_x, center_y + 10 * scale),
+        QPointF(center_x + 12 * scale, center_y + 2 * scale),
+        QPointF(center_x + 12 * scale, center_y - 5 * scale)
+    )
+    # 右側の半円
+    heart_path.cubicTo(
+        QPointF(center_x + 12 * scale, center_y - 12 * scale),
+        QPointF(center_x, center_y - 12 * scale),
+        QPointF(center_x, center_y - 5 * scale)
+    )
+    heart_path.closeSubpath()
+
+    # 赤で塗りつぶし、濃い赤の縁取り
+    painter.setBrush(QBrush(QColor(255, 50, 80)))
+    painter.setPen(QPen(QColor(200, 20, 50), 2))
+    painter.drawPath(heart_path)
+    painter.end()
+
+    _heart_sprites[key] = sprite
+    return sprite
+
+
+class ImageCanvas(QWidget):
+    """画像 1 枚 + お気に入りハート + 選択枠を paintEvent で直接描くウィジェット。
+
+    QLabel と同じ感覚で使えるよう setPixmap / setText / clear / text を持つ。
+    heart_margin は画像の左下からハートのカードまでの距離 (x, y)。
+    show_border=True なら 4分割セル用の枠（選択時は太い青枠）を描く。
+    """
+
+    clicked = pyqtSignal()
+
+    def __init__(self, parent=None, heart_size=25, heart_margin=(30, 10), show_border=False):
+        super().__init__(parent)
+        self._pixmap = None
+        self._scale = 1.0  # リサイズ中の仮表示の倍率（新しい画像を受け取ったら 1.0 に戻す）
+        self._text = ""
+        self._favorite = False
+        self._selected = False
+        self._heart_size = heart_size
+        self._heart_margin = heart_margin
+        self._show_border = show_border
+        # 背景は親に任せる（透明キャンバスを重ねていた従来の見た目に合わせる）
+        self.setAttribute(Qt.WA_OpaquePaintEvent, False)
+
+    # ---------- QLabel 互換の API ----------
+
+    def setPixmap(self, pixmap):
+        self._pixmap = pixmap if pixmap is not None and not pixmap.isNull() else None
+        self._scale = 1.0
+        self._text = ""
+        self.update()
+
+    def pixmap(self):
+        return self._pixmap
+
+    def setImage(self, qimage):
+        """QImage を受け取り、表示用の QPixmap に 1 回だけ変換して保持する。"""
+        self.setPixmap(QPixmap.fromImage(qimage) if qimage is not None else None)
+
+    def hasImage(self):
+        return self._pixmap is not None
+
+    def setText(self, text):
+        self._pixmap = None
+        self._text = text
+        self.update()
+
+    def text(self):
+        return self._text
+
+    def clear(self):
+        self._pixmap = None
+        self._text = ""
+        self.update()
+
+    def setDisplayScale(self, scale):
+        """表示中の画像を scale 倍で描く（デコードし直すまでの仮表示）。"""
+        if self._pixmap is not None and scale > 0 and scale != self._scale:
+            self._scale = scale
+            self.update()
+
+    # ---------- オーバーレイ ----------
+
+    def setFavorite(self, favorite):
+        favorite = bool(favorite)
+        if favorite != self._favorite:
+            self._favorite = favorite
+            self.update()
+
+    def setSelected(self, selected):
+        selected = bool(selected)
+        if selected != self._selected:
+            self._selected = selected
+            self.update()
+
+    # ---------- 描画 ----------
+
+    def _image_rect(self):
+        """表示中の画像を描く矩形（ウィジェット中央）。"""
+        w = self._pixmap.width() / self._pixmap.devicePixelRatio() * self._scale
+        h = self._pixmap.height() / self._pixmap.devicePixelRatio() * self._scale
+        return QRectF((self.width() - w) / 2, (self.height() - h) / 2, w, h)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        if self._pixmap is not None:
+            rect = self._image_rect()
+            if self._scale == 1.0:
+                painter.drawPixmap(rect.topLeft(), self._pixmap)
+            else:
+                painter.drawPixmap(rect, self._pixmap, QRectF(self._pixmap.rect()))
+            if self._favorite:
+                sprite = heart_sprite(self._heart_size, self.devicePixelRatioF())
+                card_size = self._heart_size + _CARD_PADDING * 2
+                margin_x, margin_y = self._heart_margin
+                painter.drawPixmap(
+                    QPointF(rect.left() + margin_x, rect.bottom() - card_size - margin_y), sprite
+                )
+        elif self._text:
+            painter.setPen(self.palette().windowText().color())
+            painter.drawText(self.rect(), Qt.AlignCenter, self._text)
+
+        if self._show_border:
+            if self._selected:
+                painter.setPen(QPen(_SELECTED_BORDER_COLOR, 3))
+                painter.drawRect(QRectF(self.rect()).adjusted(1.5, 1.5, -1.5, -1.5))
+            else:
+                painter.setPen(QPen(_BORDER_COLOR, 1))
+                painter.drawRect(QRectF(self.rect()).adjusted(0.5, 0.5, -0.5, -0.5))
+        painter.end()
+
+    def mousePressEvent(self, event):
+        # clicked を誰も受けていなければ親へ流す（シングル表示のクリックでスライドショー切替）
+        if self.receivers(self.clicked) > 0:
+            self.clicked.emit()
+            event.accept()
+        else:
+            super().mousePressEvent(event)
@@ -0,0 +1,457 @@
+"""ビューアーの画像一覧（self.images）を省メモリで持つリスト。
+
+絶対パスの str を 1 枚 1 オブジェクトで並べると、パス本体（約 130 バイト）に
+リストのポインタ、日付順ソート用の {path: (mtime, ctime)} などが加わり、
+複数フォルダやタグ検索で数十万枚を開くと数百 MB になる。ImageList は
+
+- フォルダ部分（区切り文字まで）をフォルダ表に 1 回だけ持ち、各エントリは folder_id
+- ファイル名は UTF-8 で 1 本の bytearray に連結し、各エントリは終端オフセット
+- mtime / ctime は array('d') の列（不明なら NaN）
+- 画像サイズ・シード・モデル（sort_key_index が集める並べ替えキー）も列で持つ。
+  モデル名はフォルダと同じく表に 1 回だけ持つ
+- 表示順はエントリ番号の array('I')
+
+として持つ。並べ替え・シャッフル・削除は表示順の配列だけを操作し、
+パスの文字列は self.images[i] で取り出すときにその場で組み立てる。
+
+del images[i]（Delete キーでの 1 枚削除）は表示順の配列を詰めず、削除した位置を
+昇順のリストに記録するだけにする（位置の読み替えは二分探索）。記録した位置は
+並べ替え・反復などの一覧全体を触る操作の前か、一定数溜まったときにまとめて詰める。
+削除したエントリの領域は、生きているエントリより多くなったら詰め直す。
+
+インデックス・スライス・len・in・index・del・反復は list と同じように使える
+（スライスは str の list を返す）。
+"""
+
+import os
+import math
+import array
+import random
+import bisect
+import re
+import itertools
+
+# 削除済みエントリがこれ以下なら詰め直さない（小さい一覧で毎回コピーしないため）
+_COMPACT_MIN_GARBAGE = 1024
+
+# del で記録した削除位置がこの件数と一覧の 1/16 の両方を超えたら表示順の配列を詰める
+_DELETED_FLUSH_MIN = 256
+
+_NO_SEED = 2 ** 64 - 1  # seed 列の「不明」
+
+
+def _split(path):
+    """パスを（区切り文字までのフォルダ部分, ファイル名）に分ける。連結すると元に戻る。"""
+    k = path.rfind(os.sep)
+    if os.altsep:
+        k = max(k, path.rfind(os.altsep))
+    return path[:k + 1], path[k + 1:]
+
+
+_DIGITS_RE = re.compile(r"(\d+)")
+
+
+def natural_key(name):
+    """数字の部分を数として比べるキー（"img2.png" < "img10.png"）。大文字小文字は区別しない。"""
+    parts = _DIGITS_RE.split(name.lower())
+    parts[1::2] = map(int, parts[1::2])
+    return parts
+
+
+def _encode(name):
+    return name.encode("utf-8", "surrogateescape")
+
+
+def _decode(data):
+    return data.decode("utf-8", "surrogateescape")
+
+
+class ImageList:
+    """画像パスの省メモリなリスト。stats に {path: (mtime, ctime)} を渡すと日付も持つ。"""
+
+    def __init__(self, paths=(), stats=None):
+        self._folders = []            # folder_id → フォルダ部分
+        self._folder_ids = {}         # フォルダ部分 → folder_id
+        self._folder_col = array.array("I")
+        self._name_end = array.array("Q")
+        self._names = bytearray()
+        self._mtime = array.array("d")
+        self._ctime = array.array("d")
+        self._width = array.array("I")
+        self._height = array.array("I")
+        self._seed = array.array("Q")
+        self._model_col = array.array("I")
+        self._models = [""]            # model_id → モデル名（0 は不明）
+        self._model_ids = {"": 0}
+        self._keyed = bytearray()      # 並べ替えキーを読み終えたエントリは 1
+        self._order = array.array("I")  # 表示順 → エントリ番号
+        self._deleted = []              # del した _order 上の位置（昇順。まだ詰めていない）
+        self.extend(paths, stats)
+
+    # ---------- list 互換 ----------
+
+    def __len__(self):
+        return len(self._order) - len(self._deleted)
+
+    def __iter__(self):
+        self._flush_deleted()
+        path = self._path
+        for entry in self._order:
+            yield path(entry)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            self._flush_deleted()
+            return [self._path(entry) for entry in self._order[i]]
+        return self._path(self._order[self._slot(i)])
+
+    def __delitem__(self, i):
+        if isinstance(i, slice):
+            self._flush_deleted()
+            del self._order[i]
+            self._maybe_compact()
+            return
+        bisect.insort(self._deleted, self._slot(i))
+        if len(self._deleted) > max(_DELETED_FLUSH_MIN, len(self._order) // 16):
+            self._flush_deleted()
+
+    def __contains__(self, path):
+        return self._find(path) is not None
+
+    def __repr__(self):
+        return f"<ImageList {len(self)} images in {len(self._folders)} folders>"
+
+    def index(self, path):
+        position = self._find(path)
+        if position is None:
+            raise ValueError(f"{path!r} is not in list")
+        return position
+
+    def entry_ids(self, positions):
+        """表示順の位置 positions にある画像のエントリ番号。
+
+        エントリ番号は追加・並べ替えをまたいで同じ画像を指す（削除するまで有効）。
+        並べ替えたあとの位置を position_of_entry で引けば、パスで探し直さずに済む。
+        """
+        self._flush_deleted()
+        order = self._order
+        return [order[i] for i in positions]
+
+    def position_of_entry(self, entry):
+        """entry_ids で得たエントリ番号の今の表示順の位置。"""
+        self._flush_deleted()
+        return self._order.index(entry)
+
+    def extend(self, paths, stats=None):
+        """paths を末尾に足す。stats は {path: (mtime, ctime)}（無いパスの日付は不明扱い）。"""
+        paths = list(paths)
+        if not paths:
+            return
+        self._flush_deleted()
+        folder_ids = self._folder_ids
+        folder_col, names = [], []
+        for path in paths:
+            folder, name = _split(path)
+            folder_id = folder_ids.get(folder)
+            if folder_id is None:
+                folder_id = folder_ids[folder] = len(self._folders)
+                self._folders.append(folder)
+            folder_col.append(folder_id)
+            names.append(_encode(name))
+        unknown = (math.nan, math.nan)
+        stats = stats or {}
+        times = [stats.get(path, unknown) for path in paths]
+
+        first = len(self._folder_col)
+        self._order.extend(range(first, first + len(paths)))
+        self._folder_col.extend(folder_col)
+        self._name_end.extend(itertools.accumulate(map(len, names), initial=len(self._names)))
+        self._name_end.pop(first)  # accumulate の initial（前のエントリの終端）
+        self._names += b"".join(names)
+        self._mtime.extend(t[0] for t in times)
+        self._ctime.extend(t[1] for t in times)
+        count = len(paths)
+        self._width.extend(itertools.repeat(0, count))
+        self._height.extend(itertools.repeat(0, count))
+        self._seed.extend(itertools.repeat(_NO_SEED, count))
+        self._model_col.extend(itertools.repeat(0, count))
+        self._keyed.extend(bytes(count))
+
+    def append(self, path, stat=None):
+        self.extend((path,), {path: stat} if stat is not None else None)
+
+    def delete_indices(self, indices):
+        """表示順の位置 indices（昇順）をまとめて取り除く。"""
+        if not indices:
+            return
+        self._flush_deleted()
+        removed = iter(indices)
+        skip = next(removed)
+        kept = array.array("I")
+        for position, entry in enumerate(self._order):
+            if position == skip:
+                skip = next(removed, -1)
+                continue
+            kept.append(entry)
+        self._order = kept
+        self._maybe_compact()
+
+    # ---------- 並べ替え ----------
+
+    def shuffle(self, start=0):
+        """表示順の start 以降をランダムに並べ替える（start より前は動かさない）。"""
+        self._flush_deleted()
+        tail = self._order[start:]
+        random.shuffle(tail)
+        self._order[start:] = tail
+
+    def sort(self, key, reverse=False):
+        """key(path) で並べ替える（list.sort と同じく安定）。"""
+        path = self._path
+        self._sort_entries(lambda entry: key(path(entry)), reverse)
+
+    def sort_by_name(self, reverse=False):
+        """ファイル名（大文字小文字を区別しない）で並べ替える。パスは組み立てない。"""
+        name = self._name
+        self._sort_entries(lambda entry: name(entry).lower(), reverse)
+
+    def sort_by_natural_name(self, reverse=False):
+        """ファイル名を数字の大きさで並べ替える（img2.png が img10.png より前）。"""
+        name = self._name
+        self._sort_entries(lambda entry: natural_key(name(entry)), reverse)
+
+    def sort_by_stat(self, column, reverse=False):
+        """column 0: mtime / 1: ctime で並べ替える。日付不明は 0 扱い。"""
+        values = self._mtime if column == 0 else self._ctime
+        self._sort_entries(lambda entry: values[entry] if values[entry] == values[entry] else 0.0, reverse)
+
+    def sort_by_dimensions(self, reverse=False):
+        """画素数（同じなら幅）で並べ替える。サイズ不明の画像は向きによらず末尾。"""
+        width, height = self._width, self._height
+        self._sort_known_first(lambda entry: (width[entry] * height[entry], width[entry]),
+                               lambda entry: width[entry] > 0, reverse)
+
+    def sort_by_seed(self, reverse=False):
+        """生成シードで並べ替える。シードの無い画像は末尾。"""
+        seed = self._seed
+        self._sort_known_first(seed.__getitem__, lambda entry: seed[entry] != _NO_SEED, reverse)
+
+    def sort_by_model(self, reverse=False):
+        """モデル名（大文字小文字を区別しない）→ ファイル名の順。モデル不明の画像は末尾。"""
+        model_col, name = self._model_col, self._name
+        folded = [model.casefold() for model in self._models]
+        self._sort_known_first(lambda entry: (folded[model_col[entry]], natural_key(name(entry))),
+                               lambda entry: model_col[entry] != 0, reverse)
+
+    def _sort_entries(self, key, reverse):
+        self._flush_deleted()
+        self._order = array.array("I", sorted(self._order, key=key, reverse=reverse))
+
+    def _sort_known_first(self, key, known, reverse):
+        """キーのあるエントリだけを並べ替え、キーの無いエントリは今の順で後ろに置く。"""
+        self._flush_deleted()
+        with_key, without_key = [], []
+        for entry in self._order:
+            (with_key if known(entry) else without_key).append(entry)
+        with_key.sort(key=key, reverse=reverse)
+        self._order = array.array("I", with_key + without_key)
+
+    # ---------- 日付 ----------
+
+    def paths_without_stats(self):
+        """mtime / ctime を持っていないパス（日付順ソートの前に stat する分）。"""
+        self._flush_deleted()
+        path, mtime = self._path, self._mtime
+        return [path(entry) for entry in self._order if mtime[entry] != mtime[entry]]
+
+    def set_stats(self, stats):
+        """{path: (mtime, ctime)} を日付の列に書き込む。"""
+        if not stats:
+            return
+        path, mtime = self._path, self._mtime
+        for entry in self._order:
+            if mtime[entry] == mtime[entry]:
+                continue
+            values = stats.get(path(entry))
+            if values is not None:
+                self._mtime[entry], self._ctime[entry] = values
+
+    def update_stats(self, stats):
+        """{path: (mtime, ctime)} で日付の列を上書きし、値が変わった画像の数を返す。
+
+        mtime が変わった画像（中身が書き換わった）は並べ替えキーも読み直す対象に戻す。
+        """
+        if not stats:
+            return 0
+        self._flush_deleted()
+        path, mtime_col, ctime_col, keyed = self._path, self._mtime, self._ctime, self._keyed
+        changed = 0
+        for entry in self._order:
+            values = stats.get(path(entry))
+            if values is None:
+                continue
+            mtime, ctime = values
+            if mtime_col[entry] == mtime and ctime_col[entry] == ctime:
+                continue
+            if mtime_col[entry] != mtime:
+                keyed[entry] = 0
+            mtime_col[entry], ctime_col[entry] = mtime, ctime
+            changed += 1
+        return changed
+
+    def stat_at(self, i):
+        """表示順の位置 i の (mtime, ctime)。不明なら NaN。"""
+        entry = self._order[self._slot(i)]
+        return self._mtime[entry], self._ctime[entry]
+
+    def set_stat_at(self, i, mtime, ctime):
+        """位置 i の日付を書き換える（update_stats の 1 枚版。パスで探さない）。
+
+        mtime が変わった画像は並べ替えキーも読み直す対象に戻す。
+        """
+        entry = self._order[self._slot(i)]
+        if self._mtime[entry] != mtime:
+            self._keyed[entry] = 0
+        self._mtime[entry], self._ctime[entry] = mtime, ctime
+
+    # ---------- 並べ替えキー ----------
+
+    def items_without_sort_keys(self):
+        """並べ替えキーをまだ読んでいない [(path, mtime), ...]（SortKeyWorker に渡す）。"""
+        self._flush_deleted()
+        path, keyed, mtime = self._path, self._keyed, self._mtime
+        return [(path(entry), mtime[entry]) for entry in self._order if not keyed[entry]]
+
+    def has_all_sort_keys(self):
+        self._flush_deleted()
+        keyed = self._keyed
+        return all(keyed[entry] for entry in self._order)
+
+    def set_sort_keys(self, keys_by_path):
+        """{path: SortKeys} を列に書き込む。"""
+        if not keys_by_path:
+            return
+        path, keyed = self._path, self._keyed
+        for entry in self._order:
+            if keyed[entry]:
+                continue
+            keys = keys_by_path.get(path(entry))
+            if keys is None:
+                continue
+            self._width[entry] = keys.width
+            self._height[entry] = keys.height
+            seed = keys.seed
+            self._seed[entry] = seed if seed is not None and 0 <= seed < _NO_SEED else _NO_SEED
+            model_id = self._model_ids.get(keys.model)
+            if model_id is None:
+                model_id = self._model_ids[keys.model] = len(self._models)
+                self._models.append(keys.model)
+            self._model_col[entry] = model_id
+            keyed[entry] = 1
+
+    # ---------- 計測 ----------
+
+    def nbytes(self):
+        """列が確保しているおおよそのバイト数（フォルダ表を含む）。"""
+        columns = self._entry_columns() + (self._name_end, self._order)
+        total = sum(col.buffer_info()[1] * col.itemsize for col in columns)
+        total += len(self._names) + len(self._keyed)
+        total += sum(len(folder) for folder in self._folders)
+        total += sum(len(model) for model in self._models)
+        return total
+
+    # ---------- 内部 ----------
+
+    def _name(self, entry):
+        start = self._name_end[entry - 1] if entry else 0
+        return _decode(self._names[start:self._name_end[entry]])
+
+    def _path(self, entry):
+        return self._folders[self._folder_col[entry]] + self._name(entry)
+
+    def _find(self, path):
+        """path の表示順の位置。ファイル名の連結から候補を探し、表示順の配列を引く。
+
+        一覧の長さに比例する手間がかかる。並べ替えの前後で同じ画像を追うなら entry_ids を使う。
+        """
+        folder, name = _split(path)
+        folder_id = self._folder_ids.get(folder)
+        if folder_id is None:
+            return None
+        needle = _encode(name)
+        ends = self._name_end
+        start = self._names.find(needle)
+        while start >= 0:
+            entry = bisect.bisect_right(ends, start)
+            entry_start = ends[entry - 1] if entry else 0
+            if (entry_start == start and ends[entry] - start == len(needle)
+                    and self._folder_col[entry] == folder_id):
+                try:
+                    slot = self._order.index(entry)
+                except ValueError:
+                    slot = None  # 削除済みのエントリ（同じパスが後ろに足されていることがある）
+                if slot is not None:
+                    skipped = bisect.bisect_left(self._deleted, slot)
+                    if skipped == len(self._deleted) or self._deleted[skipped] != slot:
+                        return slot - skipped
+            start = self._names.find(needle, start + 1)
+        return None
+
+    def _slot(self, i):
+        """表示順の位置 i（削除済みを除いて数えた位置）→ _order 上の位置。"""
+        count = len(self)
+        if i < 0:
+            i += count
+        if not 0 <= i < count:
+            raise IndexError("ImageList index out of range")
+        deleted = self._deleted
+        if not deleted:
+            return i
+        # _order の先頭から p までに生きている数が i + 1 になる最小の p
+        lo, hi = i, i + len(deleted)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if mid + 1 - bisect.bisect_right(deleted, mid) < i + 1:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _flush_deleted(self):
+        """del で記録した位置を表示順の配列から取り除く。"""
+        if not self._deleted:
+            return
+        order = self._order
+        kept = array.array("I")
+        start = 0
+        for slot in self._deleted:
+            kept += order[start:slot]
+            start = slot + 1
+        kept += order[start:]
+        self._order = kept
+        self._deleted = []
+        self._maybe_compact()
+
+    def _entry_columns(self):
+        return (self._folder_col, self._mtime, self._ctime,
+                self._width, self._height, self._seed, self._model_col)
+
+    def _maybe_compact(self):
+        garbage = len(self._folder_col) - len(self._order)
+        if garbage <= _COMPACT_MIN_GARBAGE or garbage <= len(self._order):
+            return
+        order = self._order
+        (self._folder_col, self._mtime, self._ctime,
+         self._width, self._height, self._seed, self._model_col) = (
+            array.array(col.typecode, map(col.__getitem__, order)) for col in self._entry_columns()
+        )
+        self._keyed = bytearray(map(self._keyed.__getitem__, order))
+        name_end = array.array("Q")
+        names = bytearray()
+        ends = self._name_end
+        for entry in order:
+            start = ends[entry - 1] if entry else 0
+            names += self._names[start:ends[entry]]
+            name_end.append(len(names))
+        self._name_end, self._names = name_end, names
+        self._order = array.array("I", range(len(order)))
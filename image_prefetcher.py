@@ -0,0 +1,688 @@
+"""表示用画像のバックグラウンドデコードとバイト数上限付き LRU キャッシュ。
+
+ImagePrefetcher は N 本のデコードワーカー（QThread）を束ねるプールで、
+優先度付きキューから (image_path, target_w, target_h) を取り出してデコードする。
+同じキーが既にキュー内・デコード中であれば要求は重複排除される。
+
+優先度は「表示中」 > 「次」 > 「前 / 2 つ先」の 3 段階。グリッド表示では
+4 セル × 3 オフセット = 12 件が一度に積まれるため、FIFO 1 本だと
+表示中セルのデコードが後回しになる。
+
+各要求には世代番号が付く。ビューアーは表示を切り替えるたびに
+bump_generation() で世代を進め、ワーカーはデコード前に古い世代の要求を
+読み捨てる（矢印キー長押しで通り過ぎた画像をデコードし続けないため）。
+
+use_thumbnail=True の要求（4分割のセル等）は、元画像より先に
+thumbnail_cache のディスクキャッシュを参照する。ミス時は bucket サイズで
+元画像をデコードしてディスクにも保存し、そこからセルサイズへ縮小する。
+
+get_cached(allow_nearest=True) は、キーが完全一致しなくても同じ画像の
+より大きい（または許容範囲内で小さい）エントリを縮小して返す。
+正確なサイズのデコードは裏で要求しておき、次回以降はそちらがヒットする。
+
+デコードが終わるたびに image_ready を発行する。ビューアーはキャッシュミス時に
+プレースホルダーを出して request() し、待っているキーと一致したら差し替える
+（GUI スレッドでは画像をデコードしない）。
+
+with_preview=True の要求は、JPEG なら本デコードの前に低解像度のプレビュー
+（埋め込みの EXIF サムネイル、無ければ 1/8 の DCT スケーリングデコード）を
+作って preview_ready で先に渡す。ランダムジャンプやフォルダを開いた直後でも
+数 ms で何かが表示され、本デコード完了時に image_ready で置き換わる。
+
+with_metadata=True の要求は、デコードのあとに同じワーカーで画像のメタデータも
+読んで metadata_cache に入れておく（サイドバーを開いたまま次へ進んだとき、
+プロンプト欄も GUI スレッドでファイルを開かずに済む）。画素がキャッシュ済みでも
+メタデータのためだけに積まれる。デコード中・キュー済みのキーに重ねて
+with_metadata で要求された場合は、パスを覚えておいてそのデコードの後に読む。
+"""
+
+import os
+import time
+import queue
+import logging
+import itertools
+import collections
+
+from PyQt5.QtCore import QObject, QThread, QMutex, QSize, Qt, pyqtSignal
+from PyQt5.QtGui import QImage, QImageReader, QTransform
+from PIL import Image, ImageOps
+import piexif
+
+from thumbnail_cache import bucket_for, decode_bucket
+
+logger = logging.getLogger(__name__)
+
+
+# 優先度（小さいほど先に処理される）
+PRIORITY_VISIBLE = 0   # 現在表示中（グリッドの他セル等）
+PRIORITY_NEXT = 1      # 次に表示される画像
+PRIORITY_NEIGHBOR = 2  # 前 / 2 つ先
+
+
+# 1/8 縮小なら libjpeg が DCT 段階で間引くので、フルデコードよりずっと軽い
+_PREVIEW_SCALE_DENOM = 8
+
+# EXIF サムネイルと元画像の縦横比がこれ以上ずれていたら（黒帯入り等）使わない
+_PREVIEW_ASPECT_TOLERANCE = 0.05
+
+
+def default_worker_count():
+    """デコードワーカー数をコア数から決める（GUI スレッド用に 1 コア残す）。
+
+    最低 4 本は確保し、4分割表示の 4 セルが同時にデコードされるようにする
+    （NAS 等では待ち時間の大半が I/O なので、コア数より多くても効く）。
+    """
+    return min(8, max(4, (os.cpu_count() or 4) - 1))
+
+
+def read_exif_thumbnail(image_path):
+    """JPEG の APP1 (EXIF) に埋め込まれたサムネイルを QImage で返す。無ければ None。
+
+    ファイル全体は読まず、SOS（画像データ本体）の手前までのマーカーだけを辿る。
+    EXIF の Orientation はサムネイルにも反映して返す。
+    """
+    try:
+        with open(image_path, 'rb') as f:
+            if f.read(2) != b'\xff\xd8':
+                return None
+            segment = None
+            while segment is None:
+                marker = f.read(2)
+                if len(marker) < 2 or marker[0] != 0xFF or marker[1] in (0xDA, 0xD9):
+                    return None
+                length = int.from_bytes(f.read(2), 'big')
+                if length < 2:
+                    return None
+                if marker[1] == 0xE1:
+                    data = f.read(length - 2)
+                    if data.startswith(b'Exif\x00\x00'):
+                        segment = data
+                else:
+                    f.seek(length - 2, os.SEEK_CUR)
+        exif = piexif.load(segment)
+    except Exception:
+        logger.debug("EXIF サムネイルの読み取りに失敗: %s", image_path, exc_info=True)
+        return None
+
+    thumb_data = exif.get('thumbnail')
+    if not thumb_data:
+        return None
+    qimage = QImage.fromData(thumb_data)
+    if qimage.isNull():
+        return None
+
+    orientation = exif.get('0th', {}).get(piexif.ImageIFD.Orientation, 1)
+    if orientation in (3, 4):
+        qimage = qimage.transformed(QTransform().rotate(180))
+    elif orientation in (5, 6):
+        qimage = qimage.transformed(QTransform().rotate(90))
+    elif orientation in (7, 8):
+        qimage = qimage.transformed(QTransform().rotate(270))
+    if orientation in (2, 4, 5, 7):
+        qimage = qimage.mirrored(True, False)
+    return qimage
+
+
+_COPY_BAND_ROWS = 64  # Pillow → QImage の書き込みを区切る行数
+
+
+def _copy_into_qimage(frame, has_alpha):
+    """Pillow の画像を RGBA8888 の QImage（自前のバッファを持つ）に写す。失敗時は None。
+
+    RGBA8888 の 1 行は常に width * 4 バイト（4 バイト境界に揃う）なので、
+    バンドごとの bytes をそのまま連続して書き込める。
+    """
+    width, height = frame.size
+    qimage = QImage(width, height, QImage.Format_RGBA8888)
+    if qimage.isNull():
+        return None
+    bits = qimage.bits()
+    bits.setsize(qimage.sizeInBytes())
+    stride = width * 4
+    for top in range(0, height, _COPY_BAND_ROWS):
+        bottom = min(height, top + _COPY_BAND_ROWS)
+        band = frame.crop((0, top, width, bottom))
+        if not has_alpha and band.mode != "RGB":
+            band = band.convert("RGB")  # CMYK・16bit 等も RGB を経由して従来と同じ色にする
+        if band.mode != "RGBA":
+            band = band.convert("RGBA")
+        bits[top * stride:bottom * stride] = band.tobytes("raw", "RGBA")
+    return qimage
+
+
+class _DecodeWorker(QThread):
+    """ImagePrefetcher の共有キューを消化するワーカー。状態は全てプール側が持つ。"""
+
+    def __init__(self, pool, parent=None):
+        super().__init__(parent)
+        self._pool = pool
+
+    def run(self):
+        self._pool._worker_loop()
+
+
+class ImagePrefetcher(QObject):
+    """表示用の画像をバックグラウンドでデコード＋リサイズして LRU キャッシュに格納する。
+
+    キーは (image_path, target_w, target_h)、値は QImage（KeepAspectRatio で縮小済み）。
+    Qt の QImageReader は libjpeg/libpng を直接叩くため、Pillow → bytes → QImage の
+    余計なコピーが省ける。失敗時は Pillow にフォールバックする。
+
+    キャッシュ上限は件数ではなくバイト数（QImage.sizeInBytes() の合計）で管理する。
+    フルスクリーン 5K の 1 枚とグリッドセルの 1 枚では 10 倍以上サイズが違うため、
+    件数上限だとウィンドウサイズ次第でメモリ使用量が読めなくなる。
+    """
+
+    # ワーカーがデコードを終えるたびに発行（キャッシュに入らない巨大画像も QImage ごと渡す）
+    image_ready = pyqtSignal(str, int, int, QImage)   # image_path, target_w, target_h, qimage
+    image_failed = pyqtSignal(str, int, int)          # image_path, target_w, target_h
+    # with_preview 要求の低解像度版（キャッシュには入れない）
+    preview_ready = pyqtSignal(str, int, int, QImage)  # image_path, target_w, target_h, qimage
+
+    _SENTINEL = None
+    _SENTINEL_PRIORITY = -1  # 停止要求は未処理の要求より先に取り出させる
+
+    DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+    # 別サイズのキャッシュを流用するときに許す拡大率（数 % なら見た目はほぼ変わらない）
+    NEAREST_UPSCALE_TOLERANCE = 1.05
+
+    # デコード時間の移動平均の重み（大きいほど直近の計測を重視）
+    LATENCY_EMA_ALPHA = 0.2
+
+    def __init__(self, parent=None, max_bytes=DEFAULT_MAX_BYTES, workers=None, thumbnail_cache=None,
+                 metadata_cache=None, metadata_reader=None):
+        super().__init__(parent)
+        self._thumbnail_cache = thumbnail_cache
+        # with_metadata 要求では metadata_cache.load(image_path, metadata_reader) を呼ぶ
+        self._metadata_cache = metadata_cache
+        self._metadata_reader = metadata_reader
+        # 要素は (priority, seq, key, generation, use_thumbnail, with_preview, with_metadata)。
+        # seq で同一優先度内は FIFO になり key 比較も起きない
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._cache = collections.OrderedDict()  # key -> (qimage, nbytes)
+        self._cache_lock = QMutex()
+        self._cache_max_bytes = max(1, int(max_bytes))
+        self._cache_bytes = 0
+        # 統計カウンタ（_cache_lock で保護）
+        self._hits = 0
+        self._misses = 0
+        self._near_hits = 0  # 別サイズのエントリを縮小して返した回数
+        self._evictions = 0
+
+        # 重複排除・世代管理用の状態（_sched_lock で保護）
+        #   _queued:   key -> キュー内の有効な要求の (priority, generation)
+        #   _inflight: ワーカーがデコード中のキー
+        self._sched_lock = QMutex()
+        self._queued = {}
+        self._inflight = set()
+        self._want_metadata = set()  # 重複で捨てた要求のうちメタデータも欲しかったパス
+        self._deduped = 0
+        self._generation = 0
+        self._cancelled = 0  # 世代切れで読み捨てた（デコードせずに済んだ）件数
+        self._latency = {}   # フォルダ -> デコード所要時間（秒）の指数移動平均
+
+        count = workers if workers is not None else default_worker_count()
+        self._workers = [_DecodeWorker(self, parent=self) for _ in range(max(1, count))]
+
+    # ---------- ライフサイクル ----------
+
+    def start(self):
+        for w in self._workers:
+            w.start()
+
+    def stop(self):
+        """全ワーカーに停止要求を送る（未処理のプリフェッチ要求は捨てる）。"""
+        for _ in self._workers:
+            self._queue.put((self._SENTINEL_PRIORITY, next(self._seq), self._SENTINEL, 0, False, False, False))
+
+    def wait(self):
+        for w in self._workers:
+            w.wait()
+
+    def isRunning(self):
+        return any(w.isRunning() for w in self._workers)
+
+    def worker_count(self):
+        return len(self._workers)
+
+    # ---------- cache API（メインスレッドから呼ばれる）----------
+
+    def get_cached(self, image_path, target_w, target_h, allow_nearest=False, use_thumbnail=False):
+        """キャッシュヒット時は QImage を返す。ミスは None。
+
+        allow_nearest=True なら、同じ画像を別サイズでデコードした中で流用できる最小の
+        エントリを縮小して返し、正確なサイズのデコードをワーカーに依頼しておく。
+        ウィンドウのリサイズやサイドバー開閉でキーが 1px ずれただけで
+        全部デコードし直しになるのを避けるため。
+        """
+        key = (image_path, target_w, target_h)
+        self._cache_lock.lock()
+        try:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+                self._hits += 1
+                return entry[0]
+            nearest = self._find_nearest_locked(image_path, target_w, target_h) if allow_nearest else None
+            if nearest is None:
+                self._misses += 1
+                return None
+            self._near_hits += 1
+        finally:
+            self._cache_lock.unlock()
+        # 縮小はロック外で（他スレッドの put_cache を待たせない）
+        qimage = nearest.scaled(target_w, target_h, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        self.request(image_path, target_w, target_h, PRIORITY_VISIBLE, use_thumbnail=use_thumbnail)
+        return qimage
+
+    def _find_nearest_locked(self, image_path, target_w, target_h):
+        """target に収めたとき拡大率が許容範囲内になる、最小のキャッシュ済み画像（_cache_lock 保持前提）。"""
+        best = None
+        best_area = None
+        for (path, _, _), (qimage, _) in self._cache.items():
+            if path != image_path:
+                continue
+            w, h = qimage.width(), qimage.height()
+            if w <= 0 or h <= 0:
+                continue
+            fitted = QSize(w, h).scaled(target_w, target_h, Qt.KeepAspectRatio)
+            if fitted.width() > w * self.NEAREST_UPSCALE_TOLERANCE:
+                continue
+            area = w * h
+            if best_area is None or area < best_area:
+                best, best_area = qimage, area
+        return best
+
+    def contains(self, image_path, target_w, target_h):
+        """完全一致のエントリがあるか（統計・LRU 順序は変えない）。"""
+        return self._peek((image_path, target_w, target_h)) is not None
+
+    def _peek(self, key):
+        """統計を汚さずにキャッシュを参照する（重複デコード回避用）。"""
+        self._cache_lock.lock()
+        try:
+            entry = self._cache.get(key)
+            return entry[0] if entry is not None else None
+        finally:
+            self._cache_lock.unlock()
+
+    def put_cache(self, image_path, target_w, target_h, qimage):
+        key = (image_path, target_w, target_h)
+        nbytes = int(qimage.sizeInBytes())
+        self._cache_lock.lock()
+        try:
+            old = self._cache.pop(key, None)
+            if old is not None:
+                self._cache_bytes -= old[1]
+            # 予算を 1 枚で食い潰す巨大画像はキャッシュしない（他を全部追い出すだけになる）
+            if nbytes > self._cache_max_bytes:
+                return
+            self._cache[key] = (qimage, nbytes)
+            self._cache_bytes += nbytes
+            self._evict_locked()
+        finally:
+            self._cache_lock.unlock()
+
+    def _evict_locked(self):
+        """予算を超えている間、最も古いエントリから追い出す（_cache_lock 保持前提）。"""
+        while self._cache_bytes > self._cache_max_bytes and self._cache:
+            _, (_, nbytes) = self._cache.popitem(last=False)
+            self._cache_bytes -= nbytes
+            self._evictions += 1
+
+    def max_bytes(self):
+        return self._cache_max_bytes
+
+    def set_max_bytes(self, max_bytes):
+        """キャッシュ予算を変更する。縮小時は即座に LRU で追い出す。"""
+        self._cache_lock.lock()
+        try:
+            self._cache_max_bytes = max(1, int(max_bytes))
+            self._evict_locked()
+        finally:
+            self._cache_lock.unlock()
+
+    def clear_cache(self):
+        self._cache_lock.lock()
+        try:
+            self._cache.clear()
+            self._cache_bytes = 0
+        finally:
+            self._cache_lock.unlock()
+
+    def cache_stats(self) -> dict:
+        """キャッシュの現在値と累積カウンタを返す。"""
+        self._cache_lock.lock()
+        try:
+            stats = {
+                'entries': len(self._cache),
+                'bytes': self._cache_bytes,
+                'max_bytes': self._cache_max_bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+                'near_hits': self._near_hits,
+                'evictions': self._evictions,
+            }
+        finally:
+            self._cache_lock.unlock()
+        self._sched_lock.lock()
+        try:
+            stats['workers'] = len(self._workers)
+            stats['queued'] = len(self._queued)
+            stats['inflight'] = len(self._inflight)
+            stats['deduped'] = self._deduped
+            stats['generation'] = self._generation
+            stats['cancelled'] = self._cancelled
+        finally:
+            self._sched_lock.unlock()
+        return stats
+
+    def _record_latency(self, image_path, seconds):
+        folder = os.path.dirname(image_path)
+        self._sched_lock.lock()
+        try:
+            previous = self._latency.get(folder)
+            if previous is None:
+                self._latency[folder] = seconds
+            else:
+                self._latency[folder] = previous + self.LATENCY_EMA_ALPHA * (seconds - previous)
+        finally:
+            self._sched_lock.unlock()
+
+    def decode_latency(self, folder):
+        """フォルダ内の画像 1 枚のデコードにかかる時間（秒、移動平均）。未計測なら None。"""
+        self._sched_lock.lock()
+        try:
+            return self._latency.get(folder)
+        finally:
+            self._sched_lock.unlock()
+
+    # ---------- 要求 API ----------
+
+    def bump_generation(self):
+        """世代を 1 つ進める。これ以前に積まれた未着手の要求は読み捨て対象になる。
+
+        同じキーを新しい世代で request し直せば、その要求は生き残る。
+        """
+        self._sched_lock.lock()
+        try:
+            self._generation += 1
+            self._want_metadata.clear()  # 新しい世代で必要なら積み直される
+            return self._generation
+        finally:
+            self._sched_lock.unlock()
+
+    def request(self, image_path, target_w, target_h, priority=PRIORITY_NEIGHBOR, use_thumbnail=False,
+                with_preview=False, with_metadata=False):
+        """非同期にプリフェッチを要求する（現在の世代として積む）。
+
+        with_preview=True なら本デコードの前に preview_ready で低解像度版を渡す。
+        with_metadata=True ならメタデータも読んで metadata_cache に入れる。
+
+        キャッシュ済み・デコード中・同じ世代で同等以上の優先度でキュー済みのキーは捨てる。
+        より高い優先度や新しい世代で再要求された場合はキューに積み直し、
+        古い方はワーカーが取り出した時点で読み捨てる。
+        """
+        if not image_path or target_w <= 0 or target_h <= 0:
+            return
+        key = (image_path, target_w, target_h)
+        with_metadata = with_metadata and self._metadata_cache is not None
+        if self._peek(key) is not None and not with_metadata:
+            return
+        self._sched_lock.lock()
+        try:
+            if key in self._inflight:
+                self._deduped += 1
+                if with_metadata:
+                    self._want_metadata.add(image_path)
+                return
+            generation = self._generation
+            queued = self._queued.get(key)
+            if queued is not None and queued[1] == generation and queued[0] <= priority:
+                self._deduped += 1
+                if with_metadata:
+                    self._want_metadata.add(image_path)
+                return
+            self._queued[key] = (priority, generation)
+        finally:
+            self._sched_lock.unlock()
+        self._queue.put((priority, next(self._seq), key, generation, use_thumbnail, with_preview, with_metadata))
+
+    def _finish_inflight(self, key):
+        self._sched_lock.lock()
+        try:
+            self._inflight.discard(key)
+        finally:
+            self._sched_lock.unlock()
+
+    # ---------- decode 本体（メイン・ワーカー共通で使えるよう staticmethod）----------
+
+    @staticmethod
+    def decode_scaled(image_path, target_w, target_h):
+        """QImageReader でアスペクト比保持の縮小 QImage を返す。失敗時は None。
+
+        QImageReader は内部で libjpeg/libpng の DCT スケーリング等を利用する
+        ため、Pillow よりも一般的に高速。
+        """
+        try:
+            reader = QImageReader(image_path)
+            reader.setAutoTransform(True)  # EXIF orientation 反映
+            src_size = reader.size()
+            if not src_size.isValid() or src_size.width() <= 0 or src_size.height() <= 0:
+                return None
+            iw, ih = src_size.width(), src_size.height()
+            image_ratio = iw / ih
+            window_ratio = target_w / target_h
+            if window_ratio > image_ratio:
+                new_h = target_h
+                new_w = max(1, int(target_h * image_ratio))
+            else:
+                new_w = target_w
+                new_h = max(1, int(target_w / image_ratio))
+            reader.setScaledSize(QSize(new_w, new_h))
+            qimage = reader.read()
+            if qimage.isNull():
+                return None
+            # 統一フォーマット（描画時の暗黙変換コストを避ける）
+            if qimage.format() != QImage.Format_RGBA8888:
+                qimage = qimage.convertToFormat(QImage.Format_RGBA8888)
+            return qimage
+        except Exception:
+            logger.exception("QImageReader デコード失敗: %s", image_path)
+            return None
+
+    @staticmethod
+    def decode_scaled_with_pillow(image_path, target_w, target_h):
+        """QImageReader が失敗した場合の Pillow フォールバック。
+
+        フル解像度でデコードして LANCZOS をかけると巨大なバッファが何枚もできるため、
+        JPEG は draft() で DCT 段階から縮小し、残りは reduce() で整数倍に間引いてから
+        最後の 1 回だけ LANCZOS をかける。画素は tobytes() で丸ごと bytes にせず、
+        先に確保した QImage のバッファへ数十行ずつ RGBA に変換して書き込む
+        （縮小後の画像と QImage の 2 枚だけで済み、中間の全体バッファを作らない）。
+        """
+        try:
+            with Image.open(image_path) as img:
+                orientation = img.getexif().get(0x0112, 1)  # EXIF Orientation
+                src_w, src_h = img.size
+                if orientation in (5, 6, 7, 8):
+                    src_w, src_h = src_h, src_w
+                image_ratio = src_w / src_h
+                window_ratio = target_w / target_h
+                if window_ratio > image_ratio:
+                    new_h = target_h
+                    new_w = max(1, int(target_h * image_ratio))
+                else:
+                    new_w = target_w
+                    new_h = max(1, int(target_w / image_ratio))
+
+                if img.format == "JPEG":
+                    # draft は要求サイズ以上を保つ最大の 1/2^n で読む（向きは保存時のまま指定）
+                    draft_size = (new_h, new_w) if orientation in (5, 6, 7, 8) else (new_w, new_h)
+                    img.draft("RGB", draft_size)
+                # exif_transpose は回転不要でも全画素コピーを返すので、必要な時だけ呼ぶ
+                frame = ImageOps.exif_transpose(img) if orientation != 1 else img
+
+                factor = min(frame.width // new_w, frame.height // new_h)
+                if factor >= 2:
+                    frame = frame.reduce(factor)
+                if frame.size != (new_w, new_h):
+                    frame = frame.resize((new_w, new_h), Image.LANCZOS)
+
+                has_alpha = frame.mode in ("RGBA", "LA", "PA") or (
+                    frame.mode == "P" and "transparency" in frame.info
+                )
+                return _copy_into_qimage(frame, has_alpha)
+        except Exception:
+            logger.exception("Pillow デコード失敗: %s", image_path)
+            return None
+
+    @classmethod
+    def decode_any(cls, image_path, target_w, target_h):
+        """QImageReader → Pillow の順に試す。両方失敗なら None。"""
+        qimage = cls.decode_scaled(image_path, target_w, target_h)
+        if qimage is None:
+            qimage = cls.decode_scaled_with_pillow(image_path, target_w, target_h)
+        return qimage
+
+    @classmethod
+    def decode_preview(cls, image_path, target_w, target_h):
+        """低解像度のプレビューを target に収まるサイズで返す。失敗時は None。
+
+        EXIF サムネイルがあればそれを、無ければ 1/8 スケールでデコードしたものを引き伸ばす。
+        どちらも JPEG だけ。PNG 等は縮小デコードでも全画素を展開するので本デコードと
+        ほとんど変わらず、先に作ると高画質版が遅れるだけなのでプレビューは出さない。
+        """
+        if QImageReader(image_path).format() != b"jpeg":
+            return None
+        qimage = read_exif_thumbnail(image_path)
+        if qimage is not None:
+            # 回転の有無に左右されないよう「長辺 / 短辺」で比べる
+            src_size = QImageReader(image_path).size()
+            src_sides = sorted((src_size.width(), src_size.height()))
+            thumb_sides = sorted((qimage.width(), qimage.height()))
+            if src_sides[0] <= 0 or thumb_sides[0] <= 0:
+                qimage = None
+            else:
+                src_ratio = src_sides[1] / src_sides[0]
+                thumb_ratio = thumb_sides[1] / thumb_sides[0]
+                if abs(thumb_ratio - src_ratio) / src_ratio > _PREVIEW_ASPECT_TOLERANCE:
+                    qimage = None
+        if qimage is None:
+            qimage = cls.decode_scaled(
+                image_path,
+                max(1, target_w // _PREVIEW_SCALE_DENOM),
+                max(1, target_h // _PREVIEW_SCALE_DENOM),
+            )
+        if qimage is None:
+            return None
+        qimage = qimage.scaled(target_w, target_h, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        if qimage.format() != QImage.Format_RGBA8888:
+            qimage = qimage.convertToFormat(QImage.Format_RGBA8888)
+        return qimage
+
+    def _emit_preview(self, key):
+        image_path, target_w, target_h = key
+        preview = self.decode_preview(image_path, target_w, target_h)
+        if preview is not None:
+            self.preview_ready.emit(image_path, target_w, target_h, preview)
+
+    def _decode(self, key, use_thumbnail, with_preview=False):
+        """キーに対応する QImage を作る。use_thumbnail ならディスクキャッシュを経由する。
+
+        with_preview なら、元画像のデコードが必要になった時点でまず preview_ready を発行する
+        （ディスクキャッシュにヒットした場合は十分速いので発行しない）。
+        """
+        image_path, target_w, target_h = key
+        bucket = bucket_for(target_w, target_h) if use_thumbnail else None
+        if bucket is not None and self._thumbnail_cache is not None:
+            thumb = self._thumbnail_cache.get_image(image_path, bucket)
+            if thumb is None:
+                if with_preview:
+                    self._emit_preview(key)
+                    with_preview = False
+                # 元画像より大きくはしない縮小デコード（Pillow フォールバックは無し）
+                thumb = decode_bucket(image_path, bucket)
+                if thumb is not None:
+                    self._thumbnail_cache.put_async(image_path, bucket, thumb)
+            if thumb is not None:
+                qimage = thumb.scaled(target_w, target_h, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                if qimage.format() != QImage.Format_RGBA8888:
+                    qimage = qimage.convertToFormat(QImage.Format_RGBA8888)
+                return qimage
+        if with_preview:
+            self._emit_preview(key)
+        return self.decode_any(image_path, target_w, target_h)
+
+    def _take_metadata_wish(self, image_path):
+        """重複で捨てた with_metadata 要求があったか（あれば取り消して True）。"""
+        self._sched_lock.lock()
+        try:
+            if image_path not in self._want_metadata:
+                return False
+            self._want_metadata.discard(image_path)
+            return True
+        finally:
+            self._sched_lock.unlock()
+
+    def _prefetch_metadata(self, image_path):
+        """メタデータを読んで metadata_cache に入れる（キャッシュ済みなら stat だけ）。"""
+        try:
+            self._metadata_cache.load(image_path, self._metadata_reader)
+        except Exception:
+            logger.exception("[ImagePrefetcher] メタデータの先読みに失敗: %s", os.path.basename(image_path))
+
+    # ---------- worker loop ----------
+
+    def _claim(self, priority, key, generation):
+        """キューから取り出した要求を処理すべきか判定し、処理するなら inflight に登録して True を返す。"""
+        self._sched_lock.lock()
+        try:
+            # 積み直された古い要素は読み捨て
+            if self._queued.get(key) != (priority, generation):
+                return False
+            del self._queued[key]
+            # 表示が先に進んでしまった要求はデコードせずに捨てる
+            if generation < self._generation:
+                self._cancelled += 1
+                return False
+            self._inflight.add(key)
+            return True
+        finally:
+            self._sched_lock.unlock()
+
+    def _worker_loop(self):
+        try:
+            while True:
+                priority, _, key, generation, use_thumbnail, with_preview, with_metadata = self._queue.get()
+                if key is self._SENTINEL:
+                    break
+                if not self._claim(priority, key, generation):
+                    continue
+                try:
+                    if self._peek(key) is None:
+                        self._decode_and_publish(key, use_thumbnail, with_preview)
+                finally:
+                    self._finish_inflight(key)
+                # 画素の完成通知を先に出してから読む
+                if self._take_metadata_wish(key[0]) or with_metadata:
+                    self._prefetch_metadata(key[0])
+        finally:
+            if self._thumbnail_cache is not None:
+                self._thumbnail_cache.close_thread_connection()
+            if self._metadata_cache is not None:
+                self._metadata_cache.close_thread_connection()
+
+    def _decode_and_publish(self, key, use_thumbnail, with_preview):
+        image_path, target_w, target_h = key
+        started = time.perf_counter()
+        qimage = self._decode(key, use_thumbnail, with_preview)
+        self._record_latency(image_path, time.perf_counter() - started)
+        if qimage is None:
+            logger.warning("[ImagePrefetcher] decode 失敗: %s", os.path.basename(image_path))
+            self.image_failed.emit(image_path, target_w, target_h)
+            return
+        self.put_cache(image_path, target_w, target_h, qimage)
+        self.image_ready.emit(image_path, target_w, target_h, qimage)
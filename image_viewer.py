@@ -3,22 +3,66 @@ import os
 import re
 import json
 import queue
-import random
+import bisect
 import tempfile
 import zipfile
 import shutil
 import datetime
+import time
 import collections
+import logging
 from concurrent.futures import ThreadPoolExecutor
 from PyQt5.QtWidgets import QMainWindow, QLabel, QVBoxLayout, QWidget, QPushButton, QHBoxLayout, QComboBox, QTabWidget, QMenu, QFileDialog, QMessageBox, QAction, QInputDialog, QGridLayout, QDialog, QTextEdit, QScrollArea, QFrame, QApplication, QProgressDialog, QProgressBar, QListView, QTreeView, QListWidget, QListWidgetItem, QDialogButtonBox
-from PyQt5.QtGui import QPixmap, QImage, QImageReader, QContextMenuEvent, QFont, QIcon, QPainter, QColor, QPen, QBrush, QPainterPath
-from PyQt5.QtCore import Qt, QMutex, QThread, QTimer, QSettings, QPointF, pyqtSignal, QUrl, QSize
+from PyQt5.QtGui import QPixmap, QImage, QImageReader, QContextMenuEvent, QFont, QIcon
+from PyQt5.QtCore import Qt, QMutex, QThread, QTimer, QSettings, pyqtSignal, QUrl, QSize, QFile
 from PIL import Image
 from PIL.ExifTags import TAGS, GPSTAGS
 from history import HistoryTab
 from favorite import FavoriteTab
+from image_prefetcher import ImagePrefetcher, PRIORITY_VISIBLE
+from thumbnail_cache import get_thumbnail_cache, shutdown_thumbnail_cache
+from prefetch_planner import PrefetchPlanner
+from image_canvas import ImageCanvas
+from tiled_image_view import TiledImageView
+from animation_player import AnimationPlayer
+from folder_scanner import FolderScanWorker, MultiFolderScanWorker
+from folder_index import get_folder_index
+from folder_watcher import FolderWatcher
+from grid_permutation import GridOrder
+from image_list import ImageList
+from sort_key_index import SortKeyWorker, get_sort_key_index
+from metadata_cache import MetadataEntry, get_metadata_cache, format_exif_value
 from version import __app_name__, __version__, __copyright__
 
+logger = logging.getLogger(__name__)
+
+# 並び順のメニュー表示名 → sort_order の種類
+SORT_TYPES = {
+    'ランダム': 'random',
+    '変更日順': 'date_modified',
+    '追加日順': 'date_added',
+    '作成日順': 'date_created',
+    '名前順': 'name',
+    '名前順（数字順）': 'natural',
+    '画像サイズ順': 'dimensions',
+    'シード順': 'seed',
+    'モデル順': 'model',
+    'お気に入り優先': 'favorite',
+}
+
+# 画像ファイルのメタデータ（sort_key_index が集めるキー）で決まる並び順
+METADATA_SORT_TYPES = ('dimensions', 'seed', 'model')
+
+# ファイルの日付（スキャン時の stat）で決まる並び順
+DATE_SORT_TYPES = ('date_modified', 'date_added', 'date_created')
+
+# ←→ キー長押し時の描画間隔（約 60fps）と、最後のリピートから長押し終了とみなすまでの時間
+NAV_FRAME_MS = 16
+NAV_SETTLE_MS = 250
+
+# ウィンドウのリサイズが止まったとみなすまでの時間（その後に新しいサイズで 1 回だけデコード）
+RESIZE_SETTLE_MS = 150
+
 # タグシステムのインポート
 try:
     from tag_manager import TagManager
@@ -149,137 +193,79 @@ class TagWriteWorker(QThread):
                 self._dec_pending()
 
 
-class ImagePrefetcher(QThread):
-    """シングル表示用の画像をバックグラウンドでデコード＋リサイズして LRU キャッシュに格納する。
+class ImageDeleteWorker(QThread):
+    """削除した画像のゴミ箱への移動と、タグ DB の後始末をバックグラウンドで直列実行するワーカー。
 
-    キーは (image_path, target_w, target_h)、値は QImage（KeepAspectRatio で縮小済み）。
-    Qt の QImageReader は libjpeg/libpng を直接叩くため、Pillow → bytes → QImage の
-    余計なコピーが省ける。失敗時は Pillow にフォールバックする。
+    一覧からはメインスレッドで先に外してある前提。ゴミ箱に移せなかったとき
+    （ゴミ箱の無いボリューム・ネットワーク共有・権限等）は勝手に完全削除せず、
+    delete_failed の not_trashed=True で知らせる。完全に削除するかは GUI 側で確認し、
+    permanent=True で積み直してもらう。
+    ファイルを消せなかったときも delete_failed で知らせ、一覧に戻してもらう。
     """
 
+    delete_finished = pyqtSignal(str)           # file_path
+    delete_failed = pyqtSignal(str, str, bool)  # file_path, error_message, not_trashed
+
     _SENTINEL = None
 
-    def __init__(self, parent=None, cache_size=6):
+    def __init__(self, tag_manager=None, parent=None):
         super().__init__(parent)
+        self._tag_manager = tag_manager
         self._queue = queue.Queue()
-        self._cache = collections.OrderedDict()
-        self._cache_lock = QMutex()
-        self._cache_max = cache_size
-
-    # ---------- cache API（メインスレッドから呼ばれる）----------
+        self._pending = 0
+        self._pending_lock = QMutex()
 
-    def get_cached(self, image_path, target_w, target_h):
-        """キャッシュヒット時は QImage を返す。ミスは None。"""
-        key = (image_path, target_w, target_h)
-        self._cache_lock.lock()
-        try:
-            entry = self._cache.get(key)
-            if entry is not None:
-                self._cache.move_to_end(key)
-            return entry
-        finally:
-            self._cache_lock.unlock()
+    def _inc_pending(self):
+        self._pending_lock.lock()
+        self._pending += 1
+        self._pending_lock.unlock()
 
-    def put_cache(self, image_path, target_w, target_h, qimage):
-        key = (image_path, target_w, target_h)
-        self._cache_lock.lock()
-        try:
-            self._cache[key] = qimage
-            self._cache.move_to_end(key)
-            while len(self._cache) > self._cache_max:
-                self._cache.popitem(last=False)
-        finally:
-            self._cache_lock.unlock()
+    def _dec_pending(self):
+        self._pending_lock.lock()
+        self._pending = max(0, self._pending - 1)
+        self._pending_lock.unlock()
 
-    def clear_cache(self):
-        self._cache_lock.lock()
+    def pending_count(self) -> int:
+        self._pending_lock.lock()
         try:
-            self._cache.clear()
+            return self._pending
         finally:
-            self._cache_lock.unlock()
+            self._pending_lock.unlock()
 
-    def request(self, image_path, target_w, target_h):
-        """非同期にプリフェッチを要求する（既にキャッシュにあれば worker でスキップ）。"""
-        if not image_path or target_w <= 0 or target_h <= 0:
-            return
-        self._queue.put((image_path, target_w, target_h))
+    def enqueue(self, file_path, permanent=False):
+        """permanent=True ならゴミ箱を使わずに完全に削除する（確認済みのとき）。"""
+        self._inc_pending()
+        self._queue.put((file_path, permanent))
 
     def stop(self):
         self._queue.put(self._SENTINEL)
 
-    # ---------- decode 本体（メイン・ワーカー共通で使えるよう staticmethod）----------
-
-    @staticmethod
-    def decode_scaled(image_path, target_w, target_h):
-        """QImageReader でアスペクト比保持の縮小 QImage を返す。失敗時は None。
-
-        QImageReader は内部で libjpeg/libpng の DCT スケーリング等を利用する
-        ため、Pillow よりも一般的に高速。
-        """
-        try:
-            reader = QImageReader(image_path)
-            reader.setAutoTransform(True)  # EXIF orientation 反映
-            src_size = reader.size()
-            if not src_size.isValid() or src_size.width() <= 0 or src_size.height() <= 0:
-                return None
-            iw, ih = src_size.width(), src_size.height()
-            image_ratio = iw / ih
-            window_ratio = target_w / target_h
-            if window_ratio > image_ratio:
-                new_h = target_h
-                new_w = max(1, int(target_h * image_ratio))
-            else:
-                new_w = target_w
-                new_h = max(1, int(target_w / image_ratio))
-            reader.setScaledSize(QSize(new_w, new_h))
-            qimage = reader.read()
-            if qimage.isNull():
-                return None
-            # 統一フォーマット（描画時の暗黙変換コストを避ける）
-            if qimage.format() != QImage.Format_RGBA8888:
-                qimage = qimage.convertToFormat(QImage.Format_RGBA8888)
-            return qimage
-        except Exception:
-            return None
-
-    @staticmethod
-    def decode_scaled_with_pillow(image_path, target_w, target_h):
-        """QImageReader が失敗した場合の Pillow フォールバック。"""
-        try:
-            with Image.open(image_path) as img:
-                image_ratio = img.width / img.height
-                window_ratio = target_w / target_h
-                if window_ratio > image_ratio:
-                    new_h = target_h
-                    new_w = max(1, int(target_h * image_ratio))
-                else:
-                    new_w = target_w
-                    new_h = max(1, int(target_w / image_ratio))
-                resized = img.resize((new_w, new_h), Image.LANCZOS)
-                rgba = resized.convert("RGBA")
-                data = rgba.tobytes("raw", "RGBA")
-            qimage = QImage(data, new_w, new_h, QImage.Format_RGBA8888).copy()
-            return qimage
-        except Exception:
-            return None
-
-    # ---------- worker loop ----------
-
     def run(self):
         while True:
             item = self._queue.get()
             if item is self._SENTINEL:
                 break
-            image_path, target_w, target_h = item
-            if self.get_cached(image_path, target_w, target_h) is not None:
-                continue
-            qimage = self.decode_scaled(image_path, target_w, target_h)
-            if qimage is None:
-                qimage = self.decode_scaled_with_pillow(image_path, target_w, target_h)
-            if qimage is None:
-                print(f"[ImagePrefetcher] decode 失敗: {os.path.basename(image_path)}")
+            file_path, permanent = item
+            try:
+                if permanent:
+                    os.remove(file_path)
+                else:
+                    trashed, _ = QFile.moveToTrash(file_path)
+                    if not trashed:
+                        self.delete_failed.emit(file_path, "ゴミ箱に移動できませんでした", True)
+                        self._dec_pending()
+                        continue
+            except Exception as e:
+                self.delete_failed.emit(file_path, str(e), False)
+                self._dec_pending()
                 continue
-            self.put_cache(image_path, target_w, target_h, qimage)
+            if self._tag_manager is not None:
+                try:
+                    self._tag_manager.forget_files([file_path])
+                except Exception:
+                    logger.exception("[ImageDeleteWorker] タグ DB の後始末に失敗: %s", file_path)
+            self.delete_finished.emit(file_path)
+            self._dec_pending()
 
 
 class MultiFolderPickerDialog(QDialog):
@@ -677,10 +663,7 @@ class ExifInfoDialog(QDialog):
             all_text_lines.append("=== EXIF Information ===")
             for tag_id, value in exif_info.items():
                 tag_name = TAGS.get(tag_id, tag_id)
-                if isinstance(value, bytes):
-                    value_str = f"<バイナリデータ ({len(value)} bytes)>"
-                else:
-                    value_str = str(value)[:100]
+                value_str = format_exif_value(value)
                 all_text_lines.append(f"{tag_name}: {value_str}")
         
         # クリップボードにコピー
@@ -1109,10 +1092,7 @@ class ExifInfoDialog(QDialog):
         exif_text = ""
         for tag_id, value in exif_info.items():
             tag_name = TAGS.get(tag_id, tag_id)
-            if isinstance(value, bytes):
-                value_str = f"<バイナリデータ ({len(value)} bytes)>"
-            else:
-                value_str = str(value)[:100]
+            value_str = format_exif_value(value)
             exif_text += f"{tag_name}: {value_str}\n"
         
         exif_label = QLabel(exif_text)
@@ -1311,9 +1291,42 @@ class ImageViewer(QMainWindow):
         self.current_image_index = 0
         self.display_mode = 'single'  # 'single' または 'grid'
         
-        # 4分割グリッド用の独立したインデックス配列とポジション
-        self.grid_indices = [[], [], [], []]  # 各グリッドの独立した画像順序
+        # 4分割グリッド用の独立した表示順（GridOrder はリストを持たない順列）とポジション
+        self.grid_orders = [GridOrder(0) for _ in range(4)]  # 各グリッドの独立した画像順序
         self.grid_positions = [0, 0, 0, 0]    # 各グリッドの現在位置
+        self.images = ImageList()
+
+        # リサイズ中は表示中の画像を拡大縮小して描くだけにし、止まってから新しいサイズで描き直す。
+        # そのため各表示枠の画像が何サイズ向けにデコードしたものか（path, 幅, 高さ）を覚えておく
+        self._single_paint_target = None
+        self._grid_paint_targets = [None] * 4
+        self.resize_timer = QTimer(self)
+        self.resize_timer.setSingleShot(True)
+        self.resize_timer.setInterval(RESIZE_SETTLE_MS)
+        self.resize_timer.timeout.connect(self.show_image)
+        # ウィンドウの位置・サイズの保存も動きが止まってから
+        self.geometry_timer = QTimer(self)
+        self.geometry_timer.setSingleShot(True)
+        self.geometry_timer.setInterval(500)
+        self.geometry_timer.timeout.connect(self.save_window_geometry)
+
+        # フォルダのバックグラウンドスキャン（load_images から開始）
+        self._folder_scan_worker = None
+        self._scan_workers = set()  # 中断済みも含め、まだ終了していないスキャン
+        self._scan_generation = 0
+        self._scan_folder = None
+        self._scan_focus_path = None
+        self._sort_key_worker = None  # 画像サイズ・シード・モデル順用のキー集め
+
+        # フォルダ監視（オプトイン）。変更があれば列挙し直して差分だけ一覧に反映する
+        from theme import load_watch_folder
+        self._watch_enabled = load_watch_folder()
+        self._folder_watcher = FolderWatcher(self)
+        self._folder_watcher.folder_changed.connect(self._on_watched_folder_changed)
+        self._watch_worker = None
+        self._watch_pending = False
+        self._watch_listing = []
+        self._watch_stats = {}
         self.selected_grid = -1  # 現在選択されているグリッド（0-3、-1は選択なし）
         
         # タグシステムの初期化
@@ -1326,8 +1339,10 @@ class ImageViewer(QMainWindow):
         else:
             self.tag_manager = None
 
-        # お気に入りキャッシュ（現在フォルダ単位）
+        # お気に入りキャッシュ（現在フォルダ単位）。一括取得分はお気に入りのパスだけを持ち、
+        # 一括取得できていれば載っていないパスはお気に入りではない（1 枚ごとに DB を引かない）
         self._favorite_cache: dict = {}
+        self._favorite_cache_complete = False
 
         # お気に入り書き込みワーカー（EXIF/QSettings をバックグラウンドで処理）
         if self.tag_manager is not None:
@@ -1347,15 +1362,40 @@ class ImageViewer(QMainWindow):
         else:
             self._tag_writer = None
 
+        # 画像削除ワーカー（ゴミ箱への移動とタグ DB の後始末。一覧からは先に外す）
+        self._image_deleter = ImageDeleteWorker(self.tag_manager, parent=self)
+        self._image_deleter.delete_finished.connect(self._on_image_delete_finished)
+        self._image_deleter.delete_failed.connect(self._on_image_delete_failed)
+        self._image_deleter.start()
+        self._pending_deletes = set()  # ワーカーに渡してまだ消えていないパス
+
+        # サイドバー用メタデータのキャッシュ（開けなければ毎回ファイルを読む）
+        self._metadata_cache = get_metadata_cache()
+
         # 画像プリフェッチャ（次/前画像をバックグラウンドでデコードしておく）
-        # シングル用 6 + 4分割の各セル先読み 12 = ~18 程度が見込まれるため余裕を持たせる
-        self._image_prefetcher = ImagePrefetcher(parent=self, cache_size=24)
+        # 上限はバイト数で管理（環境設定で変更可）。件数上限だとフルスクリーン時に
+        # 1 枚数十 MB × 件数 まで膨らむため。
+        from theme import load_prefetch_cache_mb
+        # 4分割表示のセルはサムネイルのディスクキャッシュ（thumbnails.db）を経由する。
+        # サイドバー表示中は近傍のメタデータもワーカーで読んでおく
+        self._image_prefetcher = ImagePrefetcher(
+            parent=self, max_bytes=load_prefetch_cache_mb() * 1024 * 1024,
+            thumbnail_cache=get_thumbnail_cache(),
+            metadata_cache=self._metadata_cache, metadata_reader=self.read_metadata_entry,
+        )
+        self._image_prefetcher.image_ready.connect(self._on_prefetch_image_ready)
+        self._image_prefetcher.image_failed.connect(self._on_prefetch_image_failed)
+        self._image_prefetcher.preview_ready.connect(self._on_prefetch_preview_ready)
         self._image_prefetcher.start()
+        # 先読みの方向・枚数はデコード時間とスライド速度から決める
+        self._prefetch_planner = PrefetchPlanner()
 
-        # オーバーレイ再描画用キャッシュ
-        self._last_single_canvas: QPixmap = None
-        self._last_single_image_geom: tuple = None  # (image_x, image_y, new_width, new_height)
-        self._last_grid_pixmaps: list = [None, None, None, None]
+        # ワーカーのデコード完了待ちの (image_path, w, h)。image_ready で一致したら差し替える
+        self._awaiting_single = None
+        self._awaiting_grid: list = [None, None, None, None]
+        # 4分割で待ちセルが出てから全セルが揃うまでの時間（キャッシュ統計用）
+        self._grid_fill_started = None
+        self._last_grid_fill_ms = None
 
         self.initUI()
 
@@ -1386,10 +1426,15 @@ class ImageViewer(QMainWindow):
         self.main_display_widget = QWidget()
         self.main_display_layout = QVBoxLayout(self.main_display_widget)
         
-        # シングル表示用ラベル（従来のもの）
-        self.single_label = QLabel(self)
-        self.single_label.setAlignment(Qt.AlignCenter)
+        # シングル表示用キャンバス（画像・ハートを paintEvent で直接描く）
+        self.single_label = ImageCanvas(self, heart_size=25, heart_margin=(30, 10))
         self.single_label.setMinimumSize(800, 600)  # より大きな初期サイズに変更
+
+        # ズーム表示用ビュー（見えているタイルだけをデコードする。Z キーで切り替え）
+        self.zoom_view = TiledImageView(self)
+        self.zoom_view.setMinimumSize(800, 600)
+        self.zoom_view.setVisible(False)
+        self._zoom_active = False
         
         # 4分割表示用のグリッドレイアウトと4つのラベル
         self.grid_widget = QWidget()
@@ -1397,13 +1442,10 @@ class ImageViewer(QMainWindow):
         self.grid_labels = []
         
         for i in range(4):
-            label = QLabel()
-            label.setAlignment(Qt.AlignCenter)
+            label = ImageCanvas(heart_size=15, heart_margin=(15, 5), show_border=True)
             label.setMinimumSize(200, 150)
-            label.setStyleSheet("border: 1px solid #3d3d44;")
-            # クリックイベント用のカスタムプロパティ
             label.grid_index = i
-            label.mousePressEvent = lambda event, idx=i: self.grid_label_clicked(idx)
+            label.clicked.connect(lambda idx=i: self.grid_label_clicked(idx))
             self.grid_labels.append(label)
         
         # 2x2で配置
@@ -1414,7 +1456,17 @@ class ImageViewer(QMainWindow):
         
         # 初期状態はシングル表示
         self.main_display_layout.addWidget(self.single_label)
+        self.main_display_layout.addWidget(self.zoom_view)
         self.main_display_layout.addWidget(self.grid_widget)
+
+        # アニメーション GIF/WebP の再生（表示先ごとに 1 つ。フレームは直接キャンバスへ）
+        self._single_player = AnimationPlayer(self)
+        self._single_player.frame_ready.connect(self.single_label.setImage)
+        self._grid_players = []
+        for label in self.grid_labels:
+            player = AnimationPlayer(self)
+            player.frame_ready.connect(label.setImage)
+            self._grid_players.append(player)
         
         # grid_widgetは最初は非表示
         self.grid_widget.setVisible(False)
@@ -1560,12 +1612,25 @@ class ImageViewer(QMainWindow):
         central_widget.setLayout(main_layout)
         self.setCentralWidget(central_widget)
 
-        self.images = []
+        self.images = ImageList()
         self.current_image_index = 0
 
         self.timer = QTimer(self)
         self.timer.timeout.connect(self.next_image)
 
+        # ←→ キーの長押し（オートリピート）は位置だけ即座に進め、描画は 1 フレームに 1 回にまとめる。
+        # 長押し中は先読み・サイドバー更新・アニメーション再生を省き、離したときに最後の画像で行う
+        self._nav_scrubbing = False
+        self._nav_render_timer = QTimer(self)
+        self._nav_render_timer.setSingleShot(True)
+        self._nav_render_timer.setInterval(NAV_FRAME_MS)
+        self._nav_render_timer.timeout.connect(self.show_image)
+        # キーを離した通知が来なかった場合（フォーカス移動など）の保険
+        self._nav_settle_timer = QTimer(self)
+        self._nav_settle_timer.setSingleShot(True)
+        self._nav_settle_timer.setInterval(NAV_SETTLE_MS)
+        self._nav_settle_timer.timeout.connect(self._finish_navigation_scrub)
+
         self.is_running = False
         self.tag_apply_worker = None  # バックグラウンド適用用
         self.tag_apply_queue = []  # タグ適用のキュー
@@ -1694,12 +1759,24 @@ class ImageViewer(QMainWindow):
             return
         
         current_image_path = self.images[self.current_image_index]
-        metadata = self.get_exif_data(current_image_path)
-        
+        entry = self.get_metadata_entry(current_image_path)
+        self.populate_sidebar_content(entry.parsed, entry.metadata, current_image_path, entry.loras)
+
+    def get_metadata_entry(self, image_path):
+        """サイドバー用のメタデータ（キャッシュ経由）。
+
+        同じファイル（パス・更新日時・サイズが同じ）は 2 回目以降ファイルを開かない。
+        """
+        if self._metadata_cache is None:
+            return self.read_metadata_entry(image_path)
+        return self._metadata_cache.load(image_path, self.read_metadata_entry)
+
+    def read_metadata_entry(self, image_path):
+        """ファイルからメタデータを読み、プロンプトと LoRA を解析する（GUI 以外のスレッドからも呼べる）。"""
+        metadata = self.get_exif_data(image_path)
         # UIを作らずに解析ロジックのみを使用
         parsed_data = ExifInfoDialog.parse_metadata_statically(metadata)
-        
-        self.populate_sidebar_content(parsed_data, metadata, current_image_path)
+        return MetadataEntry(metadata, parsed_data, self._extract_loras(parsed_data))
     
     def show_sidebar_no_data(self):
         """サイドバーにデータなしメッセージを表示"""
@@ -1725,10 +1802,8 @@ class ImageViewer(QMainWindow):
             return
             
         current_image_path = self.images[self.current_image_index]
-        metadata = self.get_exif_data(current_image_path)
-        
-        # UIを作らずに解析ロジックのみを使用
-        parsed_data = ExifInfoDialog.parse_metadata_statically(metadata)
+        entry = self.get_metadata_entry(current_image_path)
+        metadata, parsed_data = entry.metadata, entry.parsed
         
         all_text_lines = []
         
@@ -1770,10 +1845,7 @@ class ImageViewer(QMainWindow):
             all_text_lines.append("=== EXIF Information ===")
             for tag_id, value in exif_info.items():
                 tag_name = TAGS.get(tag_id, tag_id)
-                if isinstance(value, bytes):
-                    value_str = f"<バイナリデータ ({len(value)} bytes)>"
-                else:
-                    value_str = str(value)[:100]
+                value_str = format_exif_value(value)
                 all_text_lines.append(f"{tag_name}: {value_str}")
         
         # クリップボードにコピー
@@ -1786,7 +1858,7 @@ class ImageViewer(QMainWindow):
         self.copy_all_sidebar_button.setText("✓")
         QTimer.singleShot(1000, lambda: self.copy_all_sidebar_button.setText(original_text))
     
-    def populate_sidebar_content(self, parsed_data, metadata, image_path):
+    def populate_sidebar_content(self, parsed_data, metadata, image_path, loras=None):
         """サイドバーにメタデータコンテンツを表示"""
         # 既存のコンテンツをクリア
         self.clear_sidebar_content()
@@ -1855,7 +1927,8 @@ class ImageViewer(QMainWindow):
                 self.sidebar_content_layout.addWidget(hire_section)
             
             # 使用 LoRA セクション（パラメータの上に配置して見つけやすく）
-            loras = self._extract_loras(parsed_data)
+            if loras is None:
+                loras = self._extract_loras(parsed_data)
             if loras:
                 loras_section = self.create_sidebar_loras_section(loras)
                 self.sidebar_content_layout.addWidget(loras_section)
@@ -2449,10 +2522,7 @@ class ImageViewer(QMainWindow):
         exif_text_lines = []
         for tag_id, value in exif_info.items():
             tag_name = TAGS.get(tag_id, tag_id)
-            if isinstance(value, bytes):
-                value_str = f"<バイナリ ({len(value)}B)>"
-            else:
-                value_str = str(value)[:50]  # サイドバー用に短縮
+            value_str = format_exif_value(value, 50)  # サイドバー用に短縮
             exif_text_lines.append(f"{tag_name}: {value_str}")
         
         exif_text_edit = QTextEdit()
@@ -2531,27 +2601,44 @@ class ImageViewer(QMainWindow):
         self.sort_images()
 
     def sort_images(self):
+        self._apply_sort_order(self.images)
+        self.current_image_index = 0
+        self.show_image()
+        if self.sort_order[0] in METADATA_SORT_TYPES and self._sort_key_worker is not None:
+            self.show_message("🔄 画像情報を読み込み中です。読み終わったら並べ直します", duration=2000)
+
+    def _apply_sort_order(self, images):
+        """self.sort_order に従って images をその場で並べ替える（表示は更新しない）。"""
         order_type, is_ascending = self.sort_order
 
         if order_type == 'random':
-            random.shuffle(self.images)
+            images.shuffle()
         else:
             reverse = not is_ascending
-            if order_type == 'date_modified':
-                self.images.sort(key=self._stat_key_mtime(self.images), reverse=reverse)
-            elif order_type == 'date_added':
-                self.images.sort(key=self._stat_key_ctime(self.images), reverse=reverse)
-            elif order_type == 'date_created':
-                self.images.sort(key=self._stat_key_ctime(self.images), reverse=reverse)
+            if order_type in DATE_SORT_TYPES:
+                # スキャン時に得た日付を使い、持っていない画像だけ並列に stat する
+                images.set_stats(self._parallel_stat(images.paths_without_stats()))
+                column = 0 if order_type == 'date_modified' else 1
+                images.sort_by_stat(column, reverse=reverse)
             elif order_type == 'name':
-                self.images.sort(key=lambda x: os.path.basename(x).lower(), reverse=reverse)
-
-        self.current_image_index = 0
-        self.show_image()
+                images.sort_by_name(reverse=reverse)
+            elif order_type == 'natural':
+                images.sort_by_natural_name(reverse=reverse)
+            elif order_type == 'dimensions':
+                images.sort_by_dimensions(reverse=reverse)
+            elif order_type == 'seed':
+                images.sort_by_seed(reverse=reverse)
+            elif order_type == 'model':
+                images.sort_by_model(reverse=reverse)
+            elif order_type == 'favorite':
+                # 昇順はお気に入りが先頭。同じグループ内はファイル名（数字順）
+                favorites = self._favorite_cache
+                images.sort_by_natural_name()
+                images.sort(key=lambda p: not favorites.get(p, False), reverse=reverse)
 
     @staticmethod
-    def _parallel_stat(paths, attr):
-        """各ファイルの stat 値（mtime/ctime 等）を並列取得して dict で返す。
+    def _parallel_stat(paths):
+        """各ファイルの (mtime, ctime) を並列取得して dict で返す。
 
         os.path.getmtime/getctime は内部で stat() を呼ぶため、N 枚で N 回の
         シリアル stat になり、大量画像で体感的に遅くなる。ThreadPoolExecutor
@@ -2564,9 +2651,9 @@ class ImageViewer(QMainWindow):
         def _stat_one(p):
             try:
                 st = os.stat(p)
-                return p, getattr(st, attr)
+                return p, (st.st_mtime, st.st_ctime)
             except OSError:
-                return p, 0.0
+                return p, (0.0, 0.0)
 
         # スレッド数はあまり大きくしすぎない（macOS の stat はそこそこ並列効率良い）
         max_workers = min(16, max(4, (os.cpu_count() or 4) * 2))
@@ -2575,14 +2662,6 @@ class ImageViewer(QMainWindow):
                 results[p] = v
         return results
 
-    def _stat_key_mtime(self, paths):
-        cache = self._parallel_stat(paths, "st_mtime")
-        return lambda p: cache.get(p, 0.0)
-
-    def _stat_key_ctime(self, paths):
-        cache = self._parallel_stat(paths, "st_ctime")
-        return lambda p: cache.get(p, 0.0)
-
     @staticmethod
     def _filter_existing_parallel(paths):
         """並列に os.path.isfile を実行して存在するパスのみ返す。
@@ -2620,53 +2699,406 @@ class ImageViewer(QMainWindow):
         self.descending_action.setChecked(not is_ascending)
         self.sort_images()
 
-    def load_images(self, folder_path):
-        try:
-            # フォルダ内のファイルをリストアップ
-            all_files = os.listdir(folder_path)
-            # print(f"フォルダ内の全ファイル: {all_files}")  # デバッグ用出力
+    def load_images(self, folder_path, focus_path=None):
+        """フォルダを開く。
 
-            self.images = [os.path.join(folder_path, f) for f in all_files
-                           if f.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp'))]
+        一覧は FolderScanWorker が os.scandir でバックグラウンド列挙し、最初の 1 枚が
+        見つかった時点で表示を始める（以降はバッチごとに _on_folder_scan_batch で追加）。
+        フォルダ自体が無い場合だけここで例外を出し、画像が 1 枚も無かった場合は
+        スキャン完了時（_on_folder_scan_finished）に知らせる。
+        focus_path を渡すと、その画像が見つかった時点でその画像に移動する。
+        """
+        if not os.path.isdir(folder_path):
+            raise FileNotFoundError(f"フォルダが見つかりません: {folder_path}")
 
-            # プリフェッチキャッシュをクリア（前フォルダの画像は不要）
-            if hasattr(self, '_image_prefetcher') and self._image_prefetcher is not None:
-                self._image_prefetcher.clear_cache()
+        self._reset_for_scan(folder_path, focus_path)
+        self._folder_watcher.watch(folder_path if self._watch_enabled else None)
 
-            # print(f"認識された画像ファイル: {self.images}")  # デバッグ用出力
+        # フォルダモードに設定
+        self.list_mode = "folder"
+        self.current_folder = folder_path
+        self.current_filter_query = None
+        self.update_window_title()
 
-            if not self.images:
-                raise ValueError("No images found in the selected folder.")
+        # 日付順のときはスキャンと同時に stat しておく（ソートで stat し直さない）。
+        # 前回開いたフォルダはインデックスから一覧と日付を得る（その場で書き換えられた
+        # 画像の日付は、表示したときに _check_displayed_stat で直す）
+        with_stat = self.sort_order[0] in DATE_SORT_TYPES
+        worker = FolderScanWorker(
+            folder_path, self._scan_generation, with_stat=with_stat, index=get_folder_index(), parent=self
+        )
+        self._start_folder_scan(worker)
 
-            self._init_favorite_cache()
-            self.sort_images()
-            self.initialize_grid_system()  # 独立したグリッドシステムを初期化
+    def load_folders_instant(self, folders, description):
+        """複数フォルダを並列に列挙し、1 つの一覧として表示する（履歴・登録リストには載せない）。
+
+        一覧は MultiFolderScanWorker から load_images と同じようにバッチで届く。
+        列挙時の stat 結果をそのまま使うので、存在確認や日付順ソートで stat し直さない。
+        """
+        self._reset_for_scan(None, None)
+        self._folder_watcher.watch(None)
+
+        # フィルタモードに設定
+        self.list_mode = "filter"
+        self.filter_description = description
+        self.current_folder = None
+        self.current_filter_query = None
+        self.update_window_title()
+
+        worker = MultiFolderScanWorker(folders, self._scan_generation, parent=self)
+        worker.folders_skipped.connect(self._on_scan_folders_skipped)
+        self._start_folder_scan(worker)
+
+    def _reset_for_scan(self, folder_path, focus_path):
+        """スキャン開始前に前の一覧・キャッシュ・表示を空にする。"""
+        self._cancel_folder_scan()
+        self._scan_generation += 1
+        self._scan_folder = folder_path
+        self._scan_focus_path = focus_path
+
+        self.images = ImageList()
+        self.current_image_index = 0
+        self._favorite_cache = {}
+        self._favorite_cache_complete = True
+        self._reset_grid_orders()
+
+        # プリフェッチキャッシュをクリア（前フォルダの画像は不要）
+        if hasattr(self, '_image_prefetcher') and self._image_prefetcher is not None:
+            self._image_prefetcher.clear_cache()
+        self._stop_animations()
+        self.single_label.setText("📂 フォルダを読み込み中…")
+        for label in self.grid_labels:
+            label.setText("📂 読み込み中…")
+
+    def _start_folder_scan(self, worker):
+        worker.batch_found.connect(self._on_folder_scan_batch)
+        worker.scan_finished.connect(self._on_folder_scan_finished)
+        worker.scan_failed.connect(self._on_folder_scan_failed)
+        self._folder_scan_worker = worker
+        self._start_scan_worker(worker)
+
+    def _start_scan_worker(self, worker):
+        worker.finished.connect(lambda w=worker: self._on_scan_worker_finished(w))
+        self._scan_workers.add(worker)
+        worker.start()
+
+    def _on_scan_worker_finished(self, worker):
+        if worker in self._scan_workers:
+            self._scan_workers.discard(worker)
+            worker.deleteLater()
+
+    def _cancel_folder_scan(self):
+        """実行中のフォルダスキャンを中断する（以降の通知は世代違いで捨てられる）。"""
+        for worker in (self._folder_scan_worker, self._watch_worker, self._sort_key_worker):
+            if worker is not None:
+                worker.request_stop()
+        self._folder_scan_worker = None
+        self._watch_worker = None
+        self._sort_key_worker = None
+        self._watch_pending = False
+        self._scan_generation += 1
+
+    def is_scanning_folder(self):
+        return self._folder_scan_worker is not None
+
+    def _on_folder_scan_batch(self, generation, paths, stats):
+        """スキャン途中のバッチを現在の並び順を保ったまま一覧とグリッドに足す。"""
+        if generation != self._scan_generation:
+            return
+        first_batch = not self.images
+        if TAG_SYSTEM_AVAILABLE and self.tag_manager:
+            try:
+                self._store_favorite_paths(self.tag_manager.get_favorite_paths(paths))
+            except Exception:
+                logger.exception("お気に入り情報の取得に失敗しました")
+                self._favorite_cache_complete = False
+
+        self._merge_images(paths, stats)
+
+        focus = self._scan_focus_path
+        if first_batch and self._scan_folder is not None:
+            self.settings.setValue("last_folder", self._scan_folder)
+            self.history_tab.update_folder_history(self._scan_folder)
+        if focus is not None and focus in paths:
+            self._scan_focus_path = None
+            self.current_image_index = self.images.index(focus)
             self.show_image()
-            self.settings.setValue("last_folder", folder_path)
-            self.history_tab.update_folder_history(folder_path)
-            
-            # フォルダモードに設定
-            self.list_mode = "folder"
-            self.current_folder = folder_path
-            self.current_filter_query = None
+        elif first_batch:
+            self.show_image()
+        self.update_window_title()
+        self.show_message(f"📂 読み込み中… {len(self.images)}枚", duration=1000)
+
+    def _merge_images(self, paths, stats=None):
+        """画像を一覧に加え、並び順・表示位置・グリッドの並びを維持する。
+
+        並べ替えで既存画像の添字がずれるため、表示中の画像（シングル・各セル）の
+        新しい位置を探し直す。ランダム順では「まだ見ていない側（現在位置より後）」
+        だけに新しい画像を混ぜる。stats は {path: (mtime, ctime)}（日付順ソート用）。
+        バッチは倍々に大きくなるので、全体の手間は一覧の長さにほぼ比例する。
+        """
+        images = self.images
+        old_count = len(images)
+        # 表示中の画像はエントリ番号で覚えておく（並べ替え後にパスで探し直すと一覧の長さに比例する）
+        current = images.entry_ids([self.current_image_index])[0] if old_count else None
+        visible = images.entry_ids(self.calculate_grid_indices()) if old_count >= 4 else []
+
+        images.extend(paths, stats)
+        if self.sort_order[0] == 'random':
+            images.shuffle(self.current_image_index + 1 if old_count else 0)
+        else:
+            self._apply_sort_order(images)
+
+        if current is not None:
+            self.current_image_index = images.position_of_entry(current)
+
+        if old_count < 4:
+            # 4 枚揃うまでは全セルが同じ画像になるので作り直す
+            self.initialize_grid_system()
+            if old_count and self.display_mode == 'grid':
+                self.show_image()
+            return
+        # 各セルは表示中の画像を先頭にした新しい順列にする（O(1)、以降は追加分も混ざる）
+        for i in range(4):
+            self.grid_orders[i] = GridOrder(len(images), anchor=images.position_of_entry(visible[i]))
+            self.grid_positions[i] = 0
+
+    def _on_folder_scan_finished(self, generation, total):
+        if generation != self._scan_generation:
+            return
+        self._folder_scan_worker = None
+        self._scan_focus_path = None
+        if not self.images:
+            self.single_label.setText("画像なし")
+            for label in self.grid_labels:
+                label.setText("画像なし")
+            if self._scan_folder is None:
+                # 複数フォルダ表示
+                QMessageBox.warning(self, "エラー", "選択されたフォルダに画像が見つかりませんでした。")
+                return
+            QMessageBox.warning(self, "エラー", f"選択されたフォルダに画像が見つかりませんでした:\n{self._scan_folder}\n別のフォルダを選択してください。")
+            self.select_folder()
+            return
+
+        self.update_window_title()
+        self.show_message(f"📂 {len(self.images)}枚を読み込みました")
+        self._start_sort_key_worker()
+
+        # 読み込み中に監視フォルダが変わっていたら差分を取り直す
+        if self._watch_pending:
+            self._watch_pending = False
+            self._refresh_watched_folder()
+
+        # お気に入りタブも更新
+        if TAG_SYSTEM_AVAILABLE and self.favorites_tab:
+            self.favorites_tab.update_favorites_list()
+
+        # ZIP圧縮メニューの状態を更新
+        self.update_zip_menu_state()
+
+    def _start_sort_key_worker(self):
+        """並べ替えキー（画像サイズ・シード・モデル）をまだ持っていない画像の分を集め始める。"""
+        if self._sort_key_worker is not None:
+            self._sort_key_worker.request_stop()
+            self._sort_key_worker = None
+        items = self.images.items_without_sort_keys()
+        if not items:
+            return
+        worker = SortKeyWorker(items, self._scan_generation, index=get_sort_key_index(), parent=self)
+        worker.keys_found.connect(self._on_sort_keys_found)
+        worker.keys_finished.connect(self._on_sort_keys_finished)
+        self._sort_key_worker = worker
+        self._start_scan_worker(worker)
+        worker.setPriority(QThread.LowPriority)
+
+    def _on_sort_keys_found(self, generation, keys):
+        if generation != self._scan_generation:
+            return
+        self.images.set_sort_keys(keys)
+
+    def _on_sort_keys_finished(self, generation):
+        if generation != self._scan_generation:
+            return
+        self._sort_key_worker = None
+        if self.sort_order[0] in METADATA_SORT_TYPES:
+            # 途中で並べ替えていた場合に、揃ったキーで並べ直す（表示中の画像はそのまま）
+            self._merge_images([])
+            self.update_window_title()
+
+    def set_watch_folder_enabled(self, enabled):
+        """フォルダ監視のオン・オフ（設定に保存し、開いているフォルダに即反映）"""
+        from theme import save_watch_folder
+        self._watch_enabled = bool(enabled)
+        save_watch_folder(self._watch_enabled)
+        if hasattr(self, 'watch_folder_action'):
+            self.watch_folder_action.setChecked(self._watch_enabled)
+        watching = self._watch_enabled and getattr(self, "list_mode", None) == "folder" and self.current_folder
+        self._folder_watcher.watch(self.current_folder if watching else None)
+        if self._watch_enabled:
+            self.show_message("👁️ フォルダ監視をオンにしました（新着・削除を自動で反映）", duration=2000)
+            if watching:
+                # オフの間に増減していた分も反映する
+                self._refresh_watched_folder()
+        else:
+            self.show_message("フォルダ監視をオフにしました", duration=2000)
+
+    def _on_watched_folder_changed(self, folder_path):
+        if self.list_mode != "folder" or folder_path != self.current_folder:
+            return
+        self._refresh_watched_folder()
+
+    def _refresh_watched_folder(self):
+        """監視中のフォルダを列挙し直す（結果は _on_watch_scan_finished で差分適用）。"""
+        if self._folder_scan_worker is not None or self._watch_worker is not None:
+            # 読み込み中・差分取得中はそれが終わってからもう一度
+            self._watch_pending = True
+            return
+        self._watch_listing = []
+        self._watch_stats = {}
+        worker = FolderScanWorker(
+            self.current_folder, self._scan_generation, index=get_folder_index(), parent=self
+        )
+        worker.batch_found.connect(self._on_watch_batch)
+        worker.scan_finished.connect(self._on_watch_scan_finished)
+        worker.scan_failed.connect(self._on_watch_scan_failed)
+        self._watch_worker = worker
+        self._start_scan_worker(worker)
+
+    def _on_watch_batch(self, generation, paths, stats):
+        if generation != self._scan_generation:
+            return
+        self._watch_listing.extend(paths)
+        self._watch_stats.update(stats)
+
+    def _on_watch_scan_failed(self, generation, message):
+        if generation != self._scan_generation:
+            return
+        self._watch_worker = None
+        logger.warning("フォルダ監視: 再列挙に失敗しました: %s", message)
+
+    def _on_watch_scan_finished(self, generation, total):
+        """列挙し直した結果と今の一覧を突き合わせ、増えた・消えた画像だけを反映する。
+
+        表示中の画像・並び順・グリッドの位置・プリフェッチ済みの画像はそのまま残す。
+        """
+        if generation != self._scan_generation:
+            return
+        self._watch_worker = None
+        listing, stats = self._watch_listing, self._watch_stats
+        self._watch_listing, self._watch_stats = [], {}
+
+        current = set(self.images)
+        # ゴミ箱への移動待ちの画像はまだ残っているが、一覧には戻さない
+        added = [p for p in listing if p not in current and p not in self._pending_deletes]
+        removed = current.difference(listing)
+
+        if removed:
+            self._remove_images(removed)
+        # 同じ名前で置き換わった画像（inode が変わったもの）は日付と並べ替えキーを取り直す
+        changed = self.images.update_stats(stats)
+        if changed and not added and self.sort_order[0] in DATE_SORT_TYPES:
+            self._merge_images([])
+        if added:
+            if TAG_SYSTEM_AVAILABLE and self.tag_manager:
+                try:
+                    self._store_favorite_paths(self.tag_manager.get_favorite_paths(added))
+                except Exception:
+                    logger.exception("フォルダ監視: お気に入り情報の取得に失敗しました")
+                    self._favorite_cache_complete = False
+            was_empty = not self.images
+            self._merge_images(added, stats)
+            if was_empty:
+                self.show_image()
+        if added or changed:
+            self._start_sort_key_worker()
+
+        if added or removed:
             self.update_window_title()
-            
-            # お気に入りタブも更新
-            if TAG_SYSTEM_AVAILABLE and self.favorites_tab:
-                self.favorites_tab.update_favorites_list()
-            
-            # ZIP圧縮メニューの状態を更新
             self.update_zip_menu_state()
-        except Exception as e:
-            print(f"load_images Error: {e}")  # エラーの内容を出力
-            # フォルダ選択ダイアログは呼び出し元で処理される
-            raise  # エラーを再発生させて呼び出し元で処理
-    
+            parts = []
+            if added:
+                parts.append(f"新着 {len(added)}枚")
+            if removed:
+                parts.append(f"削除 {len(removed)}枚")
+            self.show_message(f"👁️ {' / '.join(parts)}（{len(self.images)}枚）", duration=2000)
+
+        if self._watch_pending:
+            self._watch_pending = False
+            self._refresh_watched_folder()
+
+    def _remove_images(self, removed):
+        """一覧から画像をまとめて取り除く（並び順・表示位置・グリッドの並びは維持）。
+
+        表示中の画像が消えた場合は、その次にあった画像を表示する。
+        """
+        images = self.images
+        removed_indices = [j for j, p in enumerate(images) if p in removed]
+        for p in removed:
+            self._favorite_cache.pop(p, None)
+        if not removed_indices:
+            return
+
+        if len(removed_indices) == len(images):
+            self.images = ImageList()
+            self.current_image_index = 0
+            self._reset_grid_orders()
+            self._stop_animations()
+            self.single_label.setText("画像なし")
+            for label in self.grid_labels:
+                label.setText("画像なし")
+            return
+
+        def new_index(old_index):
+            """old_index の画像（消えていればその次に残っている画像）の新しい位置。"""
+            return old_index - bisect.bisect_left(removed_indices, old_index)
+
+        removed_set = set(removed_indices)
+        old_count = len(images)
+        current_removed = self.current_image_index in removed_set
+        visible = self.calculate_grid_indices() if self.grid_orders[0] else []
+        visible_changed = any(j in removed_set for j in visible)
+
+        images.delete_indices(removed_indices)
+        current_index = new_index(self.current_image_index)
+        self.current_image_index = current_index if current_index < len(images) else 0
+
+        if len(removed_indices) * 4 > old_count:
+            # まとめて大量に消えたときは、表示中の画像を先頭にした順列に作り直す
+            for i in range(4):
+                anchor = new_index(visible[i]) if visible and visible[i] not in removed_set else None
+                self.grid_orders[i] = GridOrder(len(images), anchor=anchor)
+                self.grid_positions[i] = 0
+        else:
+            # 後ろのインデックスから外す（前から外すと残りの番号がずれる）
+            for j in reversed(removed_indices):
+                self._remove_grid_index(j)
+            self._normalize_grid_positions()
+
+        if current_removed or (self.display_mode == 'grid' and visible_changed):
+            self._clear_grid_selection()
+            self.show_image()
+
+    def _on_scan_folders_skipped(self, generation, folders):
+        """複数フォルダ表示で画像が無かった・開けなかったフォルダを知らせる。"""
+        if generation != self._scan_generation or not folders:
+            return
+        self.show_message(f"⚠ 画像が無いフォルダをスキップ: {len(folders)} 件", duration=3000)
+        logger.info("画像が無い・開けないためスキップしたフォルダ: %s", ", ".join(folders))
+
+    def _on_folder_scan_failed(self, generation, message):
+        if generation != self._scan_generation:
+            return
+        self._folder_scan_worker = None
+        QMessageBox.warning(self, "エラー", f"フォルダの読み込み中にエラーが発生しました:\n{message}")
+
     def load_filtered_images(self, image_list, description="フィルタリング結果", filter_query=None):
         """フィルタリングされた画像リストをビューアーに読み込み"""
         try:
+            # フォルダのスキャン中なら打ち切る（このリストで置き換える）
+            self._cancel_folder_scan()
+            self._folder_watcher.watch(None)
+
             # 存在する画像ファイルのみをフィルタ（並列で stat して N 回のシリアル I/O を回避）
-            self.images = self._filter_existing_parallel(image_list)
+            self.images = ImageList(self._filter_existing_parallel(image_list))
 
             if not self.images:
                 raise ValueError("No valid images in the filtered list.")
@@ -2695,25 +3127,36 @@ class ImageViewer(QMainWindow):
             
             # ZIP圧縮メニューの状態を更新
             self.update_zip_menu_state()
+            self._start_sort_key_worker()
         except Exception as e:
             print(f"load_filtered_images Error: {e}")
             raise
     
     def _init_favorite_cache(self):
         """self.images のお気に入り状態を一括取得してキャッシュを初期化する。"""
+        self._favorite_cache = {}
+        self._favorite_cache_complete = False
         if not (TAG_SYSTEM_AVAILABLE and self.tag_manager and hasattr(self, 'images') and self.images):
-            self._favorite_cache = {}
             return
         try:
-            self._favorite_cache = self.tag_manager.get_favorite_map(self.images)
+            self._favorite_cache_complete = True
+            self._store_favorite_paths(self.tag_manager.get_favorite_paths(self.images))
         except Exception as e:
             print(f"_init_favorite_cache Error: {e}")
             self._favorite_cache = {}
+            self._favorite_cache_complete = False
+
+    def _store_favorite_paths(self, favorite_paths):
+        """get_favorite_paths で得たお気に入りのパスをキャッシュに載せる（載っていないパスは False 扱い）。"""
+        self._favorite_cache.update(dict.fromkeys(favorite_paths, True))
 
     def _get_favorite(self, image_path):
         """キャッシュからお気に入り状態を返す。未登録の場合は DB にフォールバックしキャッシュに書き戻す。"""
         if image_path in self._favorite_cache:
             return self._favorite_cache[image_path]
+        if self._favorite_cache_complete:
+            # 一覧の画像は一括取得済み。載っていなければお気に入りではない
+            return False
         if TAG_SYSTEM_AVAILABLE and self.tag_manager:
             try:
                 status = self.tag_manager.get_favorite_status(image_path)
@@ -2739,13 +3182,16 @@ class ImageViewer(QMainWindow):
         self.setWindowTitle(title)
 
     def show_image(self):
+        # 表示が切り替わるので、未着手の先読み要求は一旦すべて世代切れにする
+        # （新しい表示位置の近傍は直後の _prefetch_neighbors_* で積み直される）
+        self._image_prefetcher.bump_generation()
         if self.display_mode == 'single':
             self.show_image_single()
         else:
             self.show_image_grid()
         
-        # サイドバーが表示されている場合のみメタデータを更新
-        if self.sidebar_visible:
+        # サイドバーが表示されている場合のみメタデータを更新（長押し中は離したときに 1 回）
+        if self.sidebar_visible and not self._nav_scrubbing:
             self.update_sidebar_metadata()
 
     def initialize_grid_system(self):
@@ -2755,163 +3201,47 @@ class ImageViewer(QMainWindow):
         
         total_images = len(self.images)
         
-        # 各グリッドに独立したランダム配列を作成
+        # 各グリッドに独立したランダム順列を作成（鍵を作るだけなので枚数によらず一瞬）
         for i in range(4):
-            # 全画像インデックスのリストを作成
-            indices = list(range(total_images))
-            # 各グリッドを独立してランダムシャッフル
-            random.shuffle(indices)
-            self.grid_indices[i] = indices
+            self.grid_orders[i] = GridOrder(total_images)
             self.grid_positions[i] = 0  # 各グリッドの開始位置をリセット
         
         # 独立グリッドシステム初期化完了
 
+    def _reset_grid_orders(self):
+        """画像リストが空になったときにグリッドの順序を空にする"""
+        self.grid_orders = [GridOrder(0) for _ in range(4)]
+        self.grid_positions = [0, 0, 0, 0]
+
+    def _remove_grid_index(self, index):
+        """self.images から index の画像を外したことを各グリッドの順序に反映する。
+
+        順列は作り直さないので、他のセルの並びと現在位置はそのまま。
+        複数外すときは大きい index から順に呼び、最後に _normalize_grid_positions() を呼ぶ。
+        """
+        for order in self.grid_orders:
+            if order:
+                order.remove(index)
+
+    def _normalize_grid_positions(self):
+        """削除された画像を指しているセルを次の画像へ進め、削除が溜まった順序は作り直す"""
+        for i, order in enumerate(self.grid_orders):
+            if not order:
+                continue
+            pos = order.normalize(self.grid_positions[i])
+            if order.needs_rebase():
+                # 表示中の画像を先頭にした順列に作り直す（削除済みの読み飛ばしを無くす）
+                order = GridOrder(len(self.images), anchor=order.index_at(pos))
+                self.grid_orders[i] = order
+                pos = 0
+            self.grid_positions[i] = pos
+
     def shuffle_grid_system(self):
         """グリッドシステムを再シャッフル（手動実行用）"""
         self.initialize_grid_system()
         if self.display_mode == 'grid':
             self.show_image()
 
-    def draw_favorite_heart_on_canvas(self, canvas, heart_size=40, image_x=0, image_y=0, image_width=0, image_height=0):
-        """キャンバス上の画像の左下を基準にハートを描画"""
-        painter = QPainter(canvas)
-        painter.setRenderHint(QPainter.Antialiasing)
-        
-        # カードのパディング（正方形に近づける）
-        card_padding = 8  # 均等なパディング
-        card_width = heart_size + card_padding * 2
-        card_height = heart_size + card_padding * 2
-        
-        # カードの位置（画像の左下から固定距離）
-        margin_x = 30  # 画像の左端からのマージン（小さくして右に寄せる）
-        margin_y = 10  # 画像の下端からのマージン（小さくして下に寄せる）
-        card_x = image_x + margin_x
-        card_y = image_y + image_height - card_height - margin_y
-        
-        # 半透明の黒いカード背景を描画
-        card_color = QColor(0, 0, 0, 80)  # 黒、透明度80/255
-        painter.setBrush(QBrush(card_color))
-        painter.setPen(Qt.NoPen)
-        painter.drawRoundedRect(card_x, card_y, card_width, card_height, 8, 8)
-        
-        # ハートの中心位置（カード内の中央）
-        center_x = card_x + card_padding + heart_size / 2
-        center_y = card_y + card_padding + heart_size / 2
-        
-        # ハートの形を作成
-        heart_path = QPainterPath()
-        
-        # ハートのサイズ調整
-        scale = heart_size / 40.0
-        
-        # ハートの上部（2つの半円）
-        # 左側の半円
-        heart_path.moveTo(QPointF(center_x, center_y - 5 * scale))
-        heart_path.cubicTo(
-            QPointF(center_x, center_y - 12 * scale),
-            QPointF(center_x - 12 * scale, center_y - 12 * scale),
-            QPointF(center_x - 12 * scale, center_y - 5 * scale)
-        )
-        # 左側の半円の下部
-        heart_path.cubicTo(
-            QPointF(center_x - 12 * scale, center_y + 2 * scale),
-            QPointF(center_x, center_y + 10 * scale),
-            QPointF(center_x, center_y + 15 * scale)
-        )
-        # 右側の半円の下部
-        heart_path.cubicTo(
-            QPointF(center_x, center_y + 10 * scale),
-            QPointF(center_x + 12 * scale, center_y + 2 * scale),
-            QPointF(center_x + 12 * scale, center_y - 5 * scale)
-        )
-        # 右側の半円
-        heart_path.cubicTo(
-            QPointF(center_x + 12 * scale, center_y - 12 * scale),
-            QPointF(center_x, center_y - 12 * scale),
-            QPointF(center_x, center_y - 5 * scale)
-        )
-        
-        heart_path.closeSubpath()
-        
-        # 赤で塗りつぶし、濃い赤の縁取り
-        painter.setBrush(QBrush(QColor(255, 50, 80)))  # 明るい赤
-        painter.setPen(QPen(QColor(200, 20, 50), 2))  # 濃い赤の縁
-        painter.drawPath(heart_path)
-        
-        painter.end()
-        
-        return canvas
-    
-    def draw_favorite_heart(self, pixmap, heart_size=40):
-        """pixmapの左下に半透明の黒いカード背景付きの赤いハートを描画（グリッド用）"""
-        painter = QPainter(pixmap)
-        painter.setRenderHint(QPainter.Antialiasing)
-        
-        # カードのパディング（正方形に近づける）
-        card_padding = 8  # 均等なパディング
-        card_width = heart_size + card_padding * 2
-        card_height = heart_size + card_padding * 2
-        
-        # カードの位置（画像の左下から固定距離）
-        margin_x = 15  # 左端からのマージン（グリッドでは小さめに）
-        margin_y = 5  # 下端からのマージン（グリッドでは小さめに）
-        card_x = margin_x
-        card_y = pixmap.height() - card_height - margin_y
-        
-        # 半透明の黒いカード背景を描画
-        card_color = QColor(0, 0, 0, 80)  # 黒、透明度80/255
-        painter.setBrush(QBrush(card_color))
-        painter.setPen(Qt.NoPen)
-        painter.drawRoundedRect(card_x, card_y, card_width, card_height, 8, 8)
-        
-        # ハートの中心位置（カード内の中央）
-        center_x = card_x + card_padding + heart_size / 2
-        center_y = card_y + card_padding + heart_size / 2
-        
-        # ハートの形を作成
-        heart_path = QPainterPath()
-        
-        # ハートのサイズ調整
-        scale = heart_size / 40.0
-        
-        # ハートの上部（2つの半円）
-        # 左側の半円
-        heart_path.moveTo(QPointF(center_x, center_y - 5 * scale))
-        heart_path.cubicTo(
-            QPointF(center_x, center_y - 12 * scale),
-            QPointF(center_x - 12 * scale, center_y - 12 * scale),
-            QPointF(center_x - 12 * scale, center_y - 5 * scale)
-        )
-        # 左側の半円の下部
-        heart_path.cubicTo(
-            QPointF(center_x - 12 * scale, center_y + 2 * scale),
-            QPointF(center_x, center_y + 10 * scale),
-            QPointF(center_x, center_y + 15 * scale)
-        )
-        # 右側の半円の下部
-        heart_path.cubicTo(
-            QPointF(center_x, center_y + 10 * scale),
-            QPointF(center_x + 12 * scale, center_y + 2 * scale),
-            QPointF(center_x + 12 * scale, center_y - 5 * scale)
-        )
-        # 右側の半円
-        heart_path.cubicTo(
-            QPointF(center_x + 12 * scale, center_y - 12 * scale),
-            QPointF(center_x, center_y - 12 * scale),
-            QPointF(center_x, center_y - 5 * scale)
-        )
-        
-        heart_path.closeSubpath()
-        
-        # 赤で塗りつぶし、濃い赤の縁取り
-        painter.setBrush(QBrush(QColor(255, 50, 80)))  # 明るい赤
-        painter.setPen(QPen(QColor(200, 20, 50), 2))  # 濃い赤の縁
-        painter.drawPath(heart_path)
-        
-        painter.end()
-        
-        return pixmap
-
     def _compute_single_viewport(self):
         """シングル表示の available_width / available_height を計算する。"""
         total_width = self.width()
@@ -2926,67 +3256,175 @@ class ImageViewer(QMainWindow):
     def show_image_single(self):
         """シングル表示モード（従来の1枚表示）
 
-        プリフェッチキャッシュにヒットすれば Pillow による decode/resize を
-        スキップしてバイト列から QImage を直接構築する。
+        プリフェッチキャッシュ（別サイズの流用を含む）にヒットすればそのまま描画する。
+        ミス時はプレースホルダーを出してワーカーにデコードを依頼し、
+        image_ready で差し替える（GUI スレッドではデコードしない）。
         """
         if not self.images:
             return
         image_path = self.images[self.current_image_index]
+        for player in self._grid_players:
+            player.stop()
+        if self._zoom_active:
+            # ズーム表示中は画像全体をデコードせず、タイルビューに切り替え先を渡すだけ
+            self._single_player.stop()
+            self.zoom_view.open(image_path)
+            self.update_window_title()
+            return
         available_width, available_height = self._compute_single_viewport()
+        key = (image_path, available_width, available_height)
+        # アニメーションなら 2 フレーム目以降を流し込む（静止画・同じ画像の再表示では何もしない）
+        if self._nav_scrubbing:
+            self._single_player.stop()
+        else:
+            self._single_player.play(image_path, available_width, available_height)
 
-        try:
-            qimage = self._image_prefetcher.get_cached(image_path, available_width, available_height)
-            if qimage is None:
-                # キャッシュミス: メインスレッドでデコード（QImageReader 優先 / Pillow フォールバック）
-                qimage = ImagePrefetcher.decode_scaled(image_path, available_width, available_height)
-                if qimage is None:
-                    qimage = ImagePrefetcher.decode_scaled_with_pillow(image_path, available_width, available_height)
-                if qimage is None:
-                    raise RuntimeError("画像のデコードに失敗")
-                self._image_prefetcher.put_cache(
-                    image_path, available_width, available_height, qimage
-                )
-
-            new_width = qimage.width()
-            new_height = qimage.height()
-
-            # 表示領域サイズの透明なキャンバスを作成し、中央に画像を貼る
-            canvas = QPixmap(available_width, available_height)
-            canvas.fill(Qt.transparent)
-            painter = QPainter(canvas)
-            image_x = (available_width - new_width) // 2
-            image_y = (available_height - new_height) // 2
-            image_pixmap = QPixmap.fromImage(qimage)
-            painter.drawPixmap(image_x, image_y, image_pixmap)
-            painter.end()
-
-            # ハートなしキャンバスとジオメトリを保存（オーバーレイ再描画用）
-            self._last_single_canvas = canvas.copy()
-            self._last_single_image_geom = (image_x, image_y, new_width, new_height)
-
-            # お気に入りの場合はハートを表示（画像の左下を基準）
-            if self.tag_manager:
-                try:
-                    is_favorite = self._get_favorite(image_path)
-                    if is_favorite:
-                        canvas = self.draw_favorite_heart_on_canvas(
-                            canvas, heart_size=25,
-                            image_x=image_x, image_y=image_y,
-                            image_width=new_width, image_height=new_height
-                        )
-                except Exception as e:
-                    print(f"Failed to check favorite status: {e}")
+        # 別サイズのキャッシュがあれば縮小して使う（正確なサイズは裏でデコード）
+        qimage = self._image_prefetcher.get_cached(
+            image_path, available_width, available_height, allow_nearest=True
+        )
+        if qimage is None:
+            self._awaiting_single = key
+            # 同じ画像を別サイズで表示中（リサイズ後）なら、届くまでそれを拡大縮小して見せておく
+            if not (self.single_label.hasImage() and self._single_paint_target
+                    and self._single_paint_target[0] == image_path):
+                self.single_label.setText("読み込み中…")
+            # 先に低解像度プレビュー（preview_ready）、続けて本デコード（image_ready）が届く
+            self._image_prefetcher.request(
+                image_path, available_width, available_height, PRIORITY_VISIBLE, with_preview=True
+            )
+        else:
+            # 縮小流用だった場合は正確なサイズの完成を待って差し替える
+            exact = self._image_prefetcher.contains(image_path, available_width, available_height)
+            self._awaiting_single = None if exact else key
+            self._paint_single(image_path, qimage, available_width, available_height)
 
-            # ピクセル単位で正確に表示
-            self.single_label.setPixmap(canvas)
-            self.update_window_title()
+        self.update_window_title()
 
-            # 次/前の画像をバックグラウンドでプリフェッチ
+        # 次/前の画像をバックグラウンドでプリフェッチ（長押し中は通り過ぎるので省く）
+        if not self._nav_scrubbing:
             self._prefetch_neighbors_single(available_width, available_height)
+            self._check_displayed_stat()
 
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Failed to display image {image_path}.")
-            print(f"Failed to load image {image_path}: {e}")
+    def _check_displayed_stat(self):
+        """表示中の画像を stat し、一覧の日付と違っていたら一覧・並び順・インデックスを直す。
+
+        その場での書き換え（お気に入りの EXIF 書き込み、上書き保存等）はディレクトリの
+        mtime を変えないので、フォルダのスキャンやインデックスでは分からない。
+        フォルダ全体を stat し直す代わりに、表示した 1 枚だけをここで確かめる。
+        """
+        index = self.current_image_index
+        image_path = self.images[index]
+        old_mtime, old_ctime = self.images.stat_at(index)
+        if old_mtime != old_mtime:
+            return  # 日付をまだ持っていない（比べる相手が無い）
+        try:
+            st = os.stat(image_path)
+        except OSError:
+            return  # 消えた画像はフォルダ監視の差分で一覧から外れる
+        if st.st_mtime == old_mtime and st.st_ctime == old_ctime:
+            return
+        self.images.set_stat_at(index, st.st_mtime, st.st_ctime)
+        folder_index = get_folder_index()
+        if folder_index is not None:
+            folder_index.update_entries(
+                os.path.dirname(image_path),
+                {os.path.basename(image_path): (st.st_size, st.st_mtime, st.st_ctime)},
+            )
+        if st.st_mtime != old_mtime and self._folder_scan_worker is None:
+            self._start_sort_key_worker()  # 画像サイズ・シード等も読み直す（読み込み中なら完了時に始まる）
+        if self.sort_order[0] in DATE_SORT_TYPES:
+            self._merge_images([])  # 表示中の画像を保ったまま並べ直す
+
+    def _paint_single(self, image_path, qimage, available_width, available_height):
+        """デコード済みの QImage をシングル表示に渡す（中央寄せ・ハートはキャンバス側で描画）。"""
+        self._single_paint_target = (image_path, available_width, available_height)
+        if not self._single_player.is_playing():
+            self.single_label.setImage(qimage)
+        self.single_label.setFavorite(self._is_favorite_safe(image_path))
+
+    def _stop_animations(self):
+        """再生中のアニメーションをすべて止める（画像リストが空になった時など）。"""
+        self._single_player.stop()
+        for player in self._grid_players:
+            player.stop()
+
+    def _is_favorite_safe(self, image_path):
+        """ハート表示用のお気に入り判定（タグシステム無効・エラー時は False）。"""
+        if not self.tag_manager:
+            return False
+        try:
+            return bool(self._get_favorite(image_path))
+        except Exception:
+            logger.exception("お気に入り状態の確認に失敗しました: %s", image_path)
+            return False
+
+    def _on_prefetch_image_ready(self, image_path, target_w, target_h, qimage):
+        """ワーカーのデコード完了通知。表示待ちのキーと一致した場合だけ差し替える。
+
+        一致しなければ（既に別の画像へ移動済み・サイズが変わった等）何もしない。
+        """
+        key = (image_path, target_w, target_h)
+        if self.display_mode == 'single':
+            if key == self._awaiting_single:
+                self._awaiting_single = None
+                self._paint_single(image_path, qimage, target_w, target_h)
+        else:
+            for i, awaited in enumerate(self._awaiting_grid):
+                if awaited == key:
+                    self._awaiting_grid[i] = None
+                    self._paint_grid_cell(i, image_path, qimage, target_w, target_h)
+            self._note_grid_fill_progress()
+
+    def _note_grid_fill_progress(self):
+        """待ちセルが全て埋まったら、揃うまでにかかった時間を記録する。"""
+        if self._grid_fill_started is not None and not any(self._awaiting_grid):
+            self._last_grid_fill_ms = (time.perf_counter() - self._grid_fill_started) * 1000
+            self._grid_fill_started = None
+
+    def _on_prefetch_preview_ready(self, image_path, target_w, target_h, qimage):
+        """低解像度プレビューの到着通知。まだ何も描けていない表示待ちの枠にだけ貼る。"""
+        key = (image_path, target_w, target_h)
+        if self.display_mode == 'single':
+            if key == self._awaiting_single and not self.single_label.hasImage():
+                self._paint_single(image_path, qimage, target_w, target_h)
+        else:
+            for i, awaited in enumerate(self._awaiting_grid):
+                if awaited == key and not self.grid_labels[i].hasImage():
+                    self._paint_grid_cell(i, image_path, qimage, target_w, target_h)
+
+    def _on_prefetch_image_failed(self, image_path, target_w, target_h):
+        key = (image_path, target_w, target_h)
+        if self.display_mode == 'single':
+            if key == self._awaiting_single:
+                self._awaiting_single = None
+                logger.warning("画像を読み込めませんでした: %s", image_path)
+                # 縮小流用で表示できている場合は差し替えを諦めるだけ。
+                # 長押し中等で既に別の画像へ進んでいたら何も出さない（モーダルは出さない）
+                current = self.images[self.current_image_index] if self.images else None
+                if image_path == current and not self.single_label.hasImage():
+                    self.single_label.setText("読み込みエラー")
+                    self.show_message(f"⚠ 画像を表示できませんでした: {os.path.basename(image_path)}", duration=3000)
+        else:
+            for i, awaited in enumerate(self._awaiting_grid):
+                if awaited == key:
+                    self._awaiting_grid[i] = None
+                    if not self.grid_labels[i].hasImage():
+                        self.grid_labels[i].setText("読み込み\nエラー")
+                    logger.warning("グリッドの画像を読み込めませんでした: %s", image_path)
+            self._note_grid_fill_progress()
+
+    def _plan_prefetch(self, target_w, target_h, cells=1):
+        """PrefetchPlanner に現在の計測値を渡して (offset, priority) の一覧を得る。"""
+        folder = os.path.dirname(self.images[self.current_image_index]) if self.images else ""
+        slideshow_interval = self.timer.interval() / 1000 if self.timer.isActive() else None
+        return self._prefetch_planner.plan(
+            self._image_prefetcher.decode_latency(folder),
+            slideshow_interval=slideshow_interval,
+            image_bytes=target_w * target_h * 4,
+            budget_bytes=self._image_prefetcher.max_bytes(),
+            cells=cells,
+        )
 
     def _prefetch_neighbors_single(self, target_w, target_h):
         """シングル表示の現在 index の前後を非同期プリフェッチする。"""
@@ -2995,10 +3433,16 @@ class ImageViewer(QMainWindow):
         n = len(self.images)
         if n <= 1:
             return
-        # 直後 → 直前 → 2 つ先（スライドショー方向に厚く）
-        for offset in (1, -1, 2):
+        # 直後 → 直前 → さらに先（進行方向・深さはプランナー任せ）
+        # サイドバーを開いていればプロンプト欄用のメタデータも一緒に読んでおく
+        with_metadata = self.sidebar_visible
+        for offset, priority in self._plan_prefetch(target_w, target_h):
+            if offset % n == 0:
+                continue
             idx = (self.current_image_index + offset) % n
-            self._image_prefetcher.request(self.images[idx], target_w, target_h)
+            self._image_prefetcher.request(
+                self.images[idx], target_w, target_h, priority, with_metadata=with_metadata
+            )
 
     def show_image_grid(self):
         """4分割グリッド表示モード"""
@@ -3016,141 +3460,123 @@ class ImageViewer(QMainWindow):
                 (max(1, label_size.width() - 10), max(1, label_size.height() - 10))
             )
 
+        # 表示中 4 セルを最優先でワーカーへ投げておく。キャッシュに無いセルは
+        # 以下のループでプレースホルダーを出し、完成した順に image_ready で差し替える。
         for i, img_index in enumerate(indices):
             if 0 <= img_index < len(self.images):
-                try:
-                    image_path = self.images[img_index]
-                    target_w, target_h = cell_targets[i]
-
-                    # プリフェッチキャッシュ参照（ヒット時は decode/resize スキップ）
-                    qimage = self._image_prefetcher.get_cached(image_path, target_w, target_h)
-                    if qimage is None:
-                        qimage = ImagePrefetcher.decode_scaled(image_path, target_w, target_h)
-                        if qimage is None:
-                            qimage = ImagePrefetcher.decode_scaled_with_pillow(image_path, target_w, target_h)
-                        if qimage is None:
-                            raise RuntimeError("decode 失敗")
-                        self._image_prefetcher.put_cache(image_path, target_w, target_h, qimage)
-
-                    pixmap = QPixmap.fromImage(qimage)
-
-                    # ハートなしピクセルマップを保存（オーバーレイ再描画用）
-                    self._last_grid_pixmaps[i] = pixmap.copy()
-
-                    # お気に入りの場合はハートを表示（グリッドでは小さめのハート）
-                    if self.tag_manager:
-                        try:
-                            is_favorite = self._get_favorite(image_path)
-                            if is_favorite:
-                                pixmap = self.draw_favorite_heart(pixmap, heart_size=15)
-                        except Exception as e:
-                            print(f"Failed to check favorite status: {e}")
-                    
-                    # 選択されたグリッドには赤い境界線、その他は通常の境界線
-                    # selected_grid が -1 の場合はどのグリッドも選択されていない
-                    if self.selected_grid != -1 and i == self.selected_grid:
-                        self.grid_labels[i].setStyleSheet("border: 3px solid #4ea1ff;")
-                    else:
-                        self.grid_labels[i].setStyleSheet("border: 1px solid #3d3d44;")
-                    
-                    self.grid_labels[i].setPixmap(pixmap)
-                    
-                except Exception as e:
-                    self.grid_labels[i].setText("読み込み\nエラー")
-                    print(f"Failed to load grid image {image_path}: {e}")
-                    # オーバーレイ再描画キャッシュを無効化（古い画像を再表示しないため）
-                    self._last_grid_pixmaps[i] = None
-                    
-                    # エラー時も選択状態に応じて境界線を設定
-                    if self.selected_grid != -1 and i == self.selected_grid:
-                        self.grid_labels[i].setStyleSheet("border: 3px solid #4ea1ff;")
-                    else:
-                        self.grid_labels[i].setStyleSheet("border: 1px solid #3d3d44;")
+                target_w, target_h = cell_targets[i]
+                self._image_prefetcher.request(
+                    self.images[img_index], target_w, target_h, PRIORITY_VISIBLE,
+                    use_thumbnail=True, with_preview=True
+                )
+
+        self._single_player.stop()
+        self._grid_fill_started = None
+        for i, img_index in enumerate(indices):
+            self._set_grid_cell_border(i)
+            if 0 <= img_index < len(self.images):
+                image_path = self.images[img_index]
+                target_w, target_h = cell_targets[i]
+                key = (image_path, target_w, target_h)
+                if self._nav_scrubbing:
+                    self._grid_players[i].stop()
+                else:
+                    self._grid_players[i].play(image_path, target_w, target_h)
+
+                # プリフェッチキャッシュ参照（ヒット時は decode/resize スキップ）
+                qimage = self._image_prefetcher.get_cached(
+                    image_path, target_w, target_h, allow_nearest=True, use_thumbnail=True
+                )
+                if qimage is None:
+                    # ミス: プレースホルダーを出し、上で投げた要求の完成を待つ
+                    self._awaiting_grid[i] = key
+                    if self._grid_fill_started is None:
+                        self._grid_fill_started = time.perf_counter()
+                    painted = self._grid_paint_targets[i]
+                    if not (self.grid_labels[i].hasImage() and painted and painted[0] == image_path):
+                        self.grid_labels[i].setText("読み込み中…")
+                else:
+                    exact = self._image_prefetcher.contains(image_path, target_w, target_h)
+                    self._awaiting_grid[i] = None if exact else key
+                    self._paint_grid_cell(i, image_path, qimage, target_w, target_h)
             else:
-                self.grid_labels[i].clear()
+                self._awaiting_grid[i] = None
+                self._grid_players[i].stop()
                 self.grid_labels[i].setText("画像なし")
-                # オーバーレイ再描画キャッシュを無効化
-                self._last_grid_pixmaps[i] = None
-                
-                # 画像がない場合も選択状態に応じて境界線を設定
-                if self.selected_grid != -1 and i == self.selected_grid:
-                    self.grid_labels[i].setStyleSheet("border: 3px solid #4ea1ff;")
-                else:
-                    self.grid_labels[i].setStyleSheet("border: 1px solid #3d3d44;")
 
         self.update_window_title()
 
-        # 4セルの次位置をバックグラウンドでプリフェッチ
-        self._prefetch_neighbors_grid(cell_targets)
+        # 4セルの次位置をバックグラウンドでプリフェッチ（長押し中は通り過ぎるので省く）
+        if not self._nav_scrubbing:
+            self._prefetch_neighbors_grid(cell_targets)
+
+    def _set_grid_cell_border(self, i):
+        """選択されたグリッドには青い境界線、その他は通常の境界線
+
+        selected_grid が -1 の場合はどのグリッドも選択されていない
+        """
+        self.grid_labels[i].setSelected(self.selected_grid != -1 and i == self.selected_grid)
+
+    def _paint_grid_cell(self, i, image_path, qimage, target_w, target_h):
+        """デコード済みの QImage（target_w x target_h 向け）をグリッドのセル i に表示する。"""
+        self._grid_paint_targets[i] = (image_path, target_w, target_h)
+        if not self._grid_players[i].is_playing():
+            self.grid_labels[i].setImage(qimage)
+        # お気に入りの場合はハートを表示（グリッドでは小さめのハート）
+        self.grid_labels[i].setFavorite(self._is_favorite_safe(image_path))
 
     def _prefetch_neighbors_grid(self, cell_targets):
         """グリッド表示の各セルで次の位置の画像を非同期プリフェッチする。"""
-        if not self.images or not getattr(self, 'grid_indices', None):
+        if not self.images or not getattr(self, 'grid_orders', None):
             return
         n = len(self.images)
         if n <= 1:
             return
+        # セルはほぼ同じサイズなので計画は 1 つで共有する
+        plan = self._plan_prefetch(*cell_targets[0], cells=4)
         for i in range(4):
-            grid_array = self.grid_indices[i] if i < len(self.grid_indices) else None
-            if not grid_array:
+            order = self.grid_orders[i] if i < len(self.grid_orders) else None
+            if not order:
                 continue
             target_w, target_h = cell_targets[i]
-            # 次・前・2つ先（各セル独立）を投げる
-            for offset in (1, -1, 2):
-                pos = (self.grid_positions[i] + offset) % len(grid_array)
-                idx = grid_array[pos]
-                if 0 <= idx < n:
-                    self._image_prefetcher.request(self.images[idx], target_w, target_h)
+            # 次・前・さらに先（各セル独立）を投げる
+            for offset, priority in plan:
+                if offset % len(order) == 0:
+                    continue
+                idx = order.index_at(order.step(self.grid_positions[i], offset))
+                if idx is not None and 0 <= idx < n:
+                    self._image_prefetcher.request(
+                        self.images[idx], target_w, target_h, priority, use_thumbnail=True
+                    )
 
     def _refresh_favorite_overlay_only(self):
-        """Pillow デコードなしでハートアイコンの表示だけを更新する軽量メソッド。
+        """デコードなしでハートアイコンの表示だけを更新する軽量メソッド。
 
         show_image() のフルリロードを避けるためにお気に入りトグル時に呼ぶ。
-        _last_single_canvas / _last_grid_pixmaps が未初期化の場合は何もしない（初回は show_image() 経由で描画される）。
+        ハートはキャンバス側のオーバーレイなので、フラグを切り替えて再描画させるだけでよい。
         """
+        if not self.images:
+            return
         if self.display_mode == 'single':
-            if self._last_single_canvas is None or self._last_single_image_geom is None:
-                return
-            if not self.images:
-                return
             image_path = self.images[self.current_image_index]
-            is_favorite = self._get_favorite(image_path)
-            canvas = self._last_single_canvas.copy()
-            if is_favorite:
-                image_x, image_y, new_width, new_height = self._last_single_image_geom
-                canvas = self.draw_favorite_heart_on_canvas(
-                    canvas, heart_size=25,
-                    image_x=image_x, image_y=image_y,
-                    image_width=new_width, image_height=new_height
-                )
-            self.single_label.setPixmap(canvas)
+            self.single_label.setFavorite(self._is_favorite_safe(image_path))
         else:
             indices = self.calculate_grid_indices()
             for i, img_index in enumerate(indices):
-                base = self._last_grid_pixmaps[i] if i < len(self._last_grid_pixmaps) else None
-                if base is None:
-                    continue
                 if not (0 <= img_index < len(self.images)):
                     continue
-                image_path = self.images[img_index]
-                is_favorite = self._get_favorite(image_path)
-                pixmap = base.copy()
-                if is_favorite:
-                    pixmap = self.draw_favorite_heart(pixmap, heart_size=15)
-                self.grid_labels[i].setPixmap(pixmap)
+                self.grid_labels[i].setFavorite(self._is_favorite_safe(self.images[img_index]))
 
     def calculate_grid_indices(self):
         """グリッド表示用の4つの画像インデックスを計算（独立ランダム配列使用）"""
-        if not self.images or not self.grid_indices[0]:
+        if not self.images or not self.grid_orders[0]:
             return [0, 0, 0, 0]
         
         indices = []
         for i in range(4):
             # 各グリッドの現在位置から画像インデックスを取得
-            grid_array = self.grid_indices[i]
-            position = self.grid_positions[i] % len(grid_array)
-            actual_image_index = grid_array[position]
-            indices.append(actual_image_index)
+            actual_image_index = self.grid_orders[i].index_at(self.grid_positions[i])
+            indices.append(actual_image_index if actual_image_index is not None else 0)
         
         return indices
 
@@ -3160,15 +3586,13 @@ class ImageViewer(QMainWindow):
             folder_name = os.path.basename(os.path.dirname(self.images[self.current_image_index]))
             order_type, is_ascending = self.sort_order
             order_type_str = {
-                'random': 'ランダム',
-                'date_modified': '変更日順',
-                'date_added': '追加日順',
-                'date_created': '作成日順',
-                'name': '名前順'
+                value: name for name, value in SORT_TYPES.items()
             }.get(order_type, '不明な順番')
             order_direction = '昇順' if is_ascending else '降順'
             
             mode_str = "シングル" if self.display_mode == 'single' else "4分割"
+            if self.display_mode == 'single' and self._zoom_active:
+                mode_str = "ズーム"
             
             self.setWindowTitle(f"KabaViewer - {folder_name} - {self.current_image_index + 1}/{len(self.images)} - {order_type_str} ({order_direction}) - {mode_str}モード")
 
@@ -3176,14 +3600,14 @@ class ImageViewer(QMainWindow):
         """グリッドの選択状態を解除し、境界線を未選択状態に戻す。
 
         show_image() を呼ばないパス（お気に入りトグルなど）でも視覚状態を
-        リセットできるよう、ここで明示的にスタイルシートを戻す。
+        リセットできるよう、ここで明示的に選択枠を外す。
         show_image() が後から呼ばれる場合でも、境界線は再描画されるだけで害はない。
         """
         if self.selected_grid == -1:
             return
         self.selected_grid = -1
         for label in self.grid_labels:
-            label.setStyleSheet("border: 1px solid #3d3d44;")
+            label.setSelected(False)
 
     def grid_label_clicked(self, grid_index):
         """グリッド内の画像がクリックされた時の処理（トグル動作）"""
@@ -3209,6 +3633,7 @@ class ImageViewer(QMainWindow):
         """表示モードを切り替える（シングル ⇔ 4分割）"""
         if self.display_mode == 'single':
             self.display_mode = 'grid'
+            self.set_zoom_mode(False)
             self.single_label.setVisible(False)
             self.grid_widget.setVisible(True)
         else:
@@ -3227,6 +3652,7 @@ class ImageViewer(QMainWindow):
                 self.single_label.setVisible(True)
                 self.grid_widget.setVisible(False)
             else:
+                self.set_zoom_mode(False)
                 self.single_label.setVisible(False)
                 self.grid_widget.setVisible(True)
             
@@ -3238,45 +3664,99 @@ class ImageViewer(QMainWindow):
             self.show_image()
             self.show_message(f"{'4分割' if mode == 'grid' else 'シングル'}モードに切り替え")
 
-    def next_image(self):
-        if self.display_mode == 'single':
-            # シングルモードでは従来通り
-            self.current_image_index = (self.current_image_index + 1) % len(self.images)
+    def toggle_zoom_mode(self):
+        """ズーム表示（タイル表示）のオン・オフを切り替える（シングル表示のみ）"""
+        if self.display_mode != 'single' or not self.images:
+            self.set_zoom_mode(False)  # メニューのチェックを元に戻す
+            self.show_message("ズーム表示はシングル表示で使えます")
+            return
+        self.set_zoom_mode(not self._zoom_active)
+        self.update_window_title()
+        if self._zoom_active:
+            self.show_message("🔍 ズーム表示: ホイールで拡大縮小、ドラッグで移動、ダブルクリックで等倍/全体（Z で戻る）")
         else:
-            # グリッドモードでは4つのグリッドが独立して次へ進む
-            for i in range(4):
-                if self.grid_indices[i]:
-                    self.grid_positions[i] = (self.grid_positions[i] + 1) % len(self.grid_indices[i])
-            # スライドで選択中グリッドの中身が変わるため選択を解除
-            self._clear_grid_selection()
+            self.show_message("ズーム表示を終了しました")
+
+    def set_zoom_mode(self, active):
+        """ズーム表示の状態を設定し、表示ウィジェットを入れ替える"""
+        active = bool(active)
+        if hasattr(self, 'zoom_action'):
+            self.zoom_action.setChecked(active)
+        if active == self._zoom_active:
+            return
+        self._zoom_active = active
+        self.single_label.setVisible(not active)
+        self.zoom_view.setVisible(active)
+        if active:
+            self.show_image()
+        else:
+            # タイルキャッシュを手放し、通常表示を現在のサイズで描き直す
+            self.zoom_view.close_image()
+            if self.display_mode == 'single':
+                self.show_image()
 
+    def next_image(self):
+        self._step_images(1)
         self.show_image()
 
     def previous_image(self):
+        self._step_images(-1)
+        self.show_image()
+
+    def _step_images(self, delta):
+        """表示位置を delta（1 か -1）だけ進める。描画はしない。"""
+        self._prefetch_planner.record_navigation(delta)
         if self.display_mode == 'single':
             # シングルモードでは従来通り
-            self.current_image_index = (self.current_image_index - 1) % len(self.images)
+            self.current_image_index = (self.current_image_index + delta) % len(self.images)
         else:
-            # グリッドモードでは4つのグリッドが独立して前へ戻る
+            # グリッドモードでは4つのグリッドが独立して進む・戻る
             for i in range(4):
-                if self.grid_indices[i]:
-                    self.grid_positions[i] = (self.grid_positions[i] - 1) % len(self.grid_indices[i])
+                if self.grid_orders[i]:
+                    self.grid_positions[i] = self.grid_orders[i].step(self.grid_positions[i], delta)
             # スライドで選択中グリッドの中身が変わるため選択を解除
             self._clear_grid_selection()
 
+    def _scrub_images(self, delta):
+        """キーのオートリピート分。位置だけ進め、描画は次のフレームでまとめて 1 回行う。"""
+        if not self.images:
+            return
+        self._step_images(delta)
+        self._nav_scrubbing = True
+        self._nav_settle_timer.start()
+        if not self._nav_render_timer.isActive():
+            self._nav_render_timer.start()
+
+    def _finish_navigation_scrub(self):
+        """長押しが終わったら、最後の画像を先読み・サイドバー更新込みで描画し直す。"""
+        if not self._nav_scrubbing:
+            return
+        self._nav_scrubbing = False
+        self._nav_render_timer.stop()
+        self._nav_settle_timer.stop()
         self.show_image()
 
     def keyPressEvent(self, event):
-        if event.key() == Qt.Key_Right:
-            self.next_image()
-        elif event.key() == Qt.Key_Left:
-            self.previous_image()
+        if event.key() in (Qt.Key_Right, Qt.Key_Left):
+            delta = 1 if event.key() == Qt.Key_Right else -1
+            if event.isAutoRepeat():
+                self._scrub_images(delta)
+            else:
+                self._nav_scrubbing = False
+                self._nav_render_timer.stop()
+                self._nav_settle_timer.stop()
+                self._step_images(delta)
+                self.show_image()
         elif event.key() == Qt.Key_G:
             # Gキーで表示モード切り替え
             self.toggle_display_mode()
         elif event.key() == Qt.Key_Tab:
             # Tabキーで表示モード切り替え
             self.toggle_display_mode()
+        elif event.key() == Qt.Key_Z:
+            # Zキーでズーム表示（タイル表示）切り替え
+            if self.tabs.currentWidget() == self.image_tab:
+                self.toggle_zoom_mode()
         elif event.key() == Qt.Key_R:
             # Rキーで独立グリッドを再シャッフル
             if self.display_mode == 'grid':
@@ -3303,6 +3783,11 @@ class ImageViewer(QMainWindow):
             if self.tabs.currentWidget() == self.image_tab and TAG_SYSTEM_AVAILABLE and self.tag_manager:
                 self.show_auto_tag_dialog()
 
+    def keyReleaseEvent(self, event):
+        if event.key() in (Qt.Key_Right, Qt.Key_Left) and not event.isAutoRepeat():
+            self._finish_navigation_scrub()
+        super().keyReleaseEvent(event)
+
     def start_slideshow(self):
         self.timer.start((self.combo_box.currentIndex() + 1) * 1000)  # コンボボックスの値を秒単位に変換
         self.is_running = True
@@ -3344,13 +3829,7 @@ class ImageViewer(QMainWindow):
             order_menu = context_menu.addMenu('並び順')
 
             # 並び順のタイプを選択するサブメニューとアクションを追加
-            sort_types = {
-                'ランダム': 'random',
-                '変更日順': 'date_modified',
-                '追加日順': 'date_added',
-                '作成日順': 'date_created',
-                '名前順': 'name'
-            }
+            sort_types = SORT_TYPES
 
             self.sort_actions = {}
             for sort_type_name, sort_type_value in sort_types.items():
@@ -3403,6 +3882,13 @@ class ImageViewer(QMainWindow):
             single_action.triggered.connect(lambda: self.set_display_mode('single'))
             grid_action.triggered.connect(lambda: self.set_display_mode('grid'))
 
+            if self.display_mode == 'single':
+                display_menu.addSeparator()
+                zoom_action = display_menu.addAction("🔍 ズーム表示 (Z)")
+                zoom_action.setCheckable(True)
+                zoom_action.setChecked(self._zoom_active)
+                zoom_action.triggered.connect(lambda checked: self.toggle_zoom_mode())
+
             # 4分割モードの時のみシャッフル機能を追加
             if self.display_mode == 'grid':
                 shuffle_action = context_menu.addAction("グリッドを再シャッフル")
@@ -3482,48 +3968,22 @@ class ImageViewer(QMainWindow):
             QMessageBox.warning(self, "エラー", "フォルダが選択されていません。")
             return
 
-        # 各フォルダから画像を集めて 1 つのリストに統合
-        combined = []
-        empty_folders = []
-        for folder in selected_folders:
-            files = self._get_image_files_from_folder(folder)
-            if files:
-                combined.extend(files)
-            else:
-                empty_folders.append(folder)
-
-        if not combined:
-            QMessageBox.warning(self, "エラー", "選択されたフォルダに画像が見つかりませんでした。")
-            return
-
-        # 説明文（ウィンドウタイトルやメッセージ用）
+        # 説明文（ウィンドウタイトルやメッセージ用。枚数はタイトルに出る）
         if len(selected_folders) == 1:
             description = f"複数フォルダ表示: {os.path.basename(selected_folders[0])}"
         else:
-            description = f"複数フォルダ表示: {len(selected_folders)} フォルダ / {len(combined)} 枚"
+            description = f"複数フォルダ表示: {len(selected_folders)} フォルダ"
 
-        try:
-            # filter_query=None で履歴・登録リストには載らない
-            self.load_filtered_images(combined, description=description, filter_query=None)
-        except Exception as e:
-            QMessageBox.warning(self, "エラー", f"画像の読み込みに失敗しました: {e}")
-            return
-
-        # 一部フォルダが空だった場合は通知だけしておく
-        if empty_folders:
-            names = "\n".join(f"• {os.path.basename(p)}" for p in empty_folders)
-            self.show_message(f"⚠ 画像が無いフォルダをスキップ: {len(empty_folders)} 件", duration=3000)
-            print(f"[select_multiple_folders_instant] 画像のないフォルダ:\n{names}")
+        # 各フォルダを並列に列挙し、見つかった順に表示する（重複は除く）
+        self.tabs.setCurrentWidget(self.image_tab)
+        self.load_folders_instant(selected_folders, description)
 
     def select_folder(self):
         folder_path = QFileDialog.getExistingDirectory(self, "フォルダを選択")
         if folder_path:
+            # 画像が無かった場合は列挙後に _on_folder_scan_finished が知らせて選び直させる
             try:
                 self.load_images(folder_path)
-            except ValueError as e:
-                # 画像が見つからない場合などのエラー
-                QMessageBox.warning(self, "エラー", f"選択されたフォルダに画像が見つかりませんでした:\n{folder_path}\n別のフォルダを選択してください。")
-                self.select_folder()  # 再度選択を促す
             except Exception as e:
                 # その他の読み込みエラー
                 QMessageBox.warning(self, "エラー", f"フォルダの読み込み中にエラーが発生しました:\n{str(e)}")
@@ -3549,6 +4009,13 @@ class ImageViewer(QMainWindow):
         zip_images_action.setEnabled(False)  # 初期状態では無効
         self.zip_images_action = zip_images_action  # 後で有効/無効を切り替えるために保存
 
+        # フォルダ監視（新着・削除を開いている一覧に自動反映）
+        watch_folder_action = file_menu.addAction('👁️ フォルダを監視（新着を自動追加）')
+        watch_folder_action.setCheckable(True)
+        watch_folder_action.setChecked(self._watch_enabled)
+        watch_folder_action.triggered.connect(self.set_watch_folder_enabled)
+        self.watch_folder_action = watch_folder_action
+
         # 区切り線 + 環境設定
         file_menu.addSeparator()
         # ⚙️ は VS-16 でフォント化け事例があるため代替絵文字を使用
@@ -3586,13 +4053,7 @@ class ImageViewer(QMainWindow):
         order_menu = show_menu.addMenu('並び順')
 
         # 並び順のタイプを選択するサブメニューとアクションを追加
-        sort_types = {
-            'ランダム': 'random',
-            '変更日順': 'date_modified',
-            '追加日順': 'date_added',
-            '作成日順': 'date_created',
-            '名前順': 'name'
-        }
+        sort_types = SORT_TYPES
 
         self.sort_actions = {}
         for sort_type_name, sort_type_value in sort_types.items():
@@ -3627,9 +4088,15 @@ class ImageViewer(QMainWindow):
         grid_display_action.setCheckable(True)
         grid_display_action.triggered.connect(lambda: self.set_display_mode('grid'))
         
+        display_mode_menu.addSeparator()
+        zoom_action = display_mode_menu.addAction('🔍 ズーム表示 (Z)')
+        zoom_action.setCheckable(True)
+        zoom_action.triggered.connect(lambda checked: self.toggle_zoom_mode())
+
         # 表示モードアクションをインスタンス変数として保存（状態管理用）
         self.single_display_action = single_display_action
         self.grid_display_action = grid_display_action
+        self.zoom_action = zoom_action
 
         # "スライド" サブメニューを作成
         slide_menu = show_menu.addMenu('スライド')
@@ -3716,12 +4183,19 @@ class ImageViewer(QMainWindow):
         about_action.triggered.connect(self.show_about_dialog)
         help_menu.addAction(about_action)
 
+        cache_stats_action = QAction('📊 キャッシュ統計', self)
+        cache_stats_action.setToolTip('画像キャッシュの使用量・ヒット率・破棄件数を表示')
+        cache_stats_action.triggered.connect(self.show_cache_stats_dialog)
+        help_menu.addAction(cache_stats_action)
+
     def show_settings_dialog(self):
         """環境設定ダイアログを開く。テーマメニューと同期する。"""
         from settings_dialog import SettingsDialog
-        from theme import load_theme_name
+        from theme import load_theme_name, load_prefetch_cache_mb
         dlg = SettingsDialog(self)
         if dlg.exec_() == QDialog.Accepted:
+            # キャッシュ上限の変更を即反映（縮小時はその場で LRU 追い出し）
+            self._image_prefetcher.set_max_bytes(load_prefetch_cache_mb() * 1024 * 1024)
             # メニューのチェック状態を新しいテーマに同期
             current = load_theme_name()
             if hasattr(self, 'theme_dark_action'):
@@ -3768,6 +4242,35 @@ class ImageViewer(QMainWindow):
         )
         QMessageBox.about(self, title, text)
 
+    def show_cache_stats_dialog(self):
+        """画像プリフェッチキャッシュの統計を表示するダイアログ"""
+        stats = self._image_prefetcher.cache_stats()
+        lookups = stats['hits'] + stats['misses']
+        hit_rate = (stats['hits'] * 100.0 / lookups) if lookups else 0.0
+        mb = 1024 * 1024
+        text = (
+            f"使用量: {stats['bytes'] / mb:.1f} MB / {stats['max_bytes'] / mb:.0f} MB\n"
+            f"保持枚数: {stats['entries']} 枚\n"
+            f"ヒット: {stats['hits']} 回 / ミス: {stats['misses']} 回（ヒット率 {hit_rate:.1f}%）\n"
+            f"別サイズから縮小して流用: {stats['near_hits']} 回\n"
+            f"破棄: {stats['evictions']} 件\n"
+            f"デコードワーカー: {stats['workers']} 本 / 重複排除: {stats['deduped']} 件\n"
+            f"世代切れで省略したデコード: {stats['cancelled']} 件"
+        )
+        if self.images:
+            folder = os.path.dirname(self.images[self.current_image_index])
+            latency = self._image_prefetcher.decode_latency(folder)
+            plan = self._plan_prefetch(*self._compute_single_viewport())
+            ahead = sum(1 for offset, _ in plan if offset * self._prefetch_planner.direction() > 0)
+            latency_text = f"{latency * 1000:.0f} ms" if latency is not None else "未計測"
+            text += (
+                f"\n\n現在のフォルダのデコード時間（平均）: {latency_text}\n"
+                f"先読み: 進行方向に {ahead} 枚 / 逆方向に {len(plan) - ahead} 枚"
+            )
+        if self._last_grid_fill_ms is not None:
+            text += f"\n4分割の全セル表示までの時間（直近）: {self._last_grid_fill_ms:.0f} ms"
+        QMessageBox.information(self, "キャッシュ統計", text)
+
     def add_current_folder_to_favorites(self):
         if not hasattr(self, 'list_mode'):
             QMessageBox.warning(self, "エラー", "まだ画像リストが読み込まれていません。")
@@ -3857,31 +4360,59 @@ class ImageViewer(QMainWindow):
                                      f'本当に {os.path.basename(current_image_path)} を削除しますか？',
                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
         if reply == QMessageBox.Yes:
-            try:
-                os.remove(current_image_path)  # 画像ファイルを削除
-                del self.images[self.current_image_index]  # リストから削除
-
-                if self.images:
-                    # 画像リストが残っている場合は次の画像を表示
-                    self.current_image_index %= len(self.images)
-                    # グリッドシステムを再初期化（削除された画像を反映）
-                    self.initialize_grid_system()
-                    # 削除でグリッド内容が変わるため選択状態は解除
-                    self._clear_grid_selection()
-                    self.show_image()
-                else:
-                    # 画像リストが空になった場合はラベルをクリア
-                    self.single_label.clear()
-                    # グリッドラベルもクリア
-                    for label in self.grid_labels:
-                        label.clear()
-                        label.setText("画像なし")
-                        label.setStyleSheet("border: 1px solid #3d3d44;")
-                    
-                    self.selected_grid = -1  # 選択状態をリセット
-                    QMessageBox.information(self, '情報', 'すべての画像が削除されました。')
-            except Exception as e:
-                QMessageBox.warning(self, 'エラー', f'画像を削除できませんでした: {e}')
+            # 一覧から外して次の画像を表示し、ファイルはワーカーでゴミ箱へ移す
+            self._pending_deletes.add(current_image_path)
+            self._image_deleter.enqueue(current_image_path)
+            del self.images[self.current_image_index]  # リストから削除
+
+            if self.images:
+                # 画像リストが残っている場合は次の画像を表示
+                # グリッドの順序から外す（他のセルの並びと位置はそのまま）
+                self._remove_grid_index(self.current_image_index)
+                self._normalize_grid_positions()
+                self.current_image_index %= len(self.images)
+                # 削除でグリッド内容が変わるため選択状態は解除
+                self._clear_grid_selection()
+                self.show_image()
+            else:
+                # 画像リストが空になった場合はラベルをクリア
+                self._stop_animations()
+                self.single_label.clear()
+                # グリッドラベルもクリア
+                for label in self.grid_labels:
+                    label.setText("画像なし")
+                    label.setSelected(False)
+
+                self.selected_grid = -1  # 選択状態をリセット
+                QMessageBox.information(self, '情報', 'すべての画像が削除されました。')
+
+    def _on_image_delete_finished(self, file_path):
+        self._pending_deletes.discard(file_path)
+        if self._favorite_cache.pop(file_path, None) and TAG_SYSTEM_AVAILABLE and self.favorites_tab:
+            # お気に入りだった画像はお気に入りタブからも消す
+            self.favorites_tab.update_favorites_list()
+
+    def _on_image_delete_failed(self, file_path, error_message, not_trashed):
+        """ゴミ箱に移せなかった画像は完全に削除するか確認し、消さない・消せない画像は一覧に戻す。"""
+        if not_trashed and os.path.exists(file_path):
+            reply = QMessageBox.question(
+                self, 'ゴミ箱に移動できません',
+                f'{os.path.basename(file_path)} をゴミ箱に移動できませんでした。\n'
+                '完全に削除しますか？（元に戻せません）',
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if reply == QMessageBox.Yes:
+                self._image_deleter.enqueue(file_path, permanent=True)
+                return
+        else:
+            QMessageBox.warning(self, 'エラー', f'画像を削除できませんでした: {error_message}')
+        self._pending_deletes.discard(file_path)
+        if os.path.exists(file_path) and file_path not in self.images and (
+                self.list_mode != "folder" or os.path.dirname(file_path) == self.current_folder):
+            was_empty = not self.images
+            self._merge_images([file_path])
+            if was_empty:
+                self.show_image()
+            self.update_window_title()
 ##
 # 移動メニュー関連
 ##
@@ -3936,33 +4467,33 @@ class ImageViewer(QMainWindow):
         super().resizeEvent(event)
         
         # 画像表示を更新（サイズ変更に対応）
-        if hasattr(self, 'images') and self.images and hasattr(self, 'display_mode'):
-            # 少し遅延させて画像を再表示（連続的なリサイズに対する最適化）
-            if hasattr(self, 'resize_timer'):
-                self.resize_timer.stop()
-            self.resize_timer = QTimer()
-            self.resize_timer.setSingleShot(True)
-            self.resize_timer.timeout.connect(self.show_image)
-            self.resize_timer.start(100)  # 100ms後に画像を再表示
-        
-        # ウィンドウサイズ変更時にジオメトリを保存（タイマーで少し遅延）
-        if hasattr(self, 'geometry_timer'):
-            self.geometry_timer.stop()
-        self.geometry_timer = QTimer()
-        self.geometry_timer.setSingleShot(True)
-        self.geometry_timer.timeout.connect(self.save_window_geometry)
-        self.geometry_timer.start(500)  # 500ms後に保存
+        if self.images:
+            # リサイズ中は今の画像を拡大縮小して描くだけにし、止まってから新しいサイズで描き直す
+            self._preview_resize()
+            self.resize_timer.start()
+        
+        # ウィンドウサイズ変更時にジオメトリを保存（止まってから 500ms 後）
+        self.geometry_timer.start()
+
+    def _preview_resize(self):
+        """表示中の画像を、デコードし直さずに新しい表示領域へ合わせた倍率で描く。"""
+        if self.display_mode == 'single':
+            if self._single_paint_target is not None and not self._zoom_active:
+                available_width, available_height = self._compute_single_viewport()
+                _, painted_w, painted_h = self._single_paint_target
+                self.single_label.setDisplayScale(min(available_width / painted_w, available_height / painted_h))
+        else:
+            for label, target in zip(self.grid_labels, self._grid_paint_targets):
+                if target is not None:
+                    size = label.size()
+                    scale = min(max(1, size.width() - 10) / target[1], max(1, size.height() - 10) / target[2])
+                    label.setDisplayScale(scale)
     
     def moveEvent(self, event):
         """ウィンドウ移動時の処理"""
         super().moveEvent(event)
-        # ウィンドウ位置変更時にジオメトリを保存（タイマーで少し遅延）
-        if hasattr(self, 'geometry_timer'):
-            self.geometry_timer.stop()
-        self.geometry_timer = QTimer()
-        self.geometry_timer.setSingleShot(True)
-        self.geometry_timer.timeout.connect(self.save_window_geometry)
-        self.geometry_timer.start(500)  # 500ms後に保存
+        # ウィンドウ位置変更時にジオメトリを保存（止まってから 500ms 後）
+        self.geometry_timer.start()
     
     def save_window_geometry(self):
         """ウィンドウのジオメトリ（サイズと位置）を設定に保存"""
@@ -4062,10 +4593,25 @@ class ImageViewer(QMainWindow):
             self._tag_writer.stop()
             self._tag_writer.wait()
 
-        # 画像プリフェッチャを停止（キャッシュは破棄）
+        # ImageDeleteWorker はキューに残った削除を済ませてから終了する
+        if self._image_deleter.isRunning():
+            self._image_deleter.stop()
+            self._image_deleter.wait()
+
+        # 画像プリフェッチャ（全デコードワーカー）を停止（キャッシュは破棄）
         if getattr(self, '_image_prefetcher', None) is not None and self._image_prefetcher.isRunning():
             self._image_prefetcher.stop()
             self._image_prefetcher.wait()
+        shutdown_thumbnail_cache()
+        # フォルダスキャンを中断して終了を待つ
+        self._cancel_folder_scan()
+        for worker in list(self._scan_workers):
+            worker.wait()
+        # ズーム表示のタイルデコードワーカーを停止
+        self.zoom_view.stop()
+        # アニメーションのフレームデコードワーカーを停止
+        for player in [self._single_player] + self._grid_players:
+            player.shutdown()
 
         # お気に入りリスナーを解除（複数インスタンス生成時の重複通知・参照リークを防ぐ）
         if self.tag_manager is not None:
@@ -4344,7 +4890,7 @@ class ImageViewer(QMainWindow):
         
         try:
             # 新しい状態は UI キャッシュを反転して算出（フォルダ読込時に
-            # tag_manager.get_favorite_map() で全画像分を bulk 取得済み）。
+            # tag_manager.get_favorite_paths() で全画像分を bulk 取得済み）。
             current = bool(self._favorite_cache.get(image_path, False))
             new_state = not current
 
@@ -4441,9 +4987,9 @@ class ImageViewer(QMainWindow):
             return
         
         try:
-            # 現在の画像リストを自動タグ付けダイアログに渡す
+            # 現在の画像リストの写しを渡す（ワーカースレッドが読む間も一覧は追加・削除される）
             show_auto_tag_dialog(
-                self.images,
+                list(self.images),
                 self.get_exif_data,  # メタデータ取得用メソッドを渡す
                 self.tag_manager,
                 self
@@ -4703,6 +5249,10 @@ class ImageViewer(QMainWindow):
                     worker.wait(50)
                 worker.stop()
                 worker.wait()
+        # 画像削除ワーカーは止めず、キューに残った削除（タグ DB の後始末を含む）だけ済ませる
+        while self._image_deleter.pending_count() > 0:
+            QApplication.processEvents()
+            self._image_deleter.wait(50)
 
     def _dump_settings_to_dict(self):
         """QSettings から復元可能な dict を作る。"""
@@ -0,0 +1,210 @@
+"""サイドバー用の画像メタデータキャッシュ。
+
+サイドバーは画像を切り替えるたびに PNG のテキストチャンク / EXIF を読み、
+プロンプトを解析し直していた。2 枚を行き来するだけでも毎回ファイルを開くので、
+
+- 直近 MEMORY_ENTRIES 件は読んだままの形（MetadataEntry）でメモリに持つ（LRU）
+- 解析結果は ~/.kabaviewer/metadata_cache.db にも保存し、次回起動後も
+  ファイルを開かずに済ませる
+
+どちらも (path, mtime, size) が一致したときだけヒットとする（タグの書き込み等で
+ファイルが変わったら読み直す）。ディスクに保存するのは表示に使う部分だけで、
+AI_ / Meta_ の生データ（ComfyUI のワークフロー JSON など大きいもの）は
+解析済みのプロンプト・パラメータ・LoRA で代わりにし、保存しない。
+保存件数が MAX_ENTRIES を超えたら、起動時に古いものから削除する。
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+
+logger = logging.getLogger(__name__)
+
+
+_DEFAULT_DIR = os.path.expanduser("~/.kabaviewer")
+_DB_NAME = "metadata_cache.db"
+
+SCHEMA_VERSION = 2
+
+MEMORY_ENTRIES = 128
+MAX_ENTRIES = 100000
+
+# metadata: get_exif_data の結果（ディスクから戻した場合は EXIF 部分のみ）
+# parsed: ExifInfoDialog.parse_metadata_statically の結果
+# loras: [{name, weight, hash}, ...]
+MetadataEntry = namedtuple("MetadataEntry", ["metadata", "parsed", "loras"])
+
+
+def _db_path():
+    return os.path.join(_DEFAULT_DIR, _DB_NAME)
+
+
+def file_stamp(image_path):
+    """キャッシュの有効性を判定する (mtime, size)。ファイルが無ければ None。"""
+    try:
+        st = os.stat(image_path)
+    except OSError:
+        return None
+    return st.st_mtime, st.st_size
+
+
+def format_exif_value(value, max_length=100):
+    """EXIF の値の表示用文字列（サイドバー・EXIF ダイアログ・全てコピーで共通）。バイト列は長さだけ示す。"""
+    if isinstance(value, bytes):
+        return f"<バイナリデータ ({len(value)} bytes)>"
+    return str(value)[:max_length]
+
+
+def _json_value(value):
+    """EXIF の値を JSON に載る形にする（バイト列は format_exif_value と同じ表示文字列にする）。"""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, bytes):
+        return format_exif_value(value)
+    return str(value)
+
+
+def _encode(entry):
+    exif = [
+        [key, _json_value(value)]
+        for key, value in entry.metadata.items()
+        if not str(key).startswith(("AI_", "Meta_"))
+    ]
+    return json.dumps({"exif": exif, "parsed": entry.parsed, "loras": entry.loras}, ensure_ascii=False)
+
+
+def _decode(data):
+    obj = json.loads(data)
+    return MetadataEntry(dict(obj["exif"]), obj["parsed"], obj["loras"])
+
+
+class MetadataCache:
+    """画像メタデータの LRU + SQLite キャッシュ（GUI スレッドとプリフェッチのワーカーから呼ばれる）。"""
+
+    def __init__(self, path=None, memory_entries=MEMORY_ENTRIES):
+        os.makedirs(_DEFAULT_DIR, exist_ok=True)
+        self.db_path = path or _db_path()
+        self._memory = OrderedDict()  # path -> (stamp, MetadataEntry)
+        self._memory_entries = memory_entries
+        self._lock = threading.Lock()
+        # スレッドごとに connection を保持（sqlite3 はデフォルトでスレッド共有 NG）
+        self._local = threading.local()
+        self._init_schema()
+
+    # ---------- DB ----------
+
+    def _conn(self):
+        c = getattr(self._local, "conn", None)
+        if c is None:
+            c = sqlite3.connect(self.db_path)
+            # 消えても作り直せるキャッシュなので丈夫さよりスピード優先
+            c.execute("PRAGMA journal_mode=WAL")
+            c.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = c
+        return c
+
+    def close_thread_connection(self):
+        """呼び出し元スレッドの connection を閉じる（使い捨てワーカーの終了時）。"""
+        c = getattr(self._local, "conn", None)
+        if c is not None:
+            c.close()
+            self._local.conn = None
+
+    def _init_schema(self):
+        c = self._conn()
+        current = c.execute("PRAGMA user_version").fetchone()[0]
+        if current < 1:
+            c.execute(
+                """
+                CREATE TABLE IF NOT EXISTS metadata (
+                    path      TEXT PRIMARY KEY,
+                    mtime     REAL NOT NULL,
+                    size      INTEGER NOT NULL,
+                    data      TEXT NOT NULL,
+                    cached_at REAL NOT NULL
+                )
+                """
+            )
+            c.execute("CREATE INDEX IF NOT EXISTS idx_metadata_cached_at ON metadata(cached_at)")
+        elif current < 2:
+            # v1 はバイト列の値を別の文言で保存していた。捨てて読み直させる
+            c.execute("DELETE FROM metadata")
+        c.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        c.execute(
+            "DELETE FROM metadata WHERE path IN "
+            "(SELECT path FROM metadata ORDER BY cached_at DESC LIMIT -1 OFFSET ?)",
+            (MAX_ENTRIES,),
+        )
+        c.commit()
+
+    # ---------- API ----------
+
+    def get(self, image_path, stamp):
+        """stamp（file_stamp の結果）が保存時と同じなら MetadataEntry、それ以外は None。"""
+        with self._lock:
+            cached = self._memory.get(image_path)
+            if cached is not None and cached[0] == stamp:
+                self._memory.move_to_end(image_path)
+                return cached[1]
+        try:
+            row = self._conn().execute(
+                "SELECT mtime, size, data FROM metadata WHERE path = ?", (image_path,)
+            ).fetchone()
+            if row is None or (row[0], row[1]) != stamp:
+                return None
+            entry = _decode(row[2])
+        except (sqlite3.Error, ValueError, KeyError, TypeError):
+            logger.exception("メタデータキャッシュの読み込みに失敗: %s", image_path)
+            return None
+        self._remember(image_path, stamp, entry)
+        return entry
+
+    def put(self, image_path, stamp, entry):
+        """読み込んだ MetadataEntry をメモリとディスクに保存する。"""
+        self._remember(image_path, stamp, entry)
+        try:
+            c = self._conn()
+            with c:
+                c.execute(
+                    "INSERT OR REPLACE INTO metadata (path, mtime, size, data, cached_at) VALUES (?, ?, ?, ?, ?)",
+                    (image_path, stamp[0], stamp[1], _encode(entry), time.time()),
+                )
+        except (sqlite3.Error, TypeError, ValueError):
+            logger.exception("メタデータキャッシュの保存に失敗: %s", image_path)
+
+    def load(self, image_path, reader):
+        """キャッシュにあればそれを、無ければ reader(image_path) で読んで保存して返す。"""
+        stamp = file_stamp(image_path)
+        if stamp is None:
+            return reader(image_path)
+        entry = self.get(image_path, stamp)
+        if entry is None:
+            entry = reader(image_path)
+            self.put(image_path, stamp, entry)
+        return entry
+
+    def _remember(self, image_path, stamp, entry):
+        with self._lock:
+            self._memory[image_path] = (stamp, entry)
+            self._memory.move_to_end(image_path)
+            while len(self._memory) > self._memory_entries:
+                self._memory.popitem(last=False)
+
+
+_shared = None
+
+
+def get_metadata_cache():
+    """アプリ全体で共有する MetadataCache を返す。開けない場合は None（毎回ファイルを読む）。"""
+    global _shared
+    if _shared is None:
+        try:
+            _shared = MetadataCache()
+        except (OSError, sqlite3.Error):
+            logger.exception("メタデータキャッシュを開けませんでした")
+            return None
+    return _shared
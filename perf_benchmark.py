@@ -0,0 +1,201 @@
+"""表示まわりの処理速度を比べる開発用ベンチマーク。
+
+Usage:
+    python perf_benchmark.py pillow-decode [--size 1920x1080] [--repeat 3] PATH...
+    python perf_benchmark.py image-list [--count 200000] [--folders 20] [PATH...]
+
+PATH にはファイルかフォルダを指定する（フォルダは直下の画像をすべて使う）。
+
+pillow-decode:
+    ImagePrefetcher.decode_scaled_with_pillow（draft + reduce）と、
+    従来のフル解像度デコード + LANCZOS の経路を同じ画像で比べる。
+
+image-list:
+    画像一覧 1 枚あたりのメモリを、従来の持ち方（パス str の list と
+    {path: (mtime, ctime)}・{path: bool} の dict）と ImageList で比べる。
+    PATH を省略すると --count 枚・--folders フォルダ分の架空のパスで測る。
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import tracemalloc
+
+from PIL import Image
+from PyQt5.QtGui import QImage
+
+from image_prefetcher import ImagePrefetcher
+from image_list import ImageList
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp')
+
+
+def collect_images(paths):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    files.append(os.path.join(path, name))
+        elif os.path.isfile(path):
+            files.append(path)
+    return files
+
+
+def parse_size(text):
+    w, _, h = text.lower().partition("x")
+    return int(w), int(h)
+
+
+def legacy_pillow_decode(image_path, target_w, target_h):
+    """比較用: 変更前の decode_scaled_with_pillow と同じ処理。"""
+    with Image.open(image_path) as img:
+        image_ratio = img.width / img.height
+        window_ratio = target_w / target_h
+        if window_ratio > image_ratio:
+            new_h = target_h
+            new_w = max(1, int(target_h * image_ratio))
+        else:
+            new_w = target_w
+            new_h = max(1, int(target_w / image_ratio))
+        resized = img.resize((new_w, new_h), Image.LANCZOS)
+        rgba = resized.convert("RGBA")
+        data = rgba.tobytes("raw", "RGBA")
+    return QImage(data, new_w, new_h, QImage.Format_RGBA8888).copy()
+
+
+def time_decoder(decoder, files, target_w, target_h, repeat):
+    """画像ごとに repeat 回デコードし、各画像の最速値（ms）のリストを返す。"""
+    results = []
+    for path in files:
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            qimage = decoder(path, target_w, target_h)
+            elapsed = (time.perf_counter() - started) * 1000
+            if qimage is None or qimage.isNull():
+                break
+            best = elapsed if best is None else min(best, elapsed)
+        if best is not None:
+            results.append(best)
+    return results
+
+
+def run_pillow_decode(args):
+    files = collect_images(args.paths)
+    if not files:
+        print("画像が見つかりません", file=sys.stderr)
+        return 1
+    target_w, target_h = parse_size(args.size)
+    print(f"{len(files)} 枚 / 表示サイズ {target_w}x{target_h} / 各 {args.repeat} 回の最速値")
+
+    rows = [
+        ("従来 (フルデコード + LANCZOS)", legacy_pillow_decode),
+        ("draft + reduce", ImagePrefetcher.decode_scaled_with_pillow),
+    ]
+    baseline = None
+    for label, decoder in rows:
+        times = time_decoder(decoder, files, target_w, target_h, args.repeat)
+        if not times:
+            print(f"{label}: デコードできた画像がありません")
+            continue
+        total = sum(times)
+        line = (
+            f"{label}: 合計 {total:.1f} ms / 中央値 {statistics.median(times):.1f} ms"
+            f" / 最大 {max(times):.1f} ms"
+        )
+        if baseline is None:
+            baseline = total
+        elif total > 0:
+            line += f"（{baseline / total:.1f} 倍速）"
+        print(line)
+    return 0
+
+
+def synthetic_paths(count, folders):
+    """AI 生成画像フォルダによくある長さのパスを count 件作る。"""
+    roots = [f"/Volumes/NAS/StableDiffusion/outputs/txt2img-images/2026-{i // 28 + 1:02d}-{i % 28 + 1:02d}/"
+             for i in range(folders)]
+    return [f"{roots[i % folders]}{i:05d}-1234567890-masterpiece, best quality.png" for i in range(count)]
+
+
+def measure_bytes(build):
+    """build() が返したオブジェクトを保持している間に増えたメモリ（バイト）と作成時間（ms）。
+
+    tracemalloc 中は確保が遅くなるので、時間は計測なしでもう 1 回作って測る。
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del obj
+    started = time.perf_counter()
+    build()
+    elapsed = (time.perf_counter() - started) * 1000
+    return size, elapsed
+
+
+def run_image_list(args):
+    if args.paths:
+        source = collect_images(args.paths)
+    else:
+        source = synthetic_paths(args.count, args.folders)
+    if not source:
+        print("画像が見つかりません", file=sys.stderr)
+        return 1
+    # 元の str は計測に含めない（スキャナーが渡すバッチは一覧に入れたあと捨てられる）
+    encoded = [p.encode("utf-8", "surrogateescape") for p in source]
+    stats = {p: (1.7e9, 1.7e9) for p in source}
+    del source
+
+    def build_list():
+        paths = [b.decode("utf-8", "surrogateescape") for b in encoded]
+        return paths, {p: stats[p] for p in paths}, dict.fromkeys(paths, False)
+
+    def build_image_list():
+        paths = (b.decode("utf-8", "surrogateescape") for b in encoded)
+        return ImageList(paths, stats)
+
+    count = len(encoded)
+    print(f"{count} 枚")
+    rows = [
+        ("従来 (list[str] + stat dict + お気に入り dict)", build_list),
+        ("ImageList", build_image_list),
+    ]
+    baseline = None
+    for label, build in rows:
+        size, elapsed = measure_bytes(build)
+        line = f"{label}: {size / 1024 / 1024:.1f} MB / 1 枚あたり {size / count:.0f} バイト / 作成 {elapsed:.0f} ms"
+        if baseline is None:
+            baseline = size
+        elif size > 0:
+            line += f"（{baseline / size:.1f} 分の 1）"
+        print(line)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="KabaViewer の処理速度ベンチマーク")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("pillow-decode", help="Pillow フォールバックのデコード速度を比較")
+    p.add_argument("paths", nargs="+", help="画像ファイルまたはフォルダ")
+    p.add_argument("--size", default="1920x1080", help="表示サイズ（例: 1920x1080）")
+    p.add_argument("--repeat", type=int, default=3, help="1 枚あたりの試行回数")
+    p.set_defaults(func=run_pillow_decode)
+
+    p = sub.add_parser("image-list", help="画像一覧 1 枚あたりのメモリを比較")
+    p.add_argument("paths", nargs="*", help="画像ファイルまたはフォルダ（省略時は架空のパス）")
+    p.add_argument("--count", type=int, default=200000, help="架空のパスの件数")
+    p.add_argument("--folders", type=int, default=20, help="架空のパスのフォルダ数")
+    p.set_defaults(func=run_image_list)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
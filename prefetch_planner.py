@@ -0,0 +1,91 @@
+"""先読みする範囲（方向と枚数）を決めるプランナー。
+
+固定の (1, -1, 2) ではなく、次の入力から「進行方向に何枚・逆方向に何枚」を決める。
+
+- フォルダごとのデコード所要時間（ImagePrefetcher.decode_latency の移動平均）
+- スライドショーの間隔（停止中は直近の手動送りの間隔）
+- 直近の送り方向（← が続いていれば逆向きに先読みする）
+
+1 枚を表示している間にデコードが終わらない（NAS 等の遅いフォルダ）ほど深く、
+ローカル SSD のように速いフォルダでは浅く読む。枚数はキャッシュ予算の一定割合に
+収まるよう上限をかけ、先読みが表示中の画像を追い出さないようにする。
+"""
+
+import math
+import time
+import collections
+
+from image_prefetcher import PRIORITY_NEXT, PRIORITY_NEIGHBOR
+
+
+class PrefetchPlanner:
+    """送り操作の履歴を覚えておき、先読みするオフセットと優先度の一覧を返す。"""
+
+    DEFAULT_AHEAD = 2      # 計測値が揃うまでは従来どおり「次・2 つ先」
+    MAX_AHEAD = 8
+    BEHIND = 1             # 逆方向は 1 枚だけ（← 1 回ですぐ戻れるように）
+
+    # 先読みに使ってよいキャッシュ予算の割合（残りは表示中・直前の画像用）
+    BUDGET_SHARE = 0.5
+
+    _HISTORY = 8           # 送り方向の判定に使う直近の操作数
+    _NAV_EMA_ALPHA = 0.3
+    _NAV_IDLE_SECONDS = 30.0  # これ以上間が空いた操作は間隔の計測に使わない
+
+    def __init__(self):
+        self._directions = collections.deque(maxlen=self._HISTORY)
+        self._last_nav_time = None
+        self._nav_interval = None  # 手動送りの間隔（秒）の移動平均
+
+    def record_navigation(self, step):
+        """次へ（+1）/ 前へ（-1）の操作を記録する。"""
+        now = time.monotonic()
+        if self._last_nav_time is not None:
+            elapsed = now - self._last_nav_time
+            if elapsed < self._NAV_IDLE_SECONDS:
+                if self._nav_interval is None:
+                    self._nav_interval = elapsed
+                else:
+                    self._nav_interval += self._NAV_EMA_ALPHA * (elapsed - self._nav_interval)
+        self._last_nav_time = now
+        self._directions.append(1 if step >= 0 else -1)
+
+    def direction(self):
+        """直近の送り方向。← の方が多ければ -1、それ以外は +1。"""
+        return -1 if sum(self._directions) < 0 else 1
+
+    def depth(self, decode_latency, slideshow_interval=None, image_bytes=0, budget_bytes=0, cells=1):
+        """(進行方向の枚数, 逆方向の枚数) を返す。
+
+        decode_latency: 1 枚のデコード時間（秒）。未計測なら None
+        slideshow_interval: スライドショー再生中ならその間隔（秒）、停止中は None
+        image_bytes / budget_bytes: 1 枚あたりのデコード後サイズとキャッシュ予算（上限計算用）
+        cells: 同時に表示している枚数（4分割なら 4）
+        """
+        interval = slideshow_interval or self._nav_interval
+        if decode_latency is None or not interval:
+            ahead = self.DEFAULT_AHEAD
+        else:
+            # 1 枚を表示している間に終わるデコードが 1 枚未満なら、その分だけ先まで読む
+            ahead = math.ceil(decode_latency / interval)
+        ahead = max(1, min(self.MAX_AHEAD, ahead))
+        behind = self.BEHIND
+
+        if image_bytes > 0 and budget_bytes > 0:
+            max_items = int(budget_bytes * self.BUDGET_SHARE // (image_bytes * max(1, cells)))
+            max_items = max(1, max_items)
+            ahead = min(ahead, max_items)
+            behind = min(behind, max_items - ahead)
+        return ahead, behind
+
+    def plan(self, decode_latency, slideshow_interval=None, image_bytes=0, budget_bytes=0, cells=1):
+        """先読みする (offset, priority) の一覧を処理してほしい順に返す。
+
+        直後 → 直前 → さらに先、の順（進行方向が ← なら符号が反転する）。
+        """
+        ahead, behind = self.depth(decode_latency, slideshow_interval, image_bytes, budget_bytes, cells)
+        direction = self.direction()
+        steps = [(direction, PRIORITY_NEXT)]
+        steps.extend((-direction * k, PRIORITY_NEIGHBOR) for k in range(1, behind + 1))
+        steps.extend((direction * k, PRIORITY_NEIGHBOR) for k in range(2, ahead + 1))
+        return steps
@@ -3,6 +3,7 @@
 - UI フォントサイズ
 - テーマ (ダーク / ライト)
 - アクセントカラー
+- 画像キャッシュのメモリ上限
 
 QApplication 起動後にメニュー「ファイル → ⚙️ 環境設定…」から開く想定。
 変更は即座に QApplication.styleSheet と setFont に反映される。
@@ -21,7 +22,8 @@ from theme import (
     load_accent_id, save_accent_id,
     load_font_pt, save_font_pt,
     load_write_exif, save_write_exif,
-    FONT_PT_RANGE, ACCENT_PRESETS,
+    load_prefetch_cache_mb, save_prefetch_cache_mb,
+    FONT_PT_RANGE, ACCENT_PRESETS, PREFETCH_CACHE_MB_RANGE,
 )
 
 
@@ -46,6 +48,7 @@ class SettingsDialog(QDialog):
         self._original_theme = load_theme_name()
         self._original_accent = load_accent_id()
         self._original_write_exif = load_write_exif()
+        self._original_prefetch_cache_mb = load_prefetch_cache_mb()
 
         self._build_ui()
         self._load_current_values()
@@ -123,6 +126,23 @@ class SettingsDialog(QDialog):
         tag_layout.addWidget(hint)
         root.addWidget(tag_group)
 
+        # ── 画像キャッシュ ──────────────────────────────────
+        cache_group = QGroupBox("画像キャッシュ")
+        cache_layout = QHBoxLayout(cache_group)
+        cache_layout.addWidget(QLabel("先読みキャッシュの上限"))
+        self.prefetch_cache_spin = QSpinBox()
+        lo, hi = PREFETCH_CACHE_MB_RANGE
+        self.prefetch_cache_spin.setRange(lo, hi)
+        self.prefetch_cache_spin.setSingleStep(64)
+        self.prefetch_cache_spin.setSuffix(" MB")
+        self.prefetch_cache_spin.setToolTip(
+            "デコード済み画像を保持するメモリの上限です。\n"
+            "超えた分は古い順に破棄されます（長時間スライドショーでも一定以上増えません）。"
+        )
+        cache_layout.addWidget(self.prefetch_cache_spin)
+        cache_layout.addStretch()
+        root.addWidget(cache_group)
+
         # 即時プレビュー: 変更を即 QApplication に反映
         self.theme_dark.toggled.connect(self._on_theme_changed)
         self.theme_light.toggled.connect(self._on_theme_changed)
@@ -169,6 +189,9 @@ class SettingsDialog(QDialog):
         # EXIF 書き込み
         self.write_exif_check.setChecked(self._original_write_exif)
 
+        # 画像キャッシュ
+        self.prefetch_cache_spin.setValue(self._original_prefetch_cache_mb)
+
     def _update_font_preview(self, pt):
         font = self.font_preview.font()
         font.setPointSize(pt)
@@ -222,6 +245,7 @@ class SettingsDialog(QDialog):
         save_theme_name("dark" if self.theme_dark.isChecked() else "light")
         save_accent_id(self.accent_combo.currentData() or "blue")
         save_write_exif(self.write_exif_check.isChecked())
+        save_prefetch_cache_mb(self.prefetch_cache_spin.value())
         self.accept()
 
     def _reject(self):
@@ -233,10 +257,11 @@ class SettingsDialog(QDialog):
         self.reject()
 
     def _reset_defaults(self):
-        """既定値（フォント 13pt / ダーク / ブルー / EXIF 書き込み ON）にセット。"""
+        """既定値（フォント 13pt / ダーク / ブルー / EXIF 書き込み ON / キャッシュ 512MB）にセット。"""
         self.font_spin.setValue(13)
         self.theme_dark.setChecked(True)
         idx = self.accent_combo.findData("blue")
         if idx >= 0:
             self.accent_combo.setCurrentIndex(idx)
         self.write_exif_check.setChecked(True)
+        self.prefetch_cache_spin.setValue(512)
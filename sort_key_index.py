@@ -0,0 +1,285 @@
+"""画像サイズ・シード・モデル順の並べ替えに使うキーのインデックス。
+
+これらの並び順は画像ファイルのヘッダーや PNG のテキストチャンク / EXIF の
+UserComment を読まないと決まらない。並び順を切り替えるたびに全ファイルを読むと
+10 万枚では数分かかるので、
+
+- フォルダを開いたあと（一覧が揃ってから）SortKeyWorker がバックグラウンドで
+  各画像のキーを集め、ImageList の列に書き込む
+- 読んだキーは ~/.kabaviewer/sort_keys.db に mtime と一緒に保存し、次回からは
+  mtime が同じならファイルを開かない
+
+として、並び順の切り替えはメモリ上のソートだけで済ませる。
+"""
+
+import os
+import re
+import json
+import math
+import time
+import sqlite3
+import logging
+import threading
+from collections import namedtuple
+
+from PIL import Image
+from PyQt5.QtCore import QThread, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+
+_DEFAULT_DIR = os.path.expanduser("~/.kabaviewer")
+_DB_NAME = "sort_keys.db"
+
+SCHEMA_VERSION = 1
+
+LOAD_CHUNK = 500      # 1 回の SELECT で引くパス数
+BATCH_INTERVAL = 2.0  # 秒。ファイルを読んで集めたキーをこの間隔でまとめて通知する
+
+# seed は不明なら None、model は不明なら ""
+SortKeys = namedtuple("SortKeys", ["width", "height", "seed", "model"])
+
+_SEED_RE = re.compile(r"(?:^|[,\n])\s*Seed:\s*(\d+)", re.IGNORECASE)
+_MODEL_RE = re.compile(r"(?:^|[,\n])\s*Model:\s*([^,\n]+)", re.IGNORECASE)
+_EXIF_IFD = 0x8769
+_USER_COMMENT = 0x9286
+_ORIENTATION = 0x0112
+
+
+def _db_path():
+    return os.path.join(_DEFAULT_DIR, _DB_NAME)
+
+
+def _decode_user_comment(raw):
+    if isinstance(raw, str):
+        return raw
+    if raw.startswith(b"UNICODE\x00"):
+        return raw[8:].decode("utf-16be", errors="ignore").rstrip("\x00")
+    if raw.startswith(b"ASCII\x00\x00\x00"):
+        return raw[8:].decode("ascii", errors="ignore")
+    return raw.decode("utf-8", errors="ignore")
+
+
+def _comfyui_params(prompt_json):
+    """ComfyUI の prompt（ノードの JSON）から最初のシードとチェックポイント名を拾う。"""
+    try:
+        nodes = json.loads(prompt_json)
+    except (TypeError, ValueError):
+        return None, ""
+    seed, model = None, ""
+    if not isinstance(nodes, dict):
+        return seed, model
+    for node in nodes.values():
+        inputs = node.get("inputs") if isinstance(node, dict) else None
+        if not isinstance(inputs, dict):
+            continue
+        if seed is None:
+            value = inputs.get("seed", inputs.get("noise_seed"))
+            if isinstance(value, int) and value >= 0:
+                seed = value
+        if not model and isinstance(inputs.get("ckpt_name"), str):
+            model = os.path.splitext(os.path.basename(inputs["ckpt_name"]))[0]
+    return seed, model
+
+
+def parse_generation_params(text):
+    """A1111 形式のパラメータ文字列から (seed, model) を取り出す。"""
+    if not text:
+        return None, ""
+    seed_match = _SEED_RE.search(text)
+    model_match = _MODEL_RE.search(text)
+    seed = int(seed_match.group(1)) if seed_match else None
+    model = model_match.group(1).strip() if model_match else ""
+    return seed, model
+
+
+def read_sort_keys(image_path):
+    """画像のヘッダーとメタデータだけを読んでキーを返す（画素はデコードしない）。"""
+    with Image.open(image_path) as img:
+        width, height = img.size
+        exif = img.getexif()
+        if exif.get(_ORIENTATION) in (5, 6, 7, 8):
+            width, height = height, width  # 表示上の向きで比べる
+        info = img.info or {}
+        text = info.get("parameters")
+        if not isinstance(text, str):
+            comment = exif.get_ifd(_EXIF_IFD).get(_USER_COMMENT)
+            text = _decode_user_comment(comment) if comment else None
+    seed, model = parse_generation_params(text)
+    if seed is None and not model and isinstance(info.get("prompt"), str):
+        seed, model = _comfyui_params(info["prompt"])
+    return SortKeys(width, height, seed, model)
+
+
+class SortKeyIndex:
+    """並べ替えキーの SQLite インデックス（SortKeyWorker から呼ばれる）。"""
+
+    def __init__(self, path=None):
+        os.makedirs(_DEFAULT_DIR, exist_ok=True)
+        self.db_path = path or _db_path()
+        # スレッドごとに connection を保持（sqlite3 はデフォルトでスレッド共有 NG）
+        self._local = threading.local()
+        self._init_schema()
+
+    # ---------- DB ----------
+
+    def _conn(self):
+        c = getattr(self._local, "conn", None)
+        if c is None:
+            c = sqlite3.connect(self.db_path)
+            # 消えても作り直せるインデックスなので丈夫さよりスピード優先
+            c.execute("PRAGMA journal_mode=WAL")
+            c.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = c
+        return c
+
+    def close_thread_connection(self):
+        """呼び出し元スレッドの connection を閉じる（使い捨てワーカーの終了時）。"""
+        c = getattr(self._local, "conn", None)
+        if c is not None:
+            c.close()
+            self._local.conn = None
+
+    def _init_schema(self):
+        c = self._conn()
+        current = c.execute("PRAGMA user_version").fetchone()[0]
+        if current < 1:
+            # seed は 64bit 符号なしまであるので文字列で持つ
+            c.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sort_keys (
+                    path   TEXT PRIMARY KEY,
+                    mtime  REAL NOT NULL,
+                    width  INTEGER NOT NULL,
+                    height INTEGER NOT NULL,
+                    seed   TEXT,
+                    model  TEXT NOT NULL
+                )
+                """
+            )
+        c.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        c.commit()
+
+    # ---------- API ----------
+
+    def load_many(self, items):
+        """[(path, mtime), ...] のうち、保存時と mtime が同じものの {path: SortKeys}。"""
+        result = {}
+        try:
+            c = self._conn()
+            for i in range(0, len(items), LOAD_CHUNK):
+                chunk = dict(items[i:i + LOAD_CHUNK])
+                placeholders = ",".join("?" * len(chunk))
+                rows = c.execute(
+                    f"SELECT path, mtime, width, height, seed, model FROM sort_keys WHERE path IN ({placeholders})",
+                    list(chunk),
+                )
+                for path, mtime, width, height, seed, model in rows:
+                    if chunk.get(path) == mtime:
+                        result[path] = SortKeys(width, height, int(seed) if seed is not None else None, model)
+        except sqlite3.Error:
+            logger.exception("並べ替えキーの読み込みに失敗")
+        return result
+
+    def save_many(self, entries):
+        """[(path, mtime, SortKeys), ...] を 1 トランザクションで保存する。"""
+        if not entries:
+            return
+        try:
+            c = self._conn()
+            with c:
+                c.executemany(
+                    "INSERT OR REPLACE INTO sort_keys (path, mtime, width, height, seed, model) VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (path, mtime, keys.width, keys.height,
+                         str(keys.seed) if keys.seed is not None else None, keys.model)
+                        for path, mtime, keys in entries
+                    ],
+                )
+        except sqlite3.Error:
+            logger.exception("並べ替えキーの保存に失敗")
+
+
+_shared = None
+
+
+def get_sort_key_index():
+    """アプリ全体で共有する SortKeyIndex を返す。開けない場合は None（毎回ファイルを読む）。"""
+    global _shared
+    if _shared is None:
+        try:
+            _shared = SortKeyIndex()
+        except (OSError, sqlite3.Error):
+            logger.exception("並べ替えキーのインデックスを開けませんでした")
+            return None
+    return _shared
+
+
+class SortKeyWorker(QThread):
+    """画像一覧の並べ替えキーを集めるワーカー。
+
+    items は [(path, mtime), ...]（mtime 不明は NaN。そのときは stat する）。
+    keys_found(generation, {path: SortKeys}): インデックスにあった分は最初にまとめて、
+    ファイルを読んだ分は BATCH_INTERVAL ごとに通知する。
+    keys_finished(generation): 全件終わった（中断時は出さない）。
+    """
+
+    keys_found = pyqtSignal(int, object)
+    keys_finished = pyqtSignal(int)
+
+    def __init__(self, items, generation, index=None, parent=None):
+        super().__init__(parent)
+        self._items = items
+        self._generation = generation
+        self._index = index
+        self._stop = False
+
+    def request_stop(self):
+        self._stop = True
+
+    def run(self):
+        try:
+            if self._collect():
+                self.keys_finished.emit(self._generation)
+        finally:
+            if self._index is not None:
+                self._index.close_thread_connection()
+
+    def _collect(self):
+        items = self._items
+        if self._index is not None:
+            known = self._index.load_many([(p, m) for p, m in items if not math.isnan(m)])
+            if known:
+                self.keys_found.emit(self._generation, known)
+            items = [(p, m) for p, m in items if p not in known]
+
+        found, writes = {}, []
+        last_flush = time.monotonic()
+        for path, mtime in items:
+            if self._stop:
+                if self._index is not None:
+                    self._index.save_many(writes)  # 読んだ分は次回に使う
+                return False
+            try:
+                if math.isnan(mtime):
+                    mtime = os.stat(path).st_mtime
+                keys = read_sort_keys(path)
+            except Exception:
+                # 壊れた画像・消えたファイルはキー無し（並び順では末尾）のまま
+                logger.debug("並べ替えキーを読めませんでした: %s", path, exc_info=True)
+                continue
+            found[path] = keys
+            writes.append((path, mtime, keys))
+            now = time.monotonic()
+            if now - last_flush >= BATCH_INTERVAL:
+                self._flush(found, writes)
+                found, writes = {}, []
+                last_flush = now
+        self._flush(found, writes)
+        return not self._stop
+
+    def _flush(self, found, writes):
+        if found:
+            self.keys_found.emit(self._generation, found)
+        if self._index is not None:
+            self._index.save_many(writes)
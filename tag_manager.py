@@ -849,15 +849,15 @@ class TagManager:
         new_status = not current_status
         return self.set_favorite_status_fast(file_path, new_status), new_status
 
-    def get_favorite_map(self, file_paths):
-        """複数ファイルパスのお気に入り状態を一括取得して dict で返す。
+    def get_favorite_paths(self, file_paths):
+        """複数ファイルパスのうちお気に入りのものを一括取得して set で返す。
 
-        DB に存在しないパスは False 扱い。500 件ずつ IN 句に分割してクエリを実行する。
+        含まれないパス（DB に無いものも含む）はお気に入りではない。500 件ずつ IN 句に分割してクエリを実行する。
         """
         if not file_paths:
-            return {}
+            return set()
 
-        result = {}
+        result = set()
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         chunk_size = 500
@@ -865,24 +865,41 @@ class TagManager:
             chunk = file_paths[i:i + chunk_size]
             placeholders = ",".join("?" * len(chunk))
             cursor.execute(f"""
-                SELECT file_path, is_favorite
+                SELECT file_path
                 FROM image_tags
                 WHERE file_path IN ({placeholders})
+                  AND is_favorite = 1
                   AND (file_path, updated_at) IN (
                       SELECT file_path, MAX(updated_at)
                       FROM image_tags
                       GROUP BY file_path
                   )
             """, chunk)
-            for row in cursor.fetchall():
-                result[row[0]] = bool(row[1])
+            result.update(row[0] for row in cursor.fetchall())
         conn.close()
-
-        for path in file_paths:
-            if path not in result:
-                result[path] = False
         return result
-    
+
+    def forget_files(self, file_paths):
+        """削除した画像のレコード（タグ・お気に入り）を SQLite から消す（ワーカースレッド用）。
+
+        QSettings のバックアップには触らない。削除した行数を返す。
+        """
+        if not file_paths:
+            return 0
+        deleted = 0
+        conn = sqlite3.connect(self.db_path)
+        try:
+            chunk_size = 500
+            for i in range(0, len(file_paths), chunk_size):
+                chunk = file_paths[i:i + chunk_size]
+                placeholders = ",".join("?" * len(chunk))
+                cursor = conn.execute(f"DELETE FROM image_tags WHERE file_path IN ({placeholders})", chunk)
+                deleted += cursor.rowcount
+            conn.commit()
+        finally:
+            conn.close()
+        return deleted
+
     def get_favorite_images(self):
         """お気に入り画像のリストを取得"""
         conn = sqlite3.connect(self.db_path)
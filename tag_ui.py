@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 
 import os
+import logging
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                              QLineEdit, QPushButton, QListWidget, QListWidgetItem,
                              QSplitter, QTextEdit, QCompleter, QMessageBox,
@@ -15,9 +16,96 @@ from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QThread, QStringListModel, QSet
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import threading
 import multiprocessing
-from PyQt5.QtGui import QFont, QPalette, QColor, QPixmap, QImage, QBrush
+from PyQt5.QtGui import QFont, QPalette, QColor, QPixmap, QBrush
 from tag_manager import TagManager, UNCLASSIFIED_GROUP
-from PIL import Image
+from thumbnail_cache import ThumbnailPreview, bucket_for, THUMBNAIL_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+
+def _preview_target_size(preview_label):
+    """プレビューラベルに収める表示サイズと、使うサムネイルの bucket を返す"""
+    label_width = preview_label.width() - 20  # マージンを考慮
+    label_height = preview_label.height() - 20
+    if label_width <= 50 or label_height <= 50:
+        label_width, label_height = 400, 300  # デフォルトサイズ
+    # 最大 bucket より大きなラベルは最大 bucket を引き伸ばして表示する
+    bucket = bucket_for(label_width, label_height) or THUMBNAIL_BUCKETS[-1]
+    return label_width, label_height, bucket
+
+
+class _ImagePreviewMixin:
+    """タグタブ・お気に入りタブ共通の画像プレビュー（preview_label / image_info_label に表示）。
+
+    __init__ で _init_image_preview() を呼ぶこと。_PREVIEW_ICON は情報欄のファイル名の頭に付く。
+    """
+
+    _PREVIEW_ICON = "📁"
+
+    def _init_image_preview(self):
+        self._preview = ThumbnailPreview(
+            self._show_preview_entry, self._show_preview_pending, self._show_preview_failed, parent=self
+        )
+
+    def show_image_preview(self, item):
+        """選択された画像のプレビューを表示"""
+        self._show_preview_path(item.data(Qt.UserRole))
+
+    def _show_preview_path(self, file_path):
+        """サムネイルキャッシュから表示。未生成なら生成を依頼して完成通知で表示し直す"""
+        self._preview.cancel()
+        if not file_path or not os.path.exists(file_path):
+            self.preview_label.setText("画像ファイルが見つかりません")
+            self.image_info_label.setText("")
+            return
+        _, _, bucket = _preview_target_size(self.preview_label)
+        self._preview.show(file_path, bucket)
+
+    def _show_preview_entry(self, file_path, entry):
+        try:
+            label_width, label_height, _ = _preview_target_size(self.preview_label)
+            # アスペクト比を保ったままスケール
+            scaled_pixmap = QPixmap.fromImage(entry.image.scaled(
+                label_width, label_height,
+                Qt.KeepAspectRatio,  # アスペクト比を保持
+                Qt.SmoothTransformation  # 高品質なスケーリング
+            ))
+            
+            # ロード済みフラグでスタイル切替（theme.py の [loaded="true"] セレクタ）
+            self.preview_label.setProperty("loaded", True)
+            self.preview_label.style().unpolish(self.preview_label)
+            self.preview_label.style().polish(self.preview_label)
+            self.preview_label.setPixmap(scaled_pixmap)
+            
+            # 画像情報を表示（元画像サイズはサムネイル生成時に記録済み）
+            file_name = os.path.basename(file_path)
+            file_size = os.path.getsize(file_path)
+            file_size_mb = file_size / (1024 * 1024)
+            
+            # タグ情報を取得
+            tags = self.tag_manager.get_tags(file_path)
+            tags_text = f"タグ: {', '.join(tags)}" if tags else "タグ: なし"
+            
+            info_text = f"""{self._PREVIEW_ICON} {file_name}
+📏 {entry.src_width} × {entry.src_height}
+💾 {file_size_mb:.1f} MB
+🏷️ {tags_text}"""
+            
+            self.image_info_label.setText(info_text)
+                
+        except Exception as e:
+            self.preview_label.setText(f"画像の読み込みに失敗しました\n{str(e)}")
+            self.image_info_label.setText("")
+            logger.exception("プレビューの表示に失敗: %s", file_path)
+
+    def _show_preview_pending(self, file_path):
+        self.preview_label.setPixmap(QPixmap())
+        self.preview_label.setText("プレビューを生成中…")
+
+    def _show_preview_failed(self, file_path):
+        self.preview_label.setText("画像の読み込みに失敗しました")
+        self.image_info_label.setText("")
+
 
 class MultiTagCompleter(QCompleter):
     """複数タグ入力に対応したカスタムCompleter
@@ -570,7 +658,7 @@ class TagEditDialog(QDialog):
         except Exception as e:
             QMessageBox.warning(self, "エラー", f"タグの保存に失敗しました: {str(e)}")
 
-class TagTab(QWidget):
+class TagTab(_ImagePreviewMixin, QWidget):
     """タグ管理タブ"""
     
     def __init__(self, tag_manager, viewer):
@@ -582,6 +670,7 @@ class TagTab(QWidget):
         self.current_exclude_tags = set()  # 現在の除外タグ
         self.group_rows = []  # 各行: {"input": QLineEdit, "container": QWidget}
         self._last_focused_input = None  # 直近にフォーカスされていた検索行の QLineEdit
+        self._init_image_preview()
         self.init_ui()
     
     def init_ui(self):
@@ -1190,69 +1279,6 @@ class TagTab(QWidget):
             print(f"Search error: {e}")
             self.view_in_viewer_btn.setEnabled(False)
     
-    def show_image_preview(self, item):
-        """選択された画像のプレビューを表示"""
-        file_path = item.data(Qt.UserRole)
-        if not file_path or not os.path.exists(file_path):
-            self.preview_label.setText("画像ファイルが見つかりません")
-            self.image_info_label.setText("")
-            return
-        
-        try:
-            # 画像を読み込み
-            with Image.open(file_path) as pil_image:
-                # QPixmapに変換（バイト配列を変数に保持）
-                image_rgba = pil_image.convert("RGBA")
-                w, h = image_rgba.size
-                image_bytes = image_rgba.tobytes("raw", "RGBA")
-                qimage = QImage(image_bytes, w, h, QImage.Format_RGBA8888).copy()
-                original_pixmap = QPixmap.fromImage(qimage)
-                
-                # プレビューラベルのサイズを取得
-                label_width = self.preview_label.width() - 20  # マージンを考慮
-                label_height = self.preview_label.height() - 20
-                
-                if label_width <= 50 or label_height <= 50:
-                    label_width, label_height = 400, 300  # デフォルトサイズ
-                
-                # アスペクト比を保ったままスケール
-                scaled_pixmap = original_pixmap.scaled(
-                    label_width, label_height,
-                    Qt.KeepAspectRatio,  # アスペクト比を保持
-                    Qt.SmoothTransformation  # 高品質なスケーリング
-                )
-                
-                # ロード済みフラグでスタイル切替（theme.py の [loaded="true"] セレクタ）
-                self.preview_label.setProperty("loaded", True)
-                self.preview_label.style().unpolish(self.preview_label)
-                self.preview_label.style().polish(self.preview_label)
-                self.preview_label.setPixmap(scaled_pixmap)
-                
-                # 画像情報を表示
-                file_name = os.path.basename(file_path)
-                file_size = os.path.getsize(file_path)
-                file_size_mb = file_size / (1024 * 1024)
-                
-                # 元の画像サイズを取得
-                with Image.open(file_path) as orig_image:
-                    orig_width, orig_height = orig_image.size
-                
-                # タグ情報を取得
-                tags = self.tag_manager.get_tags(file_path)
-                tags_text = f"タグ: {', '.join(tags)}" if tags else "タグ: なし"
-                
-                info_text = f"""📁 {file_name}
-📏 {orig_width} × {orig_height}
-💾 {file_size_mb:.1f} MB
-🏷️ {tags_text}"""
-                
-                self.image_info_label.setText(info_text)
-                
-        except Exception as e:
-            self.preview_label.setText(f"画像の読み込みに失敗しました\n{str(e)}")
-            self.image_info_label.setText("")
-            print(f"Preview error: {e}")
-    
     def show_results_in_viewer(self):
         """検索結果をビューアーで表示"""
         if self.results_list.count() == 0:
@@ -1299,12 +1325,8 @@ class TagTab(QWidget):
             # フォルダを切り替えて画像を表示
             folder_path = os.path.dirname(file_path)
             try:
-                self.viewer.load_images(folder_path)
-                
-                # 該当画像を選択
-                if file_path in self.viewer.images:
-                    self.viewer.current_image_index = self.viewer.images.index(file_path)
-                    self.viewer.show_image()
+                # 一覧はバックグラウンドで読み込まれ、該当画像が見つかった時点で選択される
+                self.viewer.load_images(folder_path, focus_path=file_path)
                     
                 # ビューアータブに切り替え
                 self.viewer.tabs.setCurrentWidget(self.viewer.image_tab)
@@ -1312,13 +1334,16 @@ class TagTab(QWidget):
                 QMessageBox.warning(self, "エラー", f"フォルダの読み込みに失敗しました:\n{folder_path}\n{str(e)}")
 
 
-class FavoritesTab(QWidget):
+class FavoritesTab(_ImagePreviewMixin, QWidget):
     """お気に入り画像管理タブ"""
+
+    _PREVIEW_ICON = "♡"
     
     def __init__(self, tag_manager, viewer):
         super().__init__()
         self.tag_manager = tag_manager
         self.viewer = viewer
+        self._init_image_preview()
         self.init_ui()
     
     def init_ui(self):
@@ -1462,8 +1487,8 @@ class FavoritesTab(QWidget):
             
             # フィルター処理
             if self.current_folder_only.isChecked() and hasattr(self.viewer, 'images') and self.viewer.images:
-                # 現在のフォルダ内の画像のみ
-                current_paths = set(self.viewer.images)
+                # 現在のフォルダ内の画像のみ（お気に入りが無ければ一覧のパスを組み立てない）
+                current_paths = set(self.viewer.images) if all_favorites else set()
                 filtered_favorites = [
                     (img_path, file_name, updated_at) 
                     for img_path, file_name, updated_at in all_favorites
@@ -1508,69 +1533,6 @@ class FavoritesTab(QWidget):
             print(f"Update favorites list error: {e}")
             self.view_favorites_in_viewer_btn.setEnabled(False)
     
-    def show_image_preview(self, item):
-        """選択された画像のプレビューを表示（タグタブと同様）"""
-        file_path = item.data(Qt.UserRole)
-        if not file_path or not os.path.exists(file_path):
-            self.preview_label.setText("画像ファイルが見つかりません")
-            self.image_info_label.setText("")
-            return
-        
-        try:
-            # 画像を読み込み
-            with Image.open(file_path) as pil_image:
-                # QPixmapに変換（バイト配列を変数に保持）
-                image_rgba = pil_image.convert("RGBA")
-                w, h = image_rgba.size
-                image_bytes = image_rgba.tobytes("raw", "RGBA")
-                qimage = QImage(image_bytes, w, h, QImage.Format_RGBA8888).copy()
-                original_pixmap = QPixmap.fromImage(qimage)
-                
-                # プレビューラベルのサイズを取得
-                label_width = self.preview_label.width() - 20
-                label_height = self.preview_label.height() - 20
-                
-                if label_width <= 50 or label_height <= 50:
-                    label_width, label_height = 400, 300
-                
-                # アスペクト比を保ったままスケール
-                scaled_pixmap = original_pixmap.scaled(
-                    label_width, label_height,
-                    Qt.KeepAspectRatio,
-                    Qt.SmoothTransformation
-                )
-                
-                # ロード済みフラグでスタイル切替（theme.py の [loaded="true"] セレクタ）
-                self.preview_label.setProperty("loaded", True)
-                self.preview_label.style().unpolish(self.preview_label)
-                self.preview_label.style().polish(self.preview_label)
-                self.preview_label.setPixmap(scaled_pixmap)
-                
-                # 画像情報を表示
-                file_name = os.path.basename(file_path)
-                file_size = os.path.getsize(file_path)
-                file_size_mb = file_size / (1024 * 1024)
-                
-                # 元の画像サイズを取得
-                with Image.open(file_path) as orig_image:
-                    orig_width, orig_height = orig_image.size
-                
-                # タグ情報を取得
-                tags = self.tag_manager.get_tags(file_path)
-                tags_text = f"タグ: {', '.join(tags)}" if tags else "タグ: なし"
-                
-                info_text = f"""♡ {file_name}
-📏 {orig_width} × {orig_height}
-💾 {file_size_mb:.1f} MB
-🏷️ {tags_text}"""
-                
-                self.image_info_label.setText(info_text)
-                
-        except Exception as e:
-            self.preview_label.setText(f"画像の読み込みに失敗しました\n{str(e)}")
-            self.image_info_label.setText("")
-            print(f"Preview error: {e}")
-    
     def show_favorites_in_viewer(self):
         """お気に入り画像をビューアーで表示"""
         if self.favorites_list.count() == 0:
@@ -1611,12 +1573,8 @@ class FavoritesTab(QWidget):
             # フォルダを切り替えて画像を表示
             folder_path = os.path.dirname(file_path)
             try:
-                self.viewer.load_images(folder_path)
-                
-                # 該当画像を選択
-                if file_path in self.viewer.images:
-                    self.viewer.current_image_index = self.viewer.images.index(file_path)
-                    self.viewer.show_image()
+                # 一覧はバックグラウンドで読み込まれ、該当画像が見つかった時点で選択される
+                self.viewer.load_images(folder_path, focus_path=file_path)
                     
                 # ビューアータブに切り替え
                 self.viewer.tabs.setCurrentWidget(self.viewer.image_tab)
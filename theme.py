@@ -574,6 +574,49 @@ def save_write_exif(enabled):
     s.setValue(_WRITE_EXIF_KEY, bool(enabled))
 
 
+# フォルダ監視（開いているフォルダの新着・削除を一覧に自動反映するか）
+_WATCH_FOLDER_KEY = "watch_folder"
+_DEFAULT_WATCH_FOLDER = False
+
+
+def load_watch_folder():
+    s = QSettings("MyCompany", "ImageViewerApp")
+    return bool(s.value(_WATCH_FOLDER_KEY, _DEFAULT_WATCH_FOLDER, type=bool))
+
+
+def save_watch_folder(enabled):
+    s = QSettings("MyCompany", "ImageViewerApp")
+    s.setValue(_WATCH_FOLDER_KEY, bool(enabled))
+
+
+# 画像プリフェッチキャッシュのメモリ上限（MB）
+# 件数ではなくデコード済み QImage のバイト数合計で管理する
+_PREFETCH_CACHE_MB_KEY = "prefetch_cache_mb"
+_DEFAULT_PREFETCH_CACHE_MB = 512
+PREFETCH_CACHE_MB_RANGE = (64, 8192)  # スピンボックスの上下限
+
+
+def load_prefetch_cache_mb():
+    s = QSettings("MyCompany", "ImageViewerApp")
+    try:
+        mb = int(s.value(_PREFETCH_CACHE_MB_KEY, _DEFAULT_PREFETCH_CACHE_MB))
+    except (TypeError, ValueError):
+        mb = _DEFAULT_PREFETCH_CACHE_MB
+    lo, hi = PREFETCH_CACHE_MB_RANGE
+    return max(lo, min(hi, mb))
+
+
+def save_prefetch_cache_mb(mb):
+    try:
+        mb = int(mb)
+    except (TypeError, ValueError):
+        return
+    lo, hi = PREFETCH_CACHE_MB_RANGE
+    mb = max(lo, min(hi, mb))
+    s = QSettings("MyCompany", "ImageViewerApp")
+    s.setValue(_PREFETCH_CACHE_MB_KEY, mb)
+
+
 def load_theme_name():
     """QSettings から保存済みのテーマ名を取得する。デフォルトはダーク。"""
     s = QSettings("MyCompany", "ImageViewerApp")
@@ -0,0 +1,450 @@
+"""全プレビュー面で共有するサムネイルのディスクキャッシュ。
+
+履歴・登録リストのフォルダプレビュー、タグ/お気に入りタブの画像プレビュー、
+4分割表示のセルが、同じ画像を毎回フルデコードしないように縮小版を
+~/.kabaviewer/thumbnails.db に保存しておく。
+
+キーは (file_path, bucket)。bucket は長辺の上限ピクセル数（THUMBNAIL_BUCKETS の
+いずれか）で、元ファイルの (mtime, file_size) が一致する場合のみヒットとみなす。
+合計サイズが上限を超えたら最終アクセスの古い順に削除する。
+
+生成・書き込みは専用ワーカースレッドで行い、完成したら thumbnail_ready を発行する。
+呼び出し側はミス時に request() して、シグナル受信時に表示し直せばよい。
+"""
+
+import os
+import time
+import queue
+import sqlite3
+import logging
+import threading
+from collections import namedtuple
+
+from PyQt5.QtCore import QObject, QThread, QMutex, QBuffer, QByteArray, QIODevice, pyqtSignal, Qt
+from PyQt5.QtGui import QImage, QImageReader, QImageIOHandler
+
+logger = logging.getLogger(__name__)
+
+
+_DEFAULT_DIR = os.path.expanduser("~/.kabaviewer")
+_DB_NAME = "thumbnails.db"
+
+SCHEMA_VERSION = 1
+
+# 長辺の上限ピクセル数。表示先のサイズ以上で最小のものを使う
+THUMBNAIL_BUCKETS = (320, 640, 1280)
+PREVIEW_BUCKET = 320  # 履歴・登録リストのフォルダプレビュー（280x180 程度）
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+# 合計サイズの再計算はこのバイト数書き込むごとに行う（毎回 SUM するのは無駄）
+_EVICT_CHECK_INTERVAL = 16 * 1024 * 1024
+
+_JPEG_QUALITY = 85
+
+
+ThumbnailEntry = namedtuple("ThumbnailEntry", ["image", "src_width", "src_height"])
+
+
+def _db_path():
+    return os.path.join(_DEFAULT_DIR, _DB_NAME)
+
+
+def bucket_for(width, height):
+    """width x height に収まる画像を劣化なく作れる最小の bucket。大きすぎる場合は None。"""
+    side = max(width, height)
+    for bucket in THUMBNAIL_BUCKETS:
+        if side <= bucket:
+            return bucket
+    return None
+
+
+def _source_size(image_path):
+    """ヘッダだけ読んで EXIF 回転反映後の元画像サイズを返す。失敗時は (0, 0)。"""
+    reader = QImageReader(image_path)
+    reader.setAutoTransform(True)
+    size = reader.size()
+    if not size.isValid():
+        return 0, 0
+    w, h = size.width(), size.height()
+    if reader.transformation() & QImageIOHandler.TransformationRotate90:
+        w, h = h, w
+    return w, h
+
+
+def _source_has_alpha(image_path):
+    fmt = QImageReader(image_path).imageFormat()
+    if fmt == QImage.Format_Invalid:
+        return True  # 判定できない場合は劣化しない PNG 側に倒す
+    return QImage(1, 1, fmt).hasAlphaChannel()
+
+
+def _encode(qimage, has_alpha):
+    """QImage を JPEG（透過なし）/ PNG（透過あり）のバイト列にする。"""
+    data = QByteArray()
+    buf = QBuffer(data)
+    buf.open(QIODevice.WriteOnly)
+    if has_alpha:
+        ok = qimage.save(buf, "PNG")
+    else:
+        ok = qimage.convertToFormat(QImage.Format_RGB888).save(buf, "JPEG", _JPEG_QUALITY)
+    buf.close()
+    return bytes(data) if ok else None
+
+
+def decode_bucket(image_path, bucket):
+    """元画像を bucket x bucket に収まるようにデコードする。失敗時は None。"""
+    reader = QImageReader(image_path)
+    reader.setAutoTransform(True)
+    size = reader.size()
+    if not size.isValid() or size.width() <= 0 or size.height() <= 0:
+        return None
+    scaled = size.scaled(bucket, bucket, Qt.KeepAspectRatio)
+    # 元画像より大きくはしない
+    if scaled.width() < size.width():
+        reader.setScaledSize(scaled)
+    qimage = reader.read()
+    if qimage.isNull():
+        return None
+    return qimage
+
+
+def decode_entry(image_path, bucket):
+    """キャッシュを使えないとき用。その場でデコードして ThumbnailEntry を返す（失敗時は None）。"""
+    qimage = decode_bucket(image_path, bucket)
+    if qimage is None:
+        return None
+    src_width, src_height = _source_size(image_path)
+    return ThumbnailEntry(qimage, src_width, src_height)
+
+
+class _ThumbnailWorker(QThread):
+    """生成・書き込み・LRU 削除を直列に処理するワーカー。状態は ThumbnailCache 側が持つ。"""
+
+    def __init__(self, cache, parent=None):
+        super().__init__(parent)
+        self._cache = cache
+
+    def run(self):
+        self._cache._worker_loop()
+
+
+class ThumbnailCache(QObject):
+    """サムネイルの SQLite キャッシュ。"""
+
+    thumbnail_ready = pyqtSignal(str, int)   # file_path, bucket
+    thumbnail_failed = pyqtSignal(str, int)  # file_path, bucket
+
+    _SENTINEL = None
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES, parent=None):
+        super().__init__(parent)
+        os.makedirs(_DEFAULT_DIR, exist_ok=True)
+        self.db_path = path or _db_path()
+        self.max_bytes = int(max_bytes)
+        # スレッドごとに connection を保持（sqlite3 はデフォルトでスレッド共有 NG）
+        self._local = threading.local()
+        self._init_schema()
+
+        # 直近の要求ほど先に処理する（クリックを連打したら最後の 1 枚が最優先）
+        self._jobs = queue.LifoQueue()
+        self._pending_lock = QMutex()
+        self._pending = set()   # (file_path, bucket) 生成待ち
+        self._touched = {}      # (file_path, bucket) -> last_access（まとめて書き戻す）
+        self._bytes_since_check = _EVICT_CHECK_INTERVAL  # 起動後最初の書き込みで 1 回確認
+        self._worker = _ThumbnailWorker(self)
+
+    # ---------- DB ----------
+
+    def _conn(self):
+        c = getattr(self._local, "conn", None)
+        if c is None:
+            c = sqlite3.connect(self.db_path)
+            # キャッシュは丈夫さよりスピード優先
+            c.execute("PRAGMA journal_mode=WAL")
+            c.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = c
+        return c
+
+    def close_thread_connection(self):
+        """呼び出し元スレッドの connection を閉じる（デコードワーカーの終了時）。"""
+        c = getattr(self._local, "conn", None)
+        if c is not None:
+            c.close()
+            self._local.conn = None
+
+    def _init_schema(self):
+        c = self._conn()
+        current = c.execute("PRAGMA user_version").fetchone()[0]
+        if current < 1:
+            c.execute(
+                """
+                CREATE TABLE IF NOT EXISTS thumbnails (
+                    file_path   TEXT NOT NULL,
+                    bucket      INTEGER NOT NULL,
+                    mtime       REAL NOT NULL,
+                    file_size   INTEGER NOT NULL,
+                    src_width   INTEGER NOT NULL DEFAULT 0,
+                    src_height  INTEGER NOT NULL DEFAULT 0,
+                    data        BLOB NOT NULL,
+                    nbytes      INTEGER NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (file_path, bucket)
+                )
+                """
+            )
+            c.execute("CREATE INDEX IF NOT EXISTS idx_thumbnails_last_access ON thumbnails(last_access)")
+        c.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        c.commit()
+
+    # ---------- 参照 API（メインスレッド・デコードワーカーから呼ばれる）----------
+
+    def lookup(self, file_path, bucket):
+        """ヒットなら ThumbnailEntry を返す。無い / 元ファイルが変わっていれば None。"""
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        try:
+            row = self._conn().execute(
+                "SELECT mtime, file_size, src_width, src_height, data FROM thumbnails"
+                " WHERE file_path=? AND bucket=?",
+                (file_path, bucket),
+            ).fetchone()
+        except sqlite3.Error:
+            logger.exception("サムネイルの参照に失敗: %s", file_path)
+            return None
+        if not row:
+            return None
+        mtime, file_size, src_width, src_height, data = row
+        if abs(mtime - st.st_mtime) >= 1e-6 or file_size != st.st_size:
+            return None
+        qimage = QImage.fromData(data)
+        if qimage.isNull():
+            return None
+        if qimage.format() != QImage.Format_RGBA8888:
+            qimage = qimage.convertToFormat(QImage.Format_RGBA8888)
+        self._pending_lock.lock()
+        try:
+            self._touched[(file_path, bucket)] = time.time()
+        finally:
+            self._pending_lock.unlock()
+        return ThumbnailEntry(qimage, src_width, src_height)
+
+    def get_image(self, file_path, bucket):
+        entry = self.lookup(file_path, bucket)
+        return entry.image if entry is not None else None
+
+    # ---------- 生成・書き込み要求（非同期）----------
+
+    def request(self, file_path, bucket):
+        """サムネイル生成をワーカーに依頼する。完成すると thumbnail_ready が発行される。"""
+        key = (file_path, bucket)
+        self._pending_lock.lock()
+        try:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+        finally:
+            self._pending_lock.unlock()
+        self._jobs.put(("generate", file_path, bucket, None))
+
+    def put_async(self, file_path, bucket, qimage):
+        """既にデコード済みの縮小画像をワーカー経由で保存する（エンコードもワーカー側）。"""
+        self._jobs.put(("store", file_path, bucket, qimage))
+
+    # ---------- ライフサイクル ----------
+
+    def start(self):
+        if not self._worker.isRunning():
+            self._worker.start()
+
+    def stop(self):
+        self._jobs.put((self._SENTINEL, None, None, None))
+
+    def wait(self):
+        self._worker.wait()
+
+    def clear(self):
+        c = self._conn()
+        c.execute("DELETE FROM thumbnails")
+        c.commit()
+
+    # ---------- ワーカー側 ----------
+
+    def _worker_loop(self):
+        while True:
+            kind, file_path, bucket, qimage = self._jobs.get()
+            if kind is self._SENTINEL:
+                self._flush_touched()
+                self.close_thread_connection()
+                break
+            try:
+                if kind == "generate":
+                    self._generate(file_path, bucket)
+                else:
+                    self._store(file_path, bucket, qimage)
+            except Exception:
+                logger.exception("サムネイル処理に失敗: %s", file_path)
+            self._flush_touched()
+
+    def _generate(self, file_path, bucket):
+        try:
+            # 連続リクエストで既に作られていればデコードしない
+            if self.lookup(file_path, bucket) is not None:
+                self.thumbnail_ready.emit(file_path, bucket)
+                return
+            qimage = decode_bucket(file_path, bucket)
+            if qimage is None or not self._store(file_path, bucket, qimage):
+                logger.warning("サムネイル生成に失敗: %s", file_path)
+                self.thumbnail_failed.emit(file_path, bucket)
+                return
+            self.thumbnail_ready.emit(file_path, bucket)
+        finally:
+            self._pending_lock.lock()
+            try:
+                self._pending.discard((file_path, bucket))
+            finally:
+                self._pending_lock.unlock()
+
+    def _store(self, file_path, bucket, qimage):
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return False
+        data = _encode(qimage, _source_has_alpha(file_path))
+        if not data:
+            return False
+        src_width, src_height = _source_size(file_path)
+        c = self._conn()
+        c.execute(
+            "INSERT OR REPLACE INTO thumbnails"
+            " (file_path, bucket, mtime, file_size, src_width, src_height, data, nbytes, last_access)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (file_path, bucket, st.st_mtime, st.st_size, src_width, src_height,
+             sqlite3.Binary(data), len(data), time.time()),
+        )
+        c.commit()
+        self._bytes_since_check += len(data)
+        if self._bytes_since_check >= _EVICT_CHECK_INTERVAL:
+            self._bytes_since_check = 0
+            self._evict()
+        return True
+
+    def _flush_touched(self):
+        self._pending_lock.lock()
+        try:
+            touched, self._touched = self._touched, {}
+        finally:
+            self._pending_lock.unlock()
+        if not touched:
+            return
+        c = self._conn()
+        c.executemany(
+            "UPDATE thumbnails SET last_access=? WHERE file_path=? AND bucket=?",
+            [(ts, path, bucket) for (path, bucket), ts in touched.items()],
+        )
+        c.commit()
+
+    def _evict(self):
+        """合計サイズが上限を超えていたら、最終アクセスの古い順に 9 割まで削る。"""
+        c = self._conn()
+        total = c.execute("SELECT COALESCE(SUM(nbytes), 0) FROM thumbnails").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * 0.9)
+        victims = []
+        for path, bucket, nbytes in c.execute(
+            "SELECT file_path, bucket, nbytes FROM thumbnails ORDER BY last_access"
+        ):
+            if total <= target:
+                break
+            victims.append((path, bucket))
+            total -= nbytes
+        c.executemany("DELETE FROM thumbnails WHERE file_path=? AND bucket=?", victims)
+        c.commit()
+        logger.info("サムネイルキャッシュを %d 件削除しました", len(victims))
+
+
+_shared = None
+
+
+def get_thumbnail_cache():
+    """アプリ全体で共有する ThumbnailCache を返す（初回呼び出しでワーカーを起動）。
+
+    開けない場合は None（呼び出し側はキャッシュを使わずにデコードする）。
+    """
+    global _shared
+    if _shared is None:
+        try:
+            cache = ThumbnailCache()
+        except (OSError, sqlite3.Error):
+            logger.exception("サムネイルキャッシュを開けませんでした")
+            return None
+        cache.start()
+        _shared = cache
+    return _shared
+
+
+class ThumbnailPreview(QObject):
+    """プレビュー欄 1 つ分の表示手順（キャッシュ参照 → 無ければ生成を依頼 → 完成通知で表示し直す）。
+
+    show(file_path, bucket) は、キャッシュにあれば on_shown(file_path, entry) をすぐ呼ぶ。
+    無ければ on_pending(file_path) を呼んで生成を依頼し、完成したら on_shown、
+    失敗したら on_failed(file_path) を呼ぶ。その間に別の画像を show() したり cancel() したり
+    していれば、古い画像の通知は無視する。キャッシュを開けないときはその場でデコードする。
+    """
+
+    def __init__(self, on_shown, on_pending, on_failed, parent=None):
+        super().__init__(parent)
+        self._on_shown = on_shown
+        self._on_pending = on_pending
+        self._on_failed = on_failed
+        self._pending = None  # 生成待ちの (file_path, bucket)
+        cache = get_thumbnail_cache()
+        if cache is not None:
+            cache.thumbnail_ready.connect(self._on_thumbnail_ready)
+            cache.thumbnail_failed.connect(self._on_thumbnail_failed)
+
+    def show(self, file_path, bucket):
+        self._pending = None
+        cache = get_thumbnail_cache()
+        if cache is None:
+            entry = decode_entry(file_path, bucket)
+        else:
+            entry = cache.lookup(file_path, bucket)
+            if entry is None:
+                self._pending = (file_path, bucket)
+                self._on_pending(file_path)
+                cache.request(file_path, bucket)
+                return
+        if entry is None:
+            self._on_failed(file_path)
+            return
+        self._on_shown(file_path, entry)
+
+    def cancel(self):
+        """生成待ちの画像を忘れる（プレビュー欄に別のものを出したとき）。"""
+        self._pending = None
+
+    def _on_thumbnail_ready(self, file_path, bucket):
+        if self._pending == (file_path, bucket):
+            self.show(file_path, bucket)
+
+    def _on_thumbnail_failed(self, file_path, bucket):
+        if self._pending == (file_path, bucket):
+            self._pending = None
+            self._on_failed(file_path)
+
+
+def shutdown_thumbnail_cache():
+    """共有 ThumbnailCache のワーカーを停止する（アプリ終了時）。
+
+    デコードワーカー側の connection は各ワーカーが終了時に閉じる。
+    """
+    global _shared
+    if _shared is not None:
+        _shared.stop()
+        _shared.wait()
+        _shared.close_thread_connection()
+        _shared = None
@@ -0,0 +1,549 @@
+"""超高解像度画像のズーム・パン表示（タイルピラミッド）。
+
+8K〜16K のアップスケール画像やパノラマを等倍まで拡大して見るためのビュー。
+画像全体を一度にデコードするのではなく、表示倍率に合ったレベル
+（レベル L は元画像の 1/2^L）を TILE_SIZE 四方のタイルに区切り、
+画面に見えているタイルだけを QImageReader.setClipRect + setScaledSize で
+切り出してデコードする。周囲 1 タイル分はパン用に先読みする。
+
+タイルはバイト数上限付きの LRU に保持するため、元画像の解像度に関係なく
+メモリ使用量は「タイルキャッシュ上限 + 全体表示用の縮小画像 1 枚」に収まる。
+タイルが揃うまでは全体表示用の縮小画像を引き伸ばして下に敷いておく。
+
+EXIF の回転・反転はタイル単位で反映する（表示座標の矩形を元画像の座標へ
+逆変換して切り出し、切り出したタイルに同じ回転・反転をかける）。
+"""
+
+import math
+import queue
+import logging
+import itertools
+import threading
+import collections
+
+from PyQt5.QtCore import Qt, QObject, QThread, QMutex, QRect, QRectF, QPointF, QSize, pyqtSignal
+from PyQt5.QtGui import QImage, QImageReader, QImageIOHandler, QPainter, QTransform
+from PyQt5.QtWidgets import QWidget
+
+logger = logging.getLogger(__name__)
+
+
+TILE_SIZE = 512
+OVERVIEW_MAX_SIDE = 1024       # 全体表示用の縮小画像の長辺
+DEFAULT_TILE_CACHE_BYTES = 128 * 1024 * 1024
+MAX_ZOOM = 8.0                 # 等倍の 8 倍まで拡大できる
+ZOOM_STEP = 1.25               # ホイール 1 ノッチあたりの倍率
+
+PRIORITY_VISIBLE_TILE = 0
+PRIORITY_NEIGHBOR_TILE = 1
+
+
+def _orientation_ops(transformation):
+    """QImageReader.transformation() を (左右反転, 上下反転, 90度回転) に分解する。
+
+    Qt の自動回転と同じく「反転 → 時計回りに 90 度」の順で適用する。
+    """
+    return (
+        bool(transformation & QImageIOHandler.TransformationMirror),
+        bool(transformation & QImageIOHandler.TransformationFlip),
+        bool(transformation & QImageIOHandler.TransformationRotate90),
+    )
+
+
+def _source_to_display(transformation, width, height):
+    """元画像（保存時の向き）の座標を表示時の向きの座標へ移す QTransform。"""
+    mirror, flip, rotate90 = _orientation_ops(transformation)
+    # QTransform(m11, m12, m21, m22, dx, dy): x' = m11*x + m21*y + dx, y' = m12*x + m22*y + dy
+    transform = QTransform(
+        -1 if mirror else 1, 0, 0, -1 if flip else 1,
+        width if mirror else 0, height if flip else 0,
+    )
+    if rotate90:
+        # 時計回りに 90 度: (x, y) -> (height - y, x)
+        transform = transform * QTransform(0, 1, -1, 0, height, 0)
+    return transform
+
+
+class ImageInfo:
+    """タイル計算に必要な元画像の情報（ヘッダだけ読んで作る）。"""
+
+    def __init__(self, path):
+        reader = QImageReader(path)
+        size = reader.size()
+        self.path = path
+        self.src_width = max(0, size.width())
+        self.src_height = max(0, size.height())
+        self.transformation = reader.transformation()
+        _, _, rotate90 = _orientation_ops(self.transformation)
+        if rotate90:
+            self.width, self.height = self.src_height, self.src_width
+        else:
+            self.width, self.height = self.src_width, self.src_height
+        self.valid = self.width > 0 and self.height > 0
+        # 最も粗いレベルでも画像全体が 1 タイルに収まるところまで
+        longest = max(self.width, self.height, 1)
+        self.max_level = max(0, math.ceil(math.log2(longest / TILE_SIZE))) if longest > TILE_SIZE else 0
+
+    def level_size(self, level):
+        scale = 2 ** level
+        return math.ceil(self.width / scale), math.ceil(self.height / scale)
+
+    def tile_count(self, level):
+        level_w, level_h = self.level_size(level)
+        return math.ceil(level_w / TILE_SIZE), math.ceil(level_h / TILE_SIZE)
+
+    def tile_rect(self, level, tx, ty):
+        """レベル座標でのタイル矩形（右端・下端のタイルは小さくなる）。"""
+        level_w, level_h = self.level_size(level)
+        x, y = tx * TILE_SIZE, ty * TILE_SIZE
+        return QRect(x, y, min(TILE_SIZE, level_w - x), min(TILE_SIZE, level_h - y))
+
+
+def decode_tile(info, level, tx, ty):
+    """タイル 1 枚をデコードする。失敗時は None。"""
+    level_rect = info.tile_rect(level, tx, ty)
+    if level_rect.isEmpty():
+        return None
+    scale = 2 ** level
+    display_rect = QRectF(
+        level_rect.x() * scale, level_rect.y() * scale,
+        level_rect.width() * scale, level_rect.height() * scale,
+    ).intersected(QRectF(0, 0, info.width, info.height))
+
+    to_display = _source_to_display(info.transformation, info.src_width, info.src_height)
+    to_source, invertible = to_display.inverted()
+    if not invertible:
+        return None
+    source_rect = to_source.mapRect(display_rect).toAlignedRect().intersected(
+        QRect(0, 0, info.src_width, info.src_height)
+    )
+    if source_rect.isEmpty():
+        return None
+
+    mirror, flip, rotate90 = _orientation_ops(info.transformation)
+    if rotate90:
+        scaled = QSize(level_rect.height(), level_rect.width())
+    else:
+        scaled = QSize(level_rect.width(), level_rect.height())
+
+    reader = QImageReader(info.path)
+    reader.setAutoTransform(False)  # 回転はタイルごとに下で反映する
+    reader.setClipRect(source_rect)
+    if scaled != source_rect.size():
+        reader.setScaledSize(scaled)
+    tile = reader.read()
+    if tile.isNull():
+        logger.warning("タイルのデコードに失敗: %s (L%d %d,%d) %s",
+                       info.path, level, tx, ty, reader.errorString())
+        return None
+    if mirror or flip:
+        tile = tile.mirrored(mirror, flip)
+    if rotate90:
+        tile = tile.transformed(QTransform().rotate(90))
+    return tile
+
+
+def decode_overview(path):
+    """全体表示用に長辺 OVERVIEW_MAX_SIDE まで縮小した画像（回転反映済み）。"""
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)
+    size = reader.size()
+    if size.isValid() and max(size.width(), size.height()) > OVERVIEW_MAX_SIDE:
+        reader.setScaledSize(size.scaled(OVERVIEW_MAX_SIDE, OVERVIEW_MAX_SIDE, Qt.KeepAspectRatio))
+    image = reader.read()
+    return None if image.isNull() else image
+
+
+class _TileWorker(QThread):
+    def __init__(self, loader, parent=None):
+        super().__init__(parent)
+        self._loader = loader
+
+    def run(self):
+        self._loader._worker_loop()
+
+
+class TileLoader(QObject):
+    """タイルのデコードワーカーとバイト数上限付き LRU。
+
+    キーは (path, level, tx, ty)。request_tiles() で「今ほしいタイル」の集合を
+    丸ごと差し替え、ワーカーは取り出した時点で不要になっていたタイルを読み捨てる
+    （パン・ズームで通り過ぎたタイルをデコードしない）。
+    """
+
+    tile_ready = pyqtSignal(object)            # key
+    overview_ready = pyqtSignal(str, QImage)   # path, image
+
+    _SENTINEL = None
+    _OVERVIEW = "overview"
+
+    def __init__(self, parent=None, max_bytes=DEFAULT_TILE_CACHE_BYTES, workers=2):
+        super().__init__(parent)
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = QMutex()
+        self._cache = collections.OrderedDict()  # key -> (QImage, nbytes)
+        self._cache_bytes = 0
+        self._max_bytes = max(1, int(max_bytes))
+        self._wanted = set()
+        self._pending = set()
+        self._info = None
+        self._workers = [_TileWorker(self, parent=self) for _ in range(max(1, workers))]
+
+    # ---------- ライフサイクル ----------
+
+    def start(self):
+        for w in self._workers:
+            w.start()
+
+    def stop(self):
+        for _ in self._workers:
+            self._queue.put((-1, next(self._seq), self._SENTINEL))
+
+    def wait(self):
+        for w in self._workers:
+            w.wait()
+
+    # ---------- API（メインスレッド）----------
+
+    def open(self, info):
+        """表示する画像を切り替える。前の画像のタイルは要求ごと破棄する。"""
+        self._lock.lock()
+        try:
+            self._info = info
+            self._wanted = {(info.path, self._OVERVIEW)}
+            self._cache.clear()
+            self._cache_bytes = 0
+        finally:
+            self._lock.unlock()
+        self._enqueue(PRIORITY_VISIBLE_TILE, (info.path, self._OVERVIEW))
+
+    def clear(self):
+        """表示をやめるときに要求とタイルキャッシュをすべて手放す。"""
+        self._lock.lock()
+        try:
+            self._info = None
+            self._wanted = set()
+            self._cache.clear()
+            self._cache_bytes = 0
+        finally:
+            self._lock.unlock()
+
+    def request_tiles(self, visible, neighbors):
+        """見えているタイルと先読みするタイルを要求する（それ以外の未着手要求は無効化）。"""
+        self._lock.lock()
+        try:
+            if self._info is None:
+                return
+            overview_key = (self._info.path, self._OVERVIEW)
+            self._wanted = set(visible) | set(neighbors) | {overview_key}
+        finally:
+            self._lock.unlock()
+        for key in visible:
+            self._enqueue(PRIORITY_VISIBLE_TILE, key)
+        for key in neighbors:
+            self._enqueue(PRIORITY_NEIGHBOR_TILE, key)
+
+    def get_tile(self, key):
+        self._lock.lock()
+        try:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            self._cache.move_to_end(key)
+            return entry[0]
+        finally:
+            self._lock.unlock()
+
+    def _enqueue(self, priority, key):
+        self._lock.lock()
+        try:
+            if key in self._cache or key in self._pending:
+                return
+            self._pending.add(key)
+        finally:
+            self._lock.unlock()
+        self._queue.put((priority, next(self._seq), key))
+
+    # ---------- ワーカー側 ----------
+
+    def _worker_loop(self):
+        while True:
+            _, _, key = self._queue.get()
+            if key is self._SENTINEL:
+                break
+            self._lock.lock()
+            try:
+                self._pending.discard(key)
+                info = self._info
+                wanted = key in self._wanted and info is not None and key[0] == info.path
+            finally:
+                self._lock.unlock()
+            if not wanted:
+                continue
+            try:
+                if key[1] == self._OVERVIEW:
+                    image = decode_overview(info.path)
+                    if image is not None:
+                        self.overview_ready.emit(info.path, image)
+                    continue
+                _, level, tx, ty = key
+                tile = decode_tile(info, level, tx, ty)
+            except Exception:
+                logger.exception("タイル処理に失敗: %s", key)
+                continue
+            if tile is None:
+                continue
+            self._store(key, tile)
+            self.tile_ready.emit(key)
+
+    def _store(self, key, tile):
+        nbytes = int(tile.sizeInBytes())
+        self._lock.lock()
+        try:
+            # 処理中に別の画像へ切り替わっていたら捨てる
+            if self._info is None or key[0] != self._info.path:
+                return
+            old = self._cache.pop(key, None)
+            if old is not None:
+                self._cache_bytes -= old[1]
+            self._cache[key] = (tile, nbytes)
+            self._cache_bytes += nbytes
+            while self._cache_bytes > self._max_bytes and len(self._cache) > 1:
+                _, (_, evicted) = self._cache.popitem(last=False)
+                self._cache_bytes -= evicted
+        finally:
+            self._lock.unlock()
+
+
+class TiledImageView(QWidget):
+    """ホイールで拡大縮小、ドラッグで移動、ダブルクリックで全体表示に戻るビュー。"""
+
+    def __init__(self, parent=None, max_bytes=DEFAULT_TILE_CACHE_BYTES):
+        super().__init__(parent)
+        self._loader = TileLoader(parent=self, max_bytes=max_bytes)
+        self._loader.tile_ready.connect(self._on_tile_ready)
+        self._loader.overview_ready.connect(self._on_overview_ready)
+        self._loader.start()
+
+        self._info = None
+        self._overview = None
+        self._scale = 1.0           # 表示ピクセル / 元画像ピクセル
+        self._offset = QPointF()    # ウィジェット座標での画像左上
+        self._fitted = True
+        self._drag_origin = None
+        self.setMouseTracking(False)
+        self.setFocusPolicy(Qt.NoFocus)  # キー操作はビューアー本体で受ける
+
+    # ---------- 外部 API ----------
+
+    def open(self, path):
+        info = ImageInfo(path)
+        self._info = info if info.valid else None
+        self._overview = None
+        if self._info is None:
+            self._loader.clear()
+            self.update()
+            return
+        self._loader.open(self._info)
+        self.fit_to_window()
+
+    def close_image(self):
+        self._info = None
+        self._overview = None
+        self._loader.clear()
+        self.update()
+
+    def stop(self):
+        self._loader.stop()
+        self._loader.wait()
+
+    def zoom_percent(self):
+        return self._scale * 100
+
+    def fit_to_window(self):
+        if self._info is None:
+            return
+        self._scale = self._fit_scale()
+        self._fitted = True
+        self._center()
+        self._request_tiles()
+        self.update()
+
+    # ---------- 座標計算 ----------
+
+    def _fit_scale(self):
+        return min(self.width() / self._info.width, self.height() / self._info.height, 1.0)
+
+    def _center(self):
+        self._offset = QPointF(
+            (self.width() - self._info.width * self._scale) / 2,
+            (self.height() - self._info.height * self._scale) / 2,
+        )
+
+    def _clamp_offset(self):
+        """画像が画面より小さい軸は中央寄せ、大きい軸は端が画面内に入り込まないようにする。"""
+        shown_w = self._info.width * self._scale
+        shown_h = self._info.height * self._scale
+        x, y = self._offset.x(), self._offset.y()
+        x = (self.width() - shown_w) / 2 if shown_w <= self.width() else min(0.0, max(self.width() - shown_w, x))
+        y = (self.height() - shown_h) / 2 if shown_h <= self.height() else min(0.0, max(self.height() - shown_h, y))
+        self._offset = QPointF(x, y)
+
+    def _level(self):
+        if self._scale >= 1.0:
+            return 0
+        return min(self._info.max_level, int(math.floor(math.log2(1.0 / self._scale))))
+
+    def _needs_tiles(self):
+        """全体表示用の縮小画像で足りる倍率ならタイルは不要。"""
+        if self._overview is None:
+            return True
+        return self._scale > self._overview.width() / self._info.width
+
+    def _tile_range(self, level, margin=0):
+        info = self._info
+        level_scale = 1.0 / (2 ** level)
+        left = max(0.0, -self._offset.x() / self._scale)
+        top = max(0.0, -self._offset.y() / self._scale)
+        right = min(info.width, (self.width() - self._offset.x()) / self._scale)
+        bottom = min(info.height, (self.height() - self._offset.y()) / self._scale)
+        if right <= left or bottom <= top:
+            return None
+        cols, rows = info.tile_count(level)
+        x0 = int(left * level_scale // TILE_SIZE) - margin
+        y0 = int(top * level_scale // TILE_SIZE) - margin
+        x1 = int((right * level_scale - 1e-6) // TILE_SIZE) + margin
+        y1 = int((bottom * level_scale - 1e-6) // TILE_SIZE) + margin
+        return max(0, x0), max(0, y0), min(cols - 1, x1), min(rows - 1, y1)
+
+    def _tile_target(self, level, tx, ty):
+        """タイルを描くウィジェット座標の矩形。"""
+        rect = self._info.tile_rect(level, tx, ty)
+        factor = (2 ** level) * self._scale
+        return QRectF(
+            self._offset.x() + rect.x() * factor, self._offset.y() + rect.y() * factor,
+            rect.width() * factor, rect.height() * factor,
+        )
+
+    def _request_tiles(self):
+        if self._info is None or not self._needs_tiles():
+            if self._info is not None:
+                self._loader.request_tiles([], [])
+            return
+        level = self._level()
+        visible_range = self._tile_range(level)
+        if visible_range is None:
+            return
+        path = self._info.path
+        vx0, vy0, vx1, vy1 = visible_range
+        visible = [(path, level, tx, ty) for ty in range(vy0, vy1 + 1) for tx in range(vx0, vx1 + 1)]
+        nx0, ny0, nx1, ny1 = self._tile_range(level, margin=1)
+        neighbors = [
+            (path, level, tx, ty)
+            for ty in range(ny0, ny1 + 1) for tx in range(nx0, nx1 + 1)
+            if not (vx0 <= tx <= vx1 and vy0 <= ty <= vy1)
+        ]
+        self._loader.request_tiles(visible, neighbors)
+
+    # ---------- シグナル ----------
+
+    def _on_tile_ready(self, key):
+        if self._info is not None and key[0] == self._info.path:
+            self.update()
+
+    def _on_overview_ready(self, path, image):
+        if self._info is not None and path == self._info.path:
+            self._overview = image
+            self._request_tiles()
+            self.update()
+
+    # ---------- イベント ----------
+
+    def paintEvent(self, event):
+        if self._info is None:
+            return
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        image_rect = QRectF(
+            self._offset.x(), self._offset.y(),
+            self._info.width * self._scale, self._info.height * self._scale,
+        )
+        if self._overview is not None:
+            painter.drawImage(image_rect, self._overview)
+        if self._needs_tiles():
+            level = self._level()
+            tile_range = self._tile_range(level)
+            if tile_range is not None:
+                x0, y0, x1, y1 = tile_range
+                for ty in range(y0, y1 + 1):
+                    for tx in range(x0, x1 + 1):
+                        tile = self._loader.get_tile((self._info.path, level, tx, ty))
+                        if tile is not None:
+                            # 隙間が出ないよう外側に丸める
+                            painter.drawImage(self._tile_target(level, tx, ty).toAlignedRect(), tile)
+        painter.end()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self._info is None:
+            return
+        if self._fitted:
+            self.fit_to_window()
+        else:
+            self._clamp_offset()
+            self._request_tiles()
+
+    def wheelEvent(self, event):
+        if self._info is None:
+            return
+        steps = event.angleDelta().y() / 120
+        if not steps:
+            return
+        self.zoom_at(QPointF(event.pos()), ZOOM_STEP ** steps)
+        event.accept()
+
+    def zoom_at(self, pos, factor):
+        """pos（ウィジェット座標）の下にある画素を動かさずに倍率を factor 倍する。"""
+        new_scale = max(self._fit_scale(), min(MAX_ZOOM, self._scale * factor))
+        if new_scale == self._scale:
+            return
+        image_x = (pos.x() - self._offset.x()) / self._scale
+        image_y = (pos.y() - self._offset.y()) / self._scale
+        self._scale = new_scale
+        self._offset = QPointF(pos.x() - image_x * new_scale, pos.y() - image_y * new_scale)
+        self._fitted = new_scale == self._fit_scale()
+        self._clamp_offset()
+        self._request_tiles()
+        self.update()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self._drag_origin = (QPointF(event.pos()), QPointF(self._offset))
+            self.setCursor(Qt.ClosedHandCursor)
+        event.accept()
+
+    def mouseMoveEvent(self, event):
+        if self._drag_origin is None or self._info is None:
+            return
+        start, offset = self._drag_origin
+        self._offset = offset + (QPointF(event.pos()) - start)
+        self._fitted = False
+        self._clamp_offset()
+        self._request_tiles()
+        self.update()
+
+    def mouseReleaseEvent(self, event):
+        self._drag_origin = None
+        self.unsetCursor()
+        event.accept()
+
+    def mouseDoubleClickEvent(self, event):
+        # 全体表示 ⇔ 等倍（クリック位置を中心に）
+        if self._info is None:
+            return
+        if self._fitted:
+            self.zoom_at(QPointF(event.pos()), 1.0 / self._scale)
+        else:
+            self.fit_to_window()
+        event.accept()
@@ -2,6 +2,6 @@
 # リリースごとに __version__ を更新する
 
 __app_name__ = "KabaViewer"
-__version__ = "1.10.0"
+__version__ = "1.15.21"
 __author__ = "kabanoki"
 __copyright__ = "© 2026 kabanoki"